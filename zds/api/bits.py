@@ -32,6 +32,29 @@ class DJRF3xPaginationKeyBit(QueryParamsKeyBit):
         return super().get_data(**kwargs)
 
 
+def get_update_key(update_key, scope=None, scope_value=None):
+    """Name of the cache key storing the last update of a resource, either globally or only for an owner (a user, a \
+    gallery...) when ``scope`` is given.
+    """
+    if scope is None:
+        return update_key
+    return f"{update_key}_{scope}_{scope_value}"
+
+
+def change_updated_at(update_key, scope=None, scope_values=()):
+    """Invalidate the cached API responses of a resource, globally or for some owners only.
+
+    :param update_key: the name of the resource key, like ``api_updated_notification``
+    :param scope: the kind of owner (``user``, ``gallery``...), or ``None`` for the global key
+    :param scope_values: the identifiers of the owners whose responses are invalidated
+    """
+    now = datetime.datetime.utcnow()
+    if scope is None:
+        cache.set(update_key, now)
+    else:
+        cache.set_many({get_update_key(update_key, scope, value): now for value in scope_values if value is not None})
+
+
 class UpdatedAtKeyBit(KeyBitBase):
     """
     A custom key to allow invalidation of a cache.
@@ -46,9 +69,39 @@ class UpdatedAtKeyBit(KeyBitBase):
         super().__init__(params)
         self.update_key = update_key
 
+    def get_update_key(self, **kwargs):
+        return self.update_key
+
     def get_data(self, **kwargs):
-        value = cache.get(self.update_key)
+        update_key = self.get_update_key(**kwargs)
+        value = cache.get(update_key)
         if value is None:
             value = datetime.datetime.utcnow()
-            cache.set(self.update_key, value=value)
+            cache.set(update_key, value=value)
         return force_str(value)
+
+
+class UserUpdatedAtKeyBit(UpdatedAtKeyBit):
+    """
+    An ``UpdatedAtKeyBit`` scoped to the user making the request: the cache is only invalidated by
+    ``change_updated_at(update_key, "user", [user_pk])``, so an update for one user does not invalidate the responses
+    of the others.
+    """
+
+    def get_update_key(self, **kwargs):
+        return get_update_key(self.update_key, "user", kwargs["request"].user.pk)
+
+
+class URLKwargUpdatedAtKeyBit(UpdatedAtKeyBit):
+    """
+    An ``UpdatedAtKeyBit`` scoped to the object identified by an argument of the URL (a gallery, a private topic...):
+    the cache is only invalidated by ``change_updated_at(update_key, scope, [pk])``.
+    """
+
+    def __init__(self, update_key, scope, url_kwarg, params=None):
+        super().__init__(update_key, params)
+        self.scope = scope
+        self.url_kwarg = url_kwarg
+
+    def get_update_key(self, **kwargs):
+        return get_update_key(self.update_key, self.scope, kwargs["kwargs"].get(self.url_kwarg))
@@ -3,7 +3,7 @@ from django.conf import settings
 from django.utils.timezone import make_aware
 from pytz import AmbiguousTimeError, NonExistentTimeError
 
-from zds.utils.feeds import DropControlCharsRss201rev2Feed, DropControlCharsAtom1Feed
+from zds.utils.feeds import CachedFeedMixin, DropControlCharsRss201rev2Feed, DropControlCharsAtom1Feed
 from .models import Post, Topic
 
 
@@ -36,7 +36,7 @@ def request_object(request):
     return obj
 
 
-class LastPostsFeedRSS(Feed, ItemMixin):
+class LastPostsFeedRSS(CachedFeedMixin, Feed, ItemMixin):
     title = "Derniers messages sur {}".format(settings.ZDS_APP["site"]["literal_name"])
     link = "/forums/"
     description = "Les derniers messages parus sur le forum de {}.".format(settings.ZDS_APP["site"]["literal_name"])
@@ -47,7 +47,7 @@ class LastPostsFeedRSS(Feed, ItemMixin):
 
     def items(self, obj):
         try:
-            posts = Post.objects.filter(topic__forum__groups__isnull=True)
+            posts = Post.objects.filter(topic__forum__groups__isnull=True).select_related("topic", "author")
             if "forum" in obj:
                 posts = posts.filter(topic__forum__pk=int(obj["forum"]))
             if "tag" in obj:
@@ -69,7 +69,7 @@ class LastPostsFeedATOM(LastPostsFeedRSS):
     subtitle = LastPostsFeedRSS.description
 
 
-class LastTopicsFeedRSS(Feed, ItemMixin):
+class LastTopicsFeedRSS(CachedFeedMixin, Feed, ItemMixin):
     title = "Derniers sujets sur {}".format(settings.ZDS_APP["site"]["literal_name"])
     link = "/forums/"
     description = "Les derniers sujets créés sur le forum de {}.".format(settings.ZDS_APP["site"]["literal_name"])
@@ -80,7 +80,7 @@ class LastTopicsFeedRSS(Feed, ItemMixin):
 
     def items(self, obj):
         try:
-            topics = Topic.objects.filter(forum__groups__isnull=True)
+            topics = Topic.objects.filter(forum__groups__isnull=True).select_related("forum", "author")
             if "forum" in obj:
                 topics = topics.filter(forum__pk=int(obj["forum"]))
             if "tag" in obj:
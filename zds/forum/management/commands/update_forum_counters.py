@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from zds.forum.models import Forum, Topic
+
+
+class Command(BaseCommand):
+    help = "Detect and fix the drift between the stored counters of the forums and topics and their real values"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true", help="only report the drifting counters, exit with an error if any"
+        )
+
+    def handle(self, *args, **options):
+        drifting_forums = [
+            forum
+            for forum in Forum.objects.with_computed_counters()
+            if (forum.topic_count, forum.post_count, forum.last_post_id)
+            != (forum.computed_topic_count, forum.computed_post_count, forum.computed_last_post_id)
+        ]
+        drifting_topics = Topic.objects.with_computed_post_count().exclude(post_count=F("computed_post_count"))
+
+        forum_pks = []
+        for forum in drifting_forums:
+            forum_pks.append(forum.pk)
+            self.stdout.write(
+                f"Forum #{forum.pk} ({forum.title}): {forum.topic_count} topics instead of {forum.computed_topic_count}, "
+                f"{forum.post_count} posts instead of {forum.computed_post_count}, "
+                f"last post #{forum.last_post_id} instead of #{forum.computed_last_post_id}"
+            )
+        topic_pks = []
+        for topic in drifting_topics:
+            topic_pks.append(topic.pk)
+            self.stdout.write(f"Topic #{topic.pk}: {topic.post_count} posts instead of {topic.computed_post_count}")
+
+        if options["check"]:
+            if forum_pks or topic_pks:
+                raise CommandError(f"{len(forum_pks)} forum(s) and {len(topic_pks)} topic(s) have drifting counters.")
+            self.stdout.write(self.style.SUCCESS("All counters are right."))
+            return
+
+        with transaction.atomic():
+            Forum.objects.update_counters(forum_pks)
+            Topic.objects.update_post_counts(topic_pks)
+        self.stdout.write(self.style.SUCCESS(f"{len(forum_pks)} forum(s) and {len(topic_pks)} topic(s) fixed."))
@@ -1,47 +1,88 @@
 from django.conf import settings
 from django.db import models
-from django.db.models import Q, F
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from model_utils.managers import InheritanceManager
 
 from zds.utils import get_current_user
 
 
+def count_subquery(queryset, field):
+    """Build a subquery counting the rows of ``queryset`` grouped by ``field``, to be used in an annotation or an \
+    update.
+
+    :param queryset: rows to count, filtered with an ``OuterRef``
+    :param field: the field to group on (the one filtered with ``OuterRef``)
+    """
+    counts = queryset.order_by().values(field).annotate(count=Count("pk")).values("count")
+    return Coalesce(Subquery(counts), 0)
+
+
 class ForumManager(models.Manager):
     """
     Custom forum manager.
     """
 
-    def get_public_forums_of_category(self, category, with_count=False):
-        """load all public forums for a category
+    def get_public_forums_of_category(self, category):
+        """load all public forums for a category, with their last message
 
         :param category: the related category
         :type category: zds.forum.models.ForumCategory
-        :param with_count: optional parameter: if true, will preload thread and post number for each forum inside \
-        category
-        :type with_count: bool
-        """
-        queryset = self.filter(category=category, groups__isnull=True).select_related("category").distinct()
-        if with_count:
-            # this request count the threads in each forum
-            thread_sub_query = "SELECT COUNT(*) FROM forum_topic WHERE forum_topic.forum_id=forum_forum.id"
-            # this request count the posts in each forum
-            post_sub_query = (
-                "SELECT COUNT(*) FROM forum_post WHERE forum_post.topic_id "
-                "IN(SELECT id FROM forum_topic WHERE forum_topic.forum_id=forum_forum.id)"
-            )
-
-            queryset = queryset.extra(select={"thread_count": thread_sub_query, "post_count": post_sub_query})
-        return queryset.all()
+        """
+        return (
+            self.filter(category=category, groups__isnull=True)
+            .select_related("category", "last_post__topic")
+            .distinct()
+            .all()
+        )
 
     def get_private_forums_of_category(self, category, user):
         return (
             self.filter(category=category, groups__in=user.groups.all())
             .order_by("position_in_category")
-            .select_related("category")
+            .select_related("category", "last_post__topic")
             .distinct()
             .all()
         )
 
+    def with_computed_counters(self):
+        """Annotate the forums with ``computed_topic_count``, ``computed_post_count`` and ``computed_last_post_id``, \
+        the values of their counters computed from the topics and the posts.
+        """
+        from zds.forum.models import Post, Topic
+
+        return self.annotate(
+            computed_topic_count=count_subquery(Topic.objects.filter(forum=OuterRef("pk")), "forum"),
+            computed_post_count=count_subquery(Post.objects.filter(topic__forum=OuterRef("pk")), "topic__forum"),
+            computed_last_post_id=self._last_post_subquery(),
+        )
+
+    def update_counters(self, forum_pks):
+        """Recompute and store all the counters of some forums.
+
+        :param forum_pks: pk of the forums to update
+        """
+        from zds.forum.models import Post, Topic
+
+        self.filter(pk__in=forum_pks).update(
+            topic_count=count_subquery(Topic.objects.filter(forum=OuterRef("pk")), "forum"),
+            post_count=count_subquery(Post.objects.filter(topic__forum=OuterRef("pk")), "topic__forum"),
+            last_post=self._last_post_subquery(),
+        )
+
+    def update_last_posts(self, forum_pks):
+        """Recompute the last post of some forums (after a deletion or a move of a topic).
+
+        :param forum_pks: pk of the forums to update
+        """
+        self.filter(pk__in=forum_pks).update(last_post=self._last_post_subquery())
+
+    @staticmethod
+    def _last_post_subquery():
+        from zds.forum.models import Post
+
+        return Subquery(Post.objects.filter(topic__forum=OuterRef("pk")).order_by("-pubdate", "-pk").values("pk")[:1])
+
     def get_authorized_forums_pk(self, user):
         """
         Find forums the user is allowed to visit.
@@ -64,6 +105,23 @@ class TopicManager(models.Manager):
     Custom topic manager.
     """
 
+    def with_computed_post_count(self):
+        """Annotate the topics with ``computed_post_count``, their number of posts computed from the posts."""
+        from zds.forum.models import Post
+
+        return self.annotate(computed_post_count=count_subquery(Post.objects.filter(topic=OuterRef("pk")), "topic"))
+
+    def update_post_counts(self, topic_pks):
+        """Recompute and store the number of posts of some topics.
+
+        :param topic_pks: pk of the topics to update
+        """
+        from zds.forum.models import Post
+
+        self.filter(pk__in=topic_pks).update(
+            post_count=count_subquery(Post.objects.filter(topic=OuterRef("pk")), "topic")
+        )
+
     def visibility_check_query(self, current_user):
         """
         Build a subquery that checks if a topic is readable by current user
@@ -109,7 +167,7 @@ class TopicManager(models.Manager):
     def get_all_topics_of_a_forum(self, forum_pk, is_sticky=False):
         return (
             self.filter(forum__pk=forum_pk, is_sticky=is_sticky)
-            .order_by("-last_message__pubdate")
+            .order_by("-last_message__pubdate", "-pk")
             .select_related("author__profile", "solved_by")
             .prefetch_related("last_message", "tags")
             .all()
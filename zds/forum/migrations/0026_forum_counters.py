@@ -0,0 +1,62 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_subquery(queryset, field):
+    return Coalesce(Subquery(queryset.order_by().values(field).annotate(count=Count("pk")).values("count")), 0)
+
+
+def compute_counters(apps, schema_editor):
+    Forum = apps.get_model("forum", "Forum")
+    Topic = apps.get_model("forum", "Topic")
+    Post = apps.get_model("forum", "Post")
+
+    Topic.objects.update(post_count=count_subquery(Post.objects.filter(topic=OuterRef("pk")), "topic"))
+    Forum.objects.update(
+        topic_count=count_subquery(Topic.objects.filter(forum=OuterRef("pk")), "forum"),
+        post_count=count_subquery(Post.objects.filter(topic__forum=OuterRef("pk")), "topic__forum"),
+        last_post=Subquery(
+            Post.objects.filter(topic__forum=OuterRef("pk")).order_by("-pubdate", "-pk").values("pk")[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0025_remove_update_index_date"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="forum",
+            name="topic_count",
+            field=models.IntegerField(default=0, editable=False, verbose_name="Nombre de sujets"),
+        ),
+        migrations.AddField(
+            model_name="forum",
+            name="post_count",
+            field=models.IntegerField(default=0, editable=False, verbose_name="Nombre de messages"),
+        ),
+        migrations.AddField(
+            model_name="forum",
+            name="last_post",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="forum.post",
+                verbose_name="Dernier message",
+            ),
+        ),
+        migrations.AddField(
+            model_name="topic",
+            name="post_count",
+            field=models.IntegerField(default=0, editable=False, verbose_name="Nombre de messages"),
+        ),
+        migrations.RunPython(compute_counters, migrations.RunPython.noop),
+    ]
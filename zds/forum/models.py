@@ -5,9 +5,10 @@ from math import ceil
 from django.conf import settings
 from django.contrib.auth.models import Group, User, AnonymousUser
 from django.urls import reverse
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.dispatch import receiver
-from django.db.models.signals import pre_delete, post_save
+from django.db.models.signals import pre_delete, post_delete, post_save
 
 from zds.forum import signals
 from zds.forum.managers import TopicManager, ForumManager, PostManager, TopicReadManager
@@ -29,6 +30,20 @@ def get_search_filter_authorized_forums(user: User) -> SearchFilter:
     return filter_by
 
 
+def get_update_fields_without_counters(instance, counter_fields, update_fields=None):
+    """Counters are only updated with ``F()`` expressions or through the managers, so a regular ``save()`` of an \
+    existing object must not write them back (the values held by the instance are likely outdated).
+
+    :param instance: the object being saved
+    :param counter_fields: name of the counter fields of the model
+    :param update_fields: the ``update_fields`` given to ``save()``, if any
+    :return: the fields to update
+    """
+    if update_fields is not None or instance._state.adding:
+        return update_fields
+    return [f.name for f in instance._meta.concrete_fields if not f.primary_key and f.name not in counter_fields]
+
+
 class ForumCategory(models.Model):
     """
     A ForumCategory is a simple container for Forums.
@@ -61,17 +76,15 @@ class ForumCategory(models.Model):
     def get_absolute_url(self):
         return reverse("forum:cat-forums-list", kwargs={"slug": self.slug})
 
-    def get_forums(self, user, with_count=False):
+    def get_forums(self, user):
         """get all forums that user can access
 
         :param user: the related user
         :type user: User
-        :param with_count: If true will preload thread and post number for each forum of this category
-        :type with_count: bool
         :return: All forums in category, ordered by forum's position in category
         :rtype: list[Forum]
         """
-        forums_pub = Forum.objects.get_public_forums_of_category(self, with_count=with_count)
+        forums_pub = Forum.objects.get_public_forums_of_category(self)
         if user is not None and user.is_authenticated:
             forums_private = Forum.objects.get_private_forums_of_category(self, user)
             return list(forums_pub | forums_private)
@@ -99,47 +112,58 @@ class Forum(models.Model):
     position_in_category = models.IntegerField("Position dans la catégorie", null=True, blank=True, db_index=True)
 
     slug = models.SlugField(max_length=80, unique=True)
+
+    # Counters maintained on each creation, deletion and move of topics and posts (see `update_forum_counters`)
+    topic_count = models.IntegerField("Nombre de sujets", default=0, editable=False)
+    post_count = models.IntegerField("Nombre de messages", default=0, editable=False)
+    last_post = models.ForeignKey(
+        "Post",
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Dernier message",
+        editable=False,
+        on_delete=models.SET_NULL,
+    )
+    counter_fields = ("topic_count", "post_count", "last_post")
+
     _nb_group = None
     objects = ForumManager()
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """Overridden to never overwrite the counters"""
+
+        kwargs["update_fields"] = get_update_fields_without_counters(
+            self, self.counter_fields, kwargs.get("update_fields")
+        )
+        return super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse("forum:topics-list", kwargs={"cat_slug": self.category.slug, "forum_slug": self.slug})
 
     def get_topic_count(self):
-        """Retrieve or aggregate the number of threads in this forum. If this number already exists, it must be stored \
-        in thread_count. Otherwise it will process a SQL query.
-
+        """
         :return: the number of threads in the forum.
         """
-        try:
-            return self.thread_count
-        except AttributeError:
-            return Topic.objects.filter(forum=self).count()
+        return self.topic_count
 
     def get_post_count(self):
-        """Retrieve or aggregate the number of posts in this forum. If this number already exists, it must be stored \
-        in post_count. Otherwise it will process a SQL query.
-
+        """
         :return: the number of posts for a forum.
         """
-        try:
-            return self.post_count
-        except AttributeError:
-            return Post.objects.filter(topic__forum=self).count()
+        return self.post_count
 
     def get_last_message(self):
         """
         :return: the last message on the forum, if there are any.
         """
-        try:
-            last_post = Post.objects.select_related("topic").filter(topic__forum=self).order_by("-pubdate").all()[0]
+        last_post = self.last_post
+        if last_post is not None:
             last_post.topic.forum = self
-            return last_post
-        except IndexError:
-            return None
+        return last_post
 
     def can_read(self, user):
         """
@@ -218,6 +242,10 @@ class Topic(AbstractSearchIndexableModel):
 
     tags = models.ManyToManyField(Tag, verbose_name="Tags du forum", blank=True, db_index=True)
 
+    # Counter maintained on each creation and deletion of posts (see `update_forum_counters`)
+    post_count = models.IntegerField("Nombre de messages", default=0, editable=False)
+    counter_fields = ("post_count",)
+
     objects = TopicManager()
 
     def __init__(self, *args, **kwargs):
@@ -226,6 +254,7 @@ class Topic(AbstractSearchIndexableModel):
         self._last_post = None
         self._first_post = None
         self._is_read = None
+        self._prefetched_read_state = False
 
     def __str__(self):
         return self.title
@@ -264,7 +293,7 @@ class Topic(AbstractSearchIndexableModel):
         """
         :return: the number of posts in the topic.
         """
-        return Post.objects.filter(topic__pk=self.pk).count()
+        return self.post_count
 
     def get_last_post(self):
         """
@@ -317,6 +346,27 @@ class Topic(AbstractSearchIndexableModel):
         self.save()
         signals.topic_edited.send(sender=self.__class__, topic=self)
 
+    def get_last_read_post_by_user(self, user):
+        """
+        :param user: an authenticated user
+        :return: the last post the user has read in this topic, from the state loaded by ``prefetch_topics_read_state``
+            if any.
+        :raise TopicRead.DoesNotExist: if the user has never read this topic.
+        """
+        if user is None or not user.is_authenticated:
+            raise TopicRead.DoesNotExist
+        last_read_posts = getattr(self, "_last_read_posts", {})
+        if user.pk in last_read_posts:
+            if last_read_posts[user.pk] is None:
+                raise TopicRead.DoesNotExist
+            return last_read_posts[user.pk]
+        return (
+            TopicRead.objects.select_related("post")
+            .filter(topic__pk=self.pk, user__pk=user.pk)
+            .latest("post__position")
+            .post
+        )
+
     def last_read_post(self):
         """
         Returns the last post the current user has read in this topic.
@@ -325,12 +375,7 @@ class Topic(AbstractSearchIndexableModel):
         :return: the last post the user has read.
         """
         try:
-            return (
-                TopicRead.objects.select_related()
-                .filter(topic__pk=self.pk, user__pk=get_current_user().pk)
-                .latest("post__position")
-                .post
-            )
+            return self.get_last_read_post_by_user(get_current_user())
         except TopicRead.DoesNotExist:
             return self.first_post()
 
@@ -362,16 +407,8 @@ class Topic(AbstractSearchIndexableModel):
         :return: the primary key
         :rtype: int
         """
-        t_read = (
-            TopicRead.objects.select_related("post")
-            .filter(topic__pk=self.pk, user__pk=user.pk)
-            .latest("post__position")
-        )
-        if t_read:
-            return t_read.post.pk, t_read.post.position
-        return list(
-            Post.objects.filter(topic__pk=self.pk).order_by("position").values("pk", "position").first().values()
-        )
+        last_read_post = self.get_last_read_post_by_user(user)
+        return last_read_post.pk, last_read_post.position
 
     def first_unread_post(self, user: User = None):
         """
@@ -388,7 +425,10 @@ class Topic(AbstractSearchIndexableModel):
             if user is None:
                 user = get_current_user()
 
-            last_post = TopicRead.objects.filter(topic__pk=self.pk, user__pk=user.pk).latest("post__position").post
+            last_post = self.get_last_read_post_by_user(user)
+            if last_post.pk == self.last_message_id:
+                # everything was read, there is no next post
+                return self.get_last_answer()
 
             next_post = (
                 Post.objects.filter(topic__pk=self.pk, position__gt=last_post.position).order_by("position").first()
@@ -473,10 +513,10 @@ class Topic(AbstractSearchIndexableModel):
         """Overridden to prefetch tags and forum"""
 
         query = super().get_indexable_objects(force_reindexing)
-        return query.prefetch_related("tags").select_related("forum")
+        return query.prefetch_related("tags").select_related("forum__category")
 
     def get_document_source(self, excluded_fields=[]):
-        excluded_fields.extend(["tags", "pubdate"])
+        excluded_fields = excluded_fields + ["tags", "pubdate"]
 
         data = super().get_document_source(excluded_fields=excluded_fields)
         data["tags"] = []
@@ -506,12 +546,19 @@ class Topic(AbstractSearchIndexableModel):
         }
 
     def save(self, *args, **kwargs):
-        """Overridden to handle the displacement of the topic to another forum"""
+        """Overridden to handle the displacement of the topic to another forum and to keep the counters of the forums \
+        up to date"""
+
+        kwargs["update_fields"] = get_update_fields_without_counters(
+            self, self.counter_fields, kwargs.get("update_fields")
+        )
 
         try:
             old_self = Topic.objects.get(pk=self.pk)
         except Topic.DoesNotExist:
-            pass
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                Forum.objects.filter(pk=self.forum_id).update(topic_count=F("topic_count") + 1)
         else:
             is_moved = old_self.forum.pk != self.forum.pk
             posts = Post.objects.filter(topic__pk=self.pk)
@@ -530,7 +577,16 @@ class Topic(AbstractSearchIndexableModel):
                 search_engine_manager.delete_by_query(Post.get_search_document_type(), {"filter_by": str(filter_by)})
                 search_engine_manager.delete_document(self)
 
-        return super().save(*args, **kwargs)
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if is_moved:
+                    Forum.objects.filter(pk=old_self.forum_id).update(
+                        topic_count=F("topic_count") - 1, post_count=F("post_count") - old_self.post_count
+                    )
+                    Forum.objects.filter(pk=self.forum_id).update(
+                        topic_count=F("topic_count") + 1, post_count=F("post_count") + old_self.post_count
+                    )
+                    Forum.objects.update_last_posts([old_self.forum_id, self.forum_id])
 
     def _compute_search_weight(self):
         """
@@ -597,6 +653,16 @@ class Post(Comment, AbstractSearchIndexableModel):
     def get_notification_title(self):
         return self.topic.title
 
+    def save(self, *args, **kwargs):
+        """Overridden to keep the counters of the topic and of the forum up to date"""
+
+        with transaction.atomic():
+            is_new = self._state.adding
+            super().save(*args, **kwargs)
+            if is_new:
+                Topic.objects.filter(pk=self.topic_id).update(post_count=F("post_count") + 1)
+                Forum.objects.filter(pk=self.topic.forum_id).update(post_count=F("post_count") + 1, last_post=self)
+
     @classmethod
     def get_search_document_schema(cls):
         search_engine_schema = super().get_search_document_schema()
@@ -624,7 +690,7 @@ class Post(Comment, AbstractSearchIndexableModel):
             .get_indexable_objects(force_reindexing)
             .filter(is_visible=True)
             .prefetch_related("topic")
-            .prefetch_related("topic__forum")
+            .prefetch_related("topic__forum__category")
         )
 
         return q
@@ -632,7 +698,7 @@ class Post(Comment, AbstractSearchIndexableModel):
     def get_document_source(self, excluded_fields=[]):
         """Overridden to handle the information of the topic"""
 
-        excluded_fields.extend(["pubdate", "text"])
+        excluded_fields = excluded_fields + ["pubdate", "text"]
 
         data = super().get_document_source(excluded_fields=excluded_fields)
         data["topic_pk"] = self.topic.pk
@@ -700,6 +766,24 @@ def delete_in_search(sender, instance, **kwargs):
     SearchIndexManager().delete_document(instance)
 
 
+@receiver(post_delete, sender=Topic)
+def topic_deleted(instance, **kwargs):
+    """Keep the counters of the forum up to date (its posts were deleted before and already counted)"""
+    Forum.objects.filter(pk=instance.forum_id).update(topic_count=F("topic_count") - 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(instance, **kwargs):
+    """Keep the counters of the topic and of the forum up to date"""
+    Topic.objects.filter(pk=instance.topic_id).update(post_count=F("post_count") - 1)
+    forum_pk = Topic.objects.filter(pk=instance.topic_id).values_list("forum", flat=True).first()
+    if forum_pk is not None:
+        Forum.objects.filter(pk=forum_pk).update(post_count=F("post_count") - 1)
+        if not Forum.objects.filter(pk=forum_pk, last_post__isnull=False).exists():
+            # the last post of the forum was this one
+            Forum.objects.update_last_posts([forum_pk])
+
+
 class TopicRead(models.Model):
     """
     This model tracks the last post read in a topic by a user.
@@ -720,6 +804,61 @@ class TopicRead(models.Model):
         return f"<Sujet '{self.topic}' lu par {self.user}, #{self.post.pk}>"
 
 
+def prefetch_topics_read_state(topics, user):
+    """
+    Loads with two queries what the lists of topics display about each topic for a user: its first post, its last
+    post, and the last post the user has read. ``Topic.is_read_by_user()``, ``get_last_answer()``,
+    ``resolve_last_read_post_absolute_url()`` and ``first_unread_post()`` then use them instead of querying the
+    database for each topic.
+
+    :param topics: the topics of the list
+    :param user: the user who displays the list (possibly anonymous)
+    :return: the primary keys of the topics the user has read
+    """
+    topics = list(topics)
+    _load_topics_read_state([topic for topic in topics if not topic._prefetched_read_state], user)
+    return [topic.pk for topic in topics if topic.is_read_by_user(user)]
+
+
+def _load_topics_read_state(topics, user):
+    if not topics:
+        return
+
+    last_message_pks = {topic.last_message_id for topic in topics}
+    first_posts, last_posts = {}, {}
+    for post in Post.objects.filter(
+        models.Q(topic__in=topics, position=1) | models.Q(pk__in=last_message_pks)
+    ).select_related("author"):
+        if post.position == 1:
+            first_posts[post.topic_id] = post
+        if post.pk in last_message_pks:
+            last_posts[post.pk] = post
+
+    is_authenticated = user is not None and user.is_authenticated
+    if is_authenticated:
+        last_read_posts = {
+            topic_read.topic_id: topic_read.post
+            for topic_read in TopicRead.objects.filter(user=user, topic__in=topics).select_related("post")
+        }
+
+    for topic in topics:
+        topic._prefetched_read_state = True
+        if topic.pk in first_posts:
+            topic._first_post = first_posts[topic.pk]
+            topic._first_post.topic = topic
+        if topic.last_message_id in last_posts:
+            topic._last_post = last_posts[topic.last_message_id]
+            topic._last_post.topic = topic
+        if is_authenticated:
+            last_read_post = last_read_posts.get(topic.pk)
+            if last_read_post is not None:
+                last_read_post.topic = topic
+            topic._last_read_posts = {user.pk: last_read_post}
+            topic._user_has_read = {
+                user.username: last_read_post is not None and last_read_post.pk == topic.last_message_id
+            }
+
+
 def mark_read(topic, user=None):
     """
     Mark the last message of a topic as read for the current user.
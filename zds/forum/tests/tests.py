@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta
+from io import StringIO
 
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.core import mail
+from django.core.management import CommandError, call_command
 from django.urls import reverse
 from django.test import TestCase
 
@@ -1228,6 +1230,63 @@ class ManagerTests(TestCase):
         self.assertEqual(sorted(Forum.objects.get_authorized_forums_pk(None)), sorted([self.forum1.pk, self.forum2.pk]))
 
 
+class ForumCountersTests(TestCase):
+    def setUp(self):
+        self.author = ProfileFactory().user
+        category = ForumCategoryFactory()
+        self.forum1 = ForumFactory(category=category, position_in_category=1)
+        self.forum2 = ForumFactory(category=category, position_in_category=2)
+
+    def assertCounters(self, forum, topic_count, post_count, last_post):
+        forum.refresh_from_db()
+        self.assertEqual(forum.get_topic_count(), topic_count)
+        self.assertEqual(forum.get_post_count(), post_count)
+        self.assertEqual(forum.get_last_message(), last_post)
+
+    def test_counters(self):
+        topic1 = TopicFactory(forum=self.forum1, author=self.author)
+        PostFactory(topic=topic1, author=self.author, position=1)
+        last_post = PostFactory(topic=topic1, author=self.author, position=2)
+        topic2 = TopicFactory(forum=self.forum1, author=self.author)
+        post = PostFactory(topic=topic2, author=self.author, position=1)
+        self.assertCounters(self.forum1, 2, 3, post)
+        self.assertEqual(Topic.objects.get(pk=topic1.pk).get_post_count(), 2)
+
+        # saving outdated instances does not overwrite the counters
+        self.forum1.save()
+        topic1.save()
+        self.assertCounters(self.forum1, 2, 3, post)
+        self.assertEqual(Topic.objects.get(pk=topic1.pk).get_post_count(), 2)
+
+        # move
+        topic2.forum = self.forum2
+        topic2.save()
+        self.assertCounters(self.forum1, 1, 2, last_post)
+        self.assertCounters(self.forum2, 1, 1, post)
+
+        # deletions
+        last_post.delete()
+        self.assertCounters(self.forum1, 1, 1, topic1.first_post())
+        self.assertEqual(Topic.objects.get(pk=topic1.pk).get_post_count(), 1)
+        topic2.delete()
+        self.assertCounters(self.forum2, 0, 0, None)
+
+    def test_update_forum_counters(self):
+        topic = TopicFactory(forum=self.forum1, author=self.author)
+        post = PostFactory(topic=topic, author=self.author, position=1)
+        call_command("update_forum_counters", "--check", stdout=StringIO())
+
+        Forum.objects.filter(pk=self.forum1.pk).update(post_count=12, last_post=None)
+        Topic.objects.filter(pk=topic.pk).update(post_count=0)
+        with self.assertRaises(CommandError):
+            call_command("update_forum_counters", "--check", stdout=StringIO())
+
+        call_command("update_forum_counters", stdout=StringIO())
+        self.assertCounters(self.forum1, 1, 1, post)
+        self.assertEqual(Topic.objects.get(pk=topic.pk).get_post_count(), 1)
+        call_command("update_forum_counters", "--check", stdout=StringIO())
+
+
 class TopicReadAndUnreadTests(TestCase):
     def setUp(self):
         self.author = ProfileFactory().user
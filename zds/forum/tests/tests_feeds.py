@@ -1,6 +1,9 @@
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.test.client import RequestFactory
 
 from zds.forum.tests.factories import ForumCategoryFactory, ForumFactory, TopicFactory, PostFactory, TagFactory
@@ -321,3 +324,40 @@ class LastPostsFeedTest(TestCase):
 
         request = self.client.get(reverse("forum:post-feed-atom"))
         self.assertEqual(request.status_code, 200)
+
+    def test_items_are_loaded_with_their_topic_and_author(self):
+        self.client.logout()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries_for_five:
+            self.client.get(reverse("forum:post-feed-rss"))
+        PostFactory(topic=self.topic3, author=ProfileFactory().user, position=2)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries_for_six:
+            self.client.get(reverse("forum:post-feed-rss"))
+        self.assertEqual(len(queries_for_five), len(queries_for_six))
+
+    def test_rendered_feed_is_cached(self):
+        cache.clear()
+        self.client.logout()
+        url = reverse("forum:post-feed-rss")
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        etag = response["ETag"]
+
+        # the cached feed is sent again, or nothing if the aggregator already has it
+        with self.assertNumQueries(1):
+            self.assertEqual(response.content, self.client.get(url).content)
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, not_modified.status_code)
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(304, not_modified.status_code)
+
+        # a new post gives a new feed
+        post = PostFactory(topic=self.topic1, author=self.user, position=3)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response["ETag"])
+        self.assertIn(post.get_absolute_url(), response.content.decode())
+
+        # the filters are a part of the key
+        self.assertNotEqual(response["ETag"], self.client.get(url + f"?forum={self.forum3.pk}")["ETag"])
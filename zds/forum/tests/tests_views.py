@@ -3,13 +3,16 @@ from unittest.mock import patch
 
 from django.conf import settings
 from django.contrib.auth.models import Group
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 from zds.forum.tests.factories import create_category_and_forum, create_topic_in_forum
 from zds.forum.tests.factories import PostFactory, TagFactory
-from zds.forum.models import Topic, Post
+from zds.forum.models import Topic, Post, TopicRead
+from zds.forum.views import ForumTopicsListView
 from zds.notification.models import TopicAnswerSubscription
 from zds.member.tests.factories import DevProfileFactory, ProfileFactory, StaffProfileFactory
 from zds.utils.models import CommentEdit, Hat
@@ -227,6 +230,55 @@ class ForumTopicsListViewTest(TestCase):
         self.assertEqual(forum, response.context["forum"])
         self.assertEqual(2, len(response.context["topics"]))
 
+    @patch.object(ForumTopicsListView, "paginate_by", 2)
+    def test_topics_are_counted_by_the_forum(self):
+        profile = ProfileFactory()
+        category, forum = create_category_and_forum()
+        create_topic_in_forum(forum, profile, is_sticky=True)
+        topics = [create_topic_in_forum(forum, profile) for _ in range(3)]
+        url = reverse("forum:topics-list", args=[category.slug, forum.slug])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + "?page=2")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response.context["paginator"].num_pages)
+        self.assertEqual([topics[0]], response.context["topics"])
+        self.assertFalse(any('COUNT(*) AS "__count" FROM "forum_topic"' in query["sql"] for query in queries))
+
+        # the filtered lists are still counted
+        response = self.client.get(url + "?filter=solve")
+        self.assertEqual(1, response.context["paginator"].num_pages)
+
+    def test_read_state_is_loaded_for_all_topics_at_once(self):
+        reader = ProfileFactory()
+        category, forum = create_category_and_forum()
+        url = reverse("forum:topics-list", args=[category.slug, forum.slug])
+        self.client.force_login(reader.user)
+
+        def create_topics(count):
+            for _ in range(count):
+                topic = create_topic_in_forum(forum, ProfileFactory())
+                PostFactory(topic=topic, author=topic.author, position=2)
+                TopicRead(topic=topic, post=topic.first_post(), user=reader.user).save()
+            read_topic = create_topic_in_forum(forum, ProfileFactory())
+            TopicRead(topic=read_topic, post=read_topic.last_message, user=reader.user).save()
+            return read_topic
+
+        create_topics(1)
+        self.client.get(url)  # fill the caches (session, profile, etc.)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        read_topic = create_topics(4)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn(read_topic.pk, response.context["topic_read"])
+        self.assertEqual(2, len(response.context["topic_read"]))
+        for topic in response.context["topics"]:
+            if topic.pk not in response.context["topic_read"]:
+                self.assertEqual(2, topic.first_unread_post().position)
+
 
 class TopicPostsListViewTest(TestCase):
     def test_failure_list_all_posts_of_a_topic_of_a_forum_we_cannot_read(self):
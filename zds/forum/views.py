@@ -19,7 +19,7 @@ from django.views.generic.detail import SingleObjectMixin
 
 from zds.forum.commons import TopicEditMixin, PostEditMixin, SinglePostObjectMixin, ForumEditMixin
 from zds.forum.forms import TopicForm, PostForm, MoveTopicForm
-from zds.forum.models import ForumCategory, Forum, Topic, Post, mark_read, TopicRead
+from zds.forum.models import ForumCategory, Forum, Topic, Post, mark_read, prefetch_topics_read_state
 from zds.member.decorator import can_write_and_read_now
 from zds.member.models import user_readable_forums
 from zds.forum import signals
@@ -31,7 +31,7 @@ from zds.forum.utils import create_topic, send_post, CreatePostView
 from zds.utils.misc import is_ajax
 from zds.utils.mixins import FilterMixin
 from zds.utils.models import Alert, Tag, CommentVote
-from zds.utils.paginator import ZdSPagingListView
+from zds.utils.paginator import ZdSPagingListView, PositionPaginator
 
 
 class CategoriesForumsListView(ListView):
@@ -42,7 +42,7 @@ class CategoriesForumsListView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         for category in context.get("categories"):
-            category.forums = category.get_forums(self.request.user, with_count=True)
+            category.forums = category.get_forums(self.request.user)
         return context
 
 
@@ -76,7 +76,8 @@ class LastTopicsListView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        context.update({"topic_read": TopicRead.objects.list_read_topic_pk(self.request.user, context["topics"])})
+        context["topics"] = list(context["topics"])
+        context.update({"topic_read": prefetch_topics_read_state(context["topics"], self.request.user)})
 
         return context
 
@@ -114,19 +115,20 @@ class ForumTopicsListView(FilterMixin, ForumEditMixin, ZdSPagingListView, Update
         return redirect(f"{self.object.get_absolute_url()}?page={self.page}")
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["topics"] = list(context["topics"].all())
         sticky = list(
             self.filter_queryset(
-                Topic.objects.get_all_topics_of_a_forum(self.object.pk, is_sticky=True), context["filter"]
+                Topic.objects.get_all_topics_of_a_forum(self.object.pk, is_sticky=True), self.get_filter_param()
             )
         )
+        self.sticky_topics_count = len(sticky)
+        context = super().get_context_data(**kwargs)
+        context["topics"] = list(context["topics"])
         # we need to load it in memory because later we will get the
         # "already read topic" set out of this list and MySQL does not support that type of subquery
 
         # Add a topic.is_followed attribute
         followed_queryset = TopicAnswerSubscription.objects.get_objects_followed_by(self.request.user.id)
-        followed_topics = list(set(followed_queryset) & set(context["topics"] + sticky))
+        followed_topics = set(followed_queryset.filter(pk__in=[topic.pk for topic in context["topics"] + sticky]))
         for topic in set(context["topics"] + sticky):
             topic.is_followed = topic in followed_topics
 
@@ -134,7 +136,7 @@ class ForumTopicsListView(FilterMixin, ForumEditMixin, ZdSPagingListView, Update
             {
                 "forum": self.object,
                 "sticky_topics": sticky,
-                "topic_read": TopicRead.objects.list_read_topic_pk(self.request.user, context["topics"] + sticky),
+                "topic_read": prefetch_topics_read_state(context["topics"] + sticky, self.request.user),
                 "subscriber_count": NewTopicSubscription.objects.get_subscriptions(self.object).count(),
             }
         )
@@ -155,6 +157,13 @@ class ForumTopicsListView(FilterMixin, ForumEditMixin, ZdSPagingListView, Update
         self.queryset = Topic.objects.get_all_topics_of_a_forum(self.object.pk)
         return super().get_queryset()
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        if self.get_filter_param() == self.default_filter_param:
+            # the forum counts its topics, no need to count them again
+            paginator.count = max(self.object.topic_count - self.sticky_topics_count, 0)
+        return paginator
+
     def filter_queryset(self, queryset, filter_param):
         if filter_param == "solve":
             queryset = queryset.filter(solved_by__isnull=False)
@@ -237,6 +246,10 @@ class TopicPostsListView(ZdSPagingListView, FeatureableMixin, SingleObjectMixin)
     def get_queryset(self):
         return Post.objects.get_messages_of_a_topic(self.object.pk)
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        last_position = self.object.last_message.position if self.object.last_message else 0
+        return PositionPaginator(queryset, per_page, last_position)
+
 
 class TopicNew(CreateView, SingleObjectMixin):
     template_name = "forum/topic/new.html"
@@ -436,6 +449,7 @@ class FindTopic(ZdSPagingListView, SingleObjectMixin):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        prefetch_topics_read_state(context["topics"], self.request.user)
         context.update(
             {
                 "usr": self.object,
@@ -468,6 +482,7 @@ class FindFollowedTopic(ZdSPagingListView, SingleObjectMixin):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        prefetch_topics_read_state(context["topics"], self.request.user)
         topics_count = self.object.profile.get_followed_topic_count()
         context.update(
             {
@@ -525,7 +540,7 @@ class FindTopicByTag(FilterMixin, ForumEditMixin, ZdSPagingListView, SingleObjec
             {
                 "tag": self.object,
                 "subscriber_count": NewTopicSubscription.objects.get_subscriptions(self.object).count(),
-                "topic_read": TopicRead.objects.list_read_topic_pk(self.request.user, context["topics"]),
+                "topic_read": prefetch_topics_read_state(context["topics"], self.request.user),
             }
         )
         return context
@@ -215,6 +215,15 @@ class GalleryDetailAPITest(TutorialTestMixin, APITestCase):
         self.assertEqual(UserGallery.objects.filter(gallery=self.gallery_tuto).count(), 1)
 
 
+    def test_delete_fail_default_gallery(self):
+        UserGalleryFactory(user=self.profile.user, gallery=self.gallery, is_default=True)
+
+        response = self.client.delete(reverse("api:gallery:detail", kwargs={"pk": self.gallery.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Gallery.objects.filter(pk=self.gallery.pk).count(), 1)
+
+
 class ImageListAPITest(APITestCase):
     def setUp(self):
         self.profile = ProfileFactory()
@@ -8,11 +8,17 @@ from dry_rest_permissions.generics import DRYPermissions
 
 from django.utils.translation import gettext_lazy as _
 
-from zds.api.bits import UpdatedAtKeyBit
+from zds.api.bits import URLKwargUpdatedAtKeyBit, UserUpdatedAtKeyBit
 from zds.api.key_constructor import PagingListKeyConstructor, DetailKeyConstructor
 from zds.api.views import NoPatchView
 from zds.gallery.models import Gallery, Image, UserGallery
-from zds.gallery.mixins import GalleryUpdateOrDeleteMixin, ImageUpdateOrDeleteMixin, NoMoreUserWithWriteIfLeave
+from zds.gallery.mixins import (
+    DefaultGalleryRemoval,
+    GalleryUpdateOrDeleteMixin,
+    ImageUpdateOrDeleteMixin,
+    NoMoreUserWithWriteIfLeave,
+    DEFAULT_GALLERY_REMOVAL_ERROR,
+)
 
 from .serializers import GallerySerializer, ImageSerializer, ParticipantSerializer
 from .permissions import AccessToGallery, WriteAccessToGallery, NotLinkedToContent
@@ -21,7 +27,7 @@ from .permissions import AccessToGallery, WriteAccessToGallery, NotLinkedToConte
 class PagingGalleryListKeyConstructor(PagingListKeyConstructor):
     search = bits.QueryParamsKeyBit(["search", "ordering"])
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_gallery")
+    updated_at = UserUpdatedAtKeyBit("api_updated_gallery")
 
 
 class GalleryListView(ListCreateAPIView):
@@ -100,7 +106,7 @@ class GalleryListView(ListCreateAPIView):
 
 class GalleryDetailKeyConstructor(DetailKeyConstructor):
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_gallery")
+    updated_at = URLKwargUpdatedAtKeyBit("api_updated_gallery", "gallery", "pk")
 
 
 class GalleryDetailView(RetrieveUpdateDestroyAPIView, NoPatchView, GalleryUpdateOrDeleteMixin):
@@ -184,7 +190,10 @@ class GalleryDetailView(RetrieveUpdateDestroyAPIView, NoPatchView, GalleryUpdate
 
     def perform_destroy(self, instance):
         self.gallery = instance
-        self.perform_delete()
+        try:
+            self.perform_delete()
+        except DefaultGalleryRemoval:
+            raise exceptions.PermissionDenied(detail=DEFAULT_GALLERY_REMOVAL_ERROR)
 
     def get_current_user(self):
         return self.request.user
@@ -202,7 +211,7 @@ class GalleryDetailView(RetrieveUpdateDestroyAPIView, NoPatchView, GalleryUpdate
 class PagingImageListKeyConstructor(PagingListKeyConstructor):
     search = bits.QueryParamsKeyBit(["search", "ordering"])
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_image")
+    updated_at = URLKwargUpdatedAtKeyBit("api_updated_image", "gallery", "pk_gallery")
 
 
 class ImageListView(ListCreateAPIView):
@@ -300,7 +309,7 @@ class ImageListView(ListCreateAPIView):
 
 class ImageDetailKeyConstructor(DetailKeyConstructor):
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_image")
+    updated_at = URLKwargUpdatedAtKeyBit("api_updated_image", "gallery", "pk_gallery")
 
 
 class ImageDetailView(RetrieveUpdateDestroyAPIView, NoPatchView, ImageUpdateOrDeleteMixin):
@@ -405,7 +414,7 @@ class ImageDetailView(RetrieveUpdateDestroyAPIView, NoPatchView, ImageUpdateOrDe
 class PagingParticipantListKeyConstructor(PagingListKeyConstructor):
     search = bits.QueryParamsKeyBit(["ordering"])
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_user_gallery")
+    updated_at = URLKwargUpdatedAtKeyBit("api_updated_user_gallery", "gallery", "pk_gallery")
 
 
 class ParticipantListView(ListCreateAPIView):
@@ -487,7 +496,7 @@ class ParticipantListView(ListCreateAPIView):
 
 class ParticipantDetailKeyConstructor(DetailKeyConstructor):
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_user_gallery")
+    updated_at = URLKwargUpdatedAtKeyBit("api_updated_user_gallery", "gallery", "pk_gallery")
 
 
 class ParticipantDetailView(RetrieveUpdateDestroyAPIView, NoPatchView, GalleryUpdateOrDeleteMixin):
@@ -567,6 +576,8 @@ class ParticipantDetailView(RetrieveUpdateDestroyAPIView, NoPatchView, GalleryUp
 
         try:
             self.perform_leave(instance.user)
+        except DefaultGalleryRemoval:
+            raise exceptions.PermissionDenied(detail=DEFAULT_GALLERY_REMOVAL_ERROR)
         except NoMoreUserWithWriteIfLeave:
             raise exceptions.PermissionDenied(
                 detail=_(
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_default_galleries(apps, schema_editor):
+    """The default galleries are now created at login, create them for the members who are still logged in."""
+    User = apps.get_model("auth", "User")
+    Gallery = apps.get_model("gallery", "Gallery")
+    UserGallery = apps.get_model("gallery", "UserGallery")
+    logged_in_since = datetime.now() - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+    users = (
+        User.objects.filter(is_active=True, last_login__gte=logged_in_since)
+        .exclude(pk__in=UserGallery.objects.filter(is_default=True).values("user"))
+        .only("pk")
+    )
+    for user in users.iterator():
+        gallery = Gallery.objects.create(
+            title="Galerie par défaut", subtitle="", slug="galerie-par-default", update=datetime.now()
+        )
+        UserGallery.objects.create(user=user, gallery=gallery, mode="W", is_default=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gallery", "0007_auto_20191122_1154"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_galleries, migrations.RunPython.noop),
+    ]
@@ -8,6 +8,7 @@ from PIL import Image as ImagePIL
 from easy_thumbnails.files import get_thumbnailer
 
 from django.conf import settings
+from django.utils.translation import gettext_lazy as _
 from svglib.svglib import load_svg_file
 
 from zds.gallery.models import Gallery, UserGallery, GALLERY_WRITE, GALLERY_READ, Image
@@ -94,6 +95,18 @@ class NoMoreUserWithWriteIfLeave(Exception):
     pass
 
 
+DEFAULT_GALLERY_REMOVAL_ERROR = _(
+    "Impossible de supprimer ou de quitter une galerie par défaut : les images envoyées depuis l'éditeur y sont "
+    "enregistrées"
+)
+
+
+class DefaultGalleryRemoval(Exception):
+    """The default gallery of a member, where the editor uploads the images, cannot be deleted nor left."""
+
+    pass
+
+
 class UserAlreadyInGallery(Exception):
     pass
 
@@ -160,18 +173,24 @@ class GalleryUpdateOrDeleteMixin(GalleryMixin):
         return user_gallery
 
     def perform_delete(self):
-        """Delete gallery"""
+        """Delete gallery.
+        Fail if it is the default gallery of one of its users."""
+        if UserGallery.objects.filter(gallery=self.gallery, is_default=True).exists():
+            raise DefaultGalleryRemoval()
         UserGallery.objects.filter(gallery=self.gallery).delete()
         self.gallery.delete()
 
     def perform_leave(self, user):
         """Remove user.
         Return True if the gallery was deleted, False otherwise.
-        Fail if the user was the last with write permissions on the gallery.
+        Fail if the user was the last with write permissions on the gallery, or if it is their default gallery.
 
         :param user:  the user
         :type user: zds.member.models.User
         """
+        if UserGallery.objects.filter(user=user, gallery=self.gallery, is_default=True).exists():
+            raise DefaultGalleryRemoval()
+
         still_one_user_with_write = False
         for user_pk, user_perms in self.users_and_permissions.items():
             if user_pk == user.pk:
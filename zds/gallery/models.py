@@ -7,13 +7,14 @@ from easy_thumbnails.fields import ThumbnailerImageField
 from easy_thumbnails.files import get_thumbnailer
 
 from django.conf import settings
-from django.core.cache import cache
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
 from django.db import models
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from zds.api.bits import change_updated_at
 from zds.gallery.managers import GalleryManager
 
 # Models settings
@@ -86,7 +87,9 @@ class UserGallery(models.Model):
 
 
 def change_api_updated_user_gallery_at(sender=None, instance=None, *args, **kwargs):
-    cache.set("api_updated_user_gallery", datetime.datetime.utcnow())
+    change_updated_at("api_updated_user_gallery", "gallery", [instance.gallery_id])
+    change_updated_at("api_updated_gallery", "gallery", [instance.gallery_id])
+    change_updated_at("api_updated_gallery", "user", [instance.user_id])
 
 
 models.signals.post_save.connect(receiver=change_api_updated_user_gallery_at, sender=UserGallery)
@@ -170,8 +173,8 @@ def auto_delete_file_on_delete(sender, instance, **kwargs):
 
 
 def change_api_updated_image_at(sender=None, instance=None, *args, **kwargs):
-    cache.set("api_updated_image", datetime.datetime.utcnow())
-    cache.set("api_updated_gallery", datetime.datetime.utcnow())
+    change_updated_at("api_updated_image", "gallery", [instance.gallery_id])
+    change_api_updated_gallery(instance.gallery_id)
 
 
 models.signals.post_save.connect(receiver=change_api_updated_image_at, sender=Image)
@@ -302,8 +305,38 @@ def auto_delete_image_on_delete(sender, instance, **kwargs):
         rmtree(instance.get_gallery_path())
 
 
+def create_default_gallery(user):
+    """Create the default gallery of a user if it does not exist yet. The images uploaded from the editor
+    go there, except on contents, which have their own gallery.
+
+    :param user: the user
+    :type user: django.contrib.auth.models.User
+    :return: the default gallery of the user
+    :rtype: Gallery
+    """
+    user_gallery = UserGallery.objects.filter(user=user, is_default=True).select_related("gallery").first()
+    if user_gallery:
+        return user_gallery.gallery
+    gallery = Gallery.objects.create(title=_("Galerie par défaut"), subtitle="", slug=_("galerie-par-default"))
+    UserGallery.objects.create(user=user, is_default=True, gallery=gallery, mode=GALLERY_WRITE)
+    return gallery
+
+
+@receiver(user_logged_in)
+def create_default_gallery_on_login(sender, user, **kwargs):
+    """The default gallery is created at login rather than when a page needs it, so that pages never write."""
+    create_default_gallery(user)
+
+
+def change_api_updated_gallery(gallery_pk):
+    change_updated_at("api_updated_gallery", "gallery", [gallery_pk])
+    # the galleries are also listed by participant
+    participants = UserGallery.objects.filter(gallery=gallery_pk).values_list("user", flat=True)
+    change_updated_at("api_updated_gallery", "user", participants)
+
+
 def change_api_updated_gallery_at(sender=None, instance=None, *args, **kwargs):
-    cache.set("api_updated_gallery", datetime.datetime.utcnow())
+    change_api_updated_gallery(instance.pk)
 
 
 models.signals.post_save.connect(receiver=change_api_updated_gallery_at, sender=Gallery)
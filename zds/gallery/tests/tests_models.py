@@ -1,8 +1,10 @@
 import os
 
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
 
+from zds.gallery.auto_upload_gallery import get_auto_upload_gallery
+from zds.gallery.models import UserGallery
 from zds.gallery.tests.factories import GalleryFactory, UserGalleryFactory, ImageFactory
 from zds.member.tests.factories import ProfileFactory
 from django.conf import settings
@@ -116,3 +118,24 @@ class GalleryTest(TestCase):
         test_gallery.delete()
         self.assertFalse(os.path.isdir(path_gallery))
         self.assertFalse(os.path.isfile(path_image))
+
+
+class DefaultGalleryTest(TestCase):
+    def test_created_at_login(self):
+        user = ProfileFactory().user
+        request = RequestFactory().get(reverse("homepage"))
+        request.user = user
+        request.resolver_match = None
+
+        # pages never create the default gallery...
+        context = get_auto_upload_gallery(request)
+        self.assertFalse(context["auto_update_gallery"])
+        self.assertFalse(UserGallery.objects.filter(user=user, is_default=True).exists())
+
+        # ... it is created at login, once
+        self.client.force_login(user)
+        self.client.force_login(user)
+        gallery = UserGallery.objects.get(user=user, is_default=True).gallery
+
+        context = get_auto_upload_gallery(request)
+        self.assertEqual(context["auto_update_gallery"].pk, gallery.pk)
@@ -25,10 +25,9 @@ class GalleryListViewTest(TestCase):
         response = self.client.get(reverse("gallery:list"), follow=True)
         self.assertEqual(200, response.status_code)
 
-        self.assertEqual(1, len(response.context["galleries"]))
-        self.assertEqual(
-            UserGallery.objects.filter(user=profile.user).first().gallery, response.context["galleries"].first()
-        )
+        # the gallery of the member and their default gallery, created at login
+        self.assertEqual(2, len(response.context["galleries"]))
+        self.assertIn(gallery, response.context["galleries"])
 
 
 class GalleryDetailViewTest(TestCase):
@@ -89,7 +88,8 @@ class NewGalleryViewTest(TestCase):
 
     def test_fail_new_gallery_with_missing_params(self):
         self.client.force_login(self.profile1.user)
-        self.assertEqual(0, Gallery.objects.count())
+        # the default gallery, created at login
+        self.assertEqual(1, Gallery.objects.count())
 
         response = self.client.post(reverse("gallery:create"), {"subtitle": "test"})
         self.assertEqual(200, response.status_code)
@@ -98,7 +98,8 @@ class NewGalleryViewTest(TestCase):
 
     def test_success_new_gallery(self):
         self.client.force_login(self.profile1.user)
-        self.assertEqual(0, Gallery.objects.count())
+        # the default gallery, created at login
+        self.assertEqual(1, Gallery.objects.count())
 
         response = self.client.post(
             reverse("gallery:create"), {"title": "test title", "subtitle": "test subtitle"}, follow=True
@@ -107,11 +108,11 @@ class NewGalleryViewTest(TestCase):
         self.assertEqual(200, response.status_code)
         self.assertEqual(2, Gallery.objects.count())
 
-        user_gallery = UserGallery.objects.filter(user=self.profile1.user)
-        self.assertEqual(2, user_gallery.count())
-        self.assertEqual("test title", user_gallery[0].gallery.title)
-        self.assertEqual("test subtitle", user_gallery[0].gallery.subtitle)
-        self.assertEqual("W", user_gallery[0].mode)
+        self.assertEqual(2, UserGallery.objects.filter(user=self.profile1.user).count())
+        user_gallery = UserGallery.objects.get(user=self.profile1.user, is_default=False)
+        self.assertEqual("test title", user_gallery.gallery.title)
+        self.assertEqual("test subtitle", user_gallery.gallery.subtitle)
+        self.assertEqual("W", user_gallery.mode)
 
 
 class ModifyGalleryViewTest(TestCase):
@@ -127,8 +128,8 @@ class ModifyGalleryViewTest(TestCase):
         self.user_gallery1 = UserGalleryFactory(user=self.profile1.user, gallery=self.gallery1)
         self.user_gallery2 = UserGalleryFactory(user=self.profile1.user, gallery=self.gallery2)
         self.user_gallery3 = UserGalleryFactory(user=self.profile2.user, gallery=self.gallery1, mode="R")
-        default_gallery_u1 = GalleryFactory(title="default", slug="default", subtitle="bla")
-        UserGalleryFactory(user=self.profile1.user, gallery=default_gallery_u1, is_default=True)
+        self.default_gallery_u1 = GalleryFactory(title="default", slug="default", subtitle="bla")
+        UserGalleryFactory(user=self.profile1.user, gallery=self.default_gallery_u1, is_default=True)
         default_gallery_u2 = GalleryFactory(title="default", slug="default", subtitle="bla")
         UserGalleryFactory(user=self.profile2.user, gallery=default_gallery_u2, is_default=True)
 
@@ -199,6 +200,31 @@ class ModifyGalleryViewTest(TestCase):
         self.assertEqual(0, UserGallery.objects.filter(gallery=self.gallery1).count())
         self.assertEqual(0, Image.objects.filter(gallery=self.gallery1).count())
 
+    def test_fail_delete_default_gallery(self):
+        """the editor uploads the images in the default gallery, it is kept"""
+        self.client.force_login(self.profile1.user)
+
+        self.client.post(reverse("gallery:delete"), {"delete": "", "gallery": self.default_gallery_u1.pk}, follow=True)
+        self.client.post(
+            reverse("gallery:delete"),
+            {"delete_multi": "", "g_items": [self.gallery2.pk, self.default_gallery_u1.pk]},
+            follow=True,
+        )
+        self.assertTrue(Gallery.objects.filter(pk=self.gallery2.pk).exists())
+
+        # it cannot be left either, even if another member can write in it
+        UserGalleryFactory(user=self.profile3.user, gallery=self.default_gallery_u1, mode="W")
+        self.client.post(
+            reverse("gallery:members", kwargs={"pk": self.default_gallery_u1.pk}),
+            {"action": "leave", "user": self.profile1.user.username},
+            follow=True,
+        )
+        self.assertTrue(
+            UserGallery.objects.filter(
+                user=self.profile1.user, gallery=self.default_gallery_u1, is_default=True
+            ).exists()
+        )
+
     def test_fail_add_user_with_read_permission(self):
         self.client.force_login(self.profile2.user)
 
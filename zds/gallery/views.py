@@ -24,6 +24,8 @@ from zds.gallery.mixins import (
     GalleryMixin,
     GalleryUpdateOrDeleteMixin,
     NoMoreUserWithWriteIfLeave,
+    DefaultGalleryRemoval,
+    DEFAULT_GALLERY_REMOVAL_ERROR,
     ImageUpdateOrDeleteMixin,
     ImageCreateMixin,
     UserAlreadyInGallery,
@@ -183,6 +185,8 @@ class DeleteGalleries(LoggedWithReadWriteHability, GalleryUpdateOrDeleteMixin, V
                     )
 
                 messages.error(request, _("Impossible de supprimer: {}").format(", ".join(wrong_galleries)))
+            elif UserGallery.objects.filter(gallery__pk__in=list_galleries, is_default=True).exists():
+                messages.error(request, DEFAULT_GALLERY_REMOVAL_ERROR)
             else:
                 # Check that the user has the RW right on each gallery
                 queryset = UserGallery.objects.filter(gallery__pk__in=list_galleries)
@@ -202,7 +206,10 @@ class DeleteGalleries(LoggedWithReadWriteHability, GalleryUpdateOrDeleteMixin, V
             if not self.has_access_to_gallery(self.request.user, True) or self.linked_content() is not None:
                 raise PermissionDenied()
 
-            self.perform_delete()
+            try:
+                self.perform_delete()
+            except DefaultGalleryRemoval:
+                messages.error(request, DEFAULT_GALLERY_REMOVAL_ERROR)
 
         success_url = reverse("gallery:list")
         return HttpResponseRedirect(success_url)
@@ -271,6 +278,9 @@ class EditGalleryMembers(LoggedWithReadWriteHability, GalleryUpdateOrDeleteMixin
                         messages.info(self.request, _("La galerie a été supprimée par manque d'utilisateur"))
                     elif modify_self:
                         messages.info(self.request, _("Vous avez bien quitté la galerie"))
+                except DefaultGalleryRemoval:
+                    modify_self = False
+                    messages.error(self.request, DEFAULT_GALLERY_REMOVAL_ERROR)
                 except NoMoreUserWithWriteIfLeave:
                     modify_self = False
                     messages.error(
@@ -0,0 +1,134 @@
+"""
+Write-behind buffer for the activity of the members (date of last visit and IP address).
+
+Instead of saving the profile from the response path, each visit worth recording is stored in a numbered slot of the
+cache. The ``flush_member_activity`` command, run periodically, writes them to the database in bulk.
+
+The buffer needs a cache shared by all the processes, the command included: with a local cache (as in development),
+the profile is saved right away.
+"""
+
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from zds.member.models import Profile
+
+COUNTER_CACHE_KEY = "member_activity_counter"
+FLUSHED_CACHE_KEY = "member_activity_flushed"
+# slots allocated before this moment are known to have been allocated at least ``activity_flush_grace_period`` ago
+SEEN_CACHE_KEY = "member_activity_seen"
+
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_buffered():
+    """The visits are only buffered when the cache is shared between the processes."""
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+def _slot_cache_key(slot):
+    return f"member_activity_slot_{slot}"
+
+
+def _recorded_cache_key(profile_pk):
+    return f"member_activity_recorded_{profile_pk}"
+
+
+def _next_slot():
+    cache.add(COUNTER_CACHE_KEY, 0, timeout=None)
+    try:
+        return cache.incr(COUNTER_CACHE_KEY)
+    except ValueError:  # the counter was evicted in the meantime
+        cache.add(COUNTER_CACHE_KEY, 0, timeout=None)
+        return cache.incr(COUNTER_CACHE_KEY)
+
+
+def record_visit(profile, ip_address):
+    """Record a visit of the member, if the last recorded one is older than
+    ``ZDS_APP["member"]["update_last_visit_interval"]``.
+
+    :param profile: the profile of the member
+    :param ip_address: the IP address of the request
+    :return: ``True`` if the visit was added to the buffer
+    """
+    now = datetime.datetime.now()
+    interval = settings.ZDS_APP["member"]["update_last_visit_interval"]
+    if profile.last_visit is not None and (now - profile.last_visit).total_seconds() <= interval:
+        return False
+    if not is_buffered():
+        Profile.objects.filter(pk=profile.pk).update(last_visit=now, last_ip_address=ip_address)
+        profile.last_visit, profile.last_ip_address = now, ip_address
+        return True
+    # the profile is only updated by the next flush: remember this visit was recorded until then
+    if not cache.add(_recorded_cache_key(profile.pk), True, timeout=interval):
+        return False
+    cache.set(
+        _slot_cache_key(_next_slot()),
+        (profile.pk, now, ip_address),
+        timeout=settings.ZDS_APP["member"]["activity_buffer_timeout"],
+    )
+    return True
+
+
+def flush_activity(batch_size=500):
+    """Write the buffered visits to the profiles.
+
+    A slot is numbered before being written, so a missing slot may be a visit which is still being recorded. The
+    flushed position does not go past the first missing slot, unless it was numbered more than
+    ``activity_flush_grace_period`` seconds ago: the visit was then lost (evicted or expired) and is skipped. The
+    visits after a missing slot are written anyway, and read again by the next flush.
+
+    :param batch_size: number of slots read from the cache, and of profiles updated, at once
+    :return: the number of profiles updated
+    """
+    now = time.time()
+    grace_period = settings.ZDS_APP["member"]["activity_flush_grace_period"]
+    last_slot = cache.get(COUNTER_CACHE_KEY, 0)
+    flushed_slot = cache.get(FLUSHED_CACHE_KEY, 0)
+    if flushed_slot > last_slot:  # the counter was evicted and started again
+        flushed_slot = 0
+    seen = cache.get(SEEN_CACHE_KEY)
+    seen_slot, seen_at = seen if seen is not None else (0, now)
+    if seen_slot > last_slot:
+        seen = None
+    lost_slot = seen_slot if seen is not None and now - seen_at >= grace_period else 0
+
+    visits = {}
+    new_flushed_slot = flushed_slot
+    waiting = False
+    for start in range(flushed_slot + 1, last_slot + 1, batch_size):
+        slots = range(start, min(start + batch_size, last_slot + 1))
+        found = cache.get_many([_slot_cache_key(slot) for slot in slots])
+        for slot in slots:
+            visit = found.get(_slot_cache_key(slot))
+            if visit is None and slot > lost_slot:
+                # may still be being written: this slot and the next ones are read again by the next flush
+                waiting = True
+            if not waiting:
+                new_flushed_slot = slot
+            if visit is not None:
+                profile_pk, last_visit, ip_address = visit
+                if profile_pk not in visits or visits[profile_pk][0] < last_visit:
+                    visits[profile_pk] = (last_visit, ip_address)
+    for start in range(flushed_slot + 1, new_flushed_slot + 1, batch_size):
+        cache.delete_many(
+            [_slot_cache_key(slot) for slot in range(start, min(start + batch_size, new_flushed_slot + 1))]
+        )
+
+    existing = set(Profile.objects.filter(pk__in=visits.keys()).values_list("pk", flat=True))
+    profiles = [
+        Profile(pk=pk, last_visit=last_visit, last_ip_address=ip_address)
+        for pk, (last_visit, ip_address) in visits.items()
+        if pk in existing
+    ]
+    Profile.objects.bulk_update(profiles, ["last_visit", "last_ip_address"], batch_size=batch_size)
+    cache.set(FLUSHED_CACHE_KEY, new_flushed_slot, timeout=None)
+    if seen is None or now - seen_at >= grace_period:
+        cache.set(SEEN_CACHE_KEY, (last_slot, now), timeout=None)
+    return len(profiles)
@@ -1,8 +1,6 @@
-import datetime
 import logging
 
 from django.utils.translation import gettext_lazy as _
-from django.core.cache import cache
 from django.db.models import Case, When, IntegerField, Value
 from django.db.models.signals import post_save, post_delete
 from dry_rest_permissions.generics import DRYPermissions
@@ -21,7 +19,13 @@ from rest_framework_extensions.cache.decorators import cache_response
 from rest_framework_extensions.etag.decorators import etag
 from rest_framework_extensions.key_constructor import bits
 from rest_framework_extensions.key_constructor.constructors import DefaultKeyConstructor
-from zds.api.bits import DJRF3xPaginationKeyBit, UpdatedAtKeyBit
+from zds.api.bits import (
+    DJRF3xPaginationKeyBit,
+    UpdatedAtKeyBit,
+    URLKwargUpdatedAtKeyBit,
+    UserUpdatedAtKeyBit,
+    change_updated_at,
+)
 
 from zds.member.api.serializers import (
     ProfileListSerializer,
@@ -59,18 +63,20 @@ class DetailKeyConstructor(DefaultKeyConstructor):
     retrieve_sql_query = bits.RetrieveSqlQueryKeyBit()
     unique_view_id = bits.UniqueViewIdKeyBit()
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_profile")
+    updated_at = URLKwargUpdatedAtKeyBit("api_updated_profile", "user", "user__id")
 
 
 class MyDetailKeyConstructor(DefaultKeyConstructor):
     format = bits.FormatKeyBit()
     language = bits.LanguageKeyBit()
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_profile")
+    updated_at = UserUpdatedAtKeyBit("api_updated_profile")
 
 
 def change_api_profile_updated_at(sender=None, instance=None, *args, **kwargs):
-    cache.set("api_updated_profile", datetime.datetime.utcnow())
+    # the lists of members show all the profiles, the details only one
+    change_updated_at("api_updated_profile")
+    change_updated_at("api_updated_profile", "user", [instance.user_id])
 
 
 post_save.connect(receiver=change_api_profile_updated_at, sender=Profile)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from zds.member.activity import flush_activity
+
+
+class Command(BaseCommand):
+    help = "Write the buffered last visits and IP addresses of the members to their profiles"
+
+    def handle(self, *args, **options):
+        count = flush_activity()
+        if options["verbosity"] > 1:
+            self.stdout.write(f"{count} profile(s) updated")
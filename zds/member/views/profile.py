@@ -15,7 +15,7 @@ from django.utils.translation import gettext as __
 from django.views.decorators.http import require_POST
 from django.views.generic import DetailView, UpdateView
 
-from zds.forum.models import Topic, TopicRead
+from zds.forum.models import Topic, prefetch_topics_read_state
 from zds.gallery.forms import ImageAsAvatarForm
 from zds.member import EMAIL_EDIT
 
@@ -150,14 +150,14 @@ class MemberDetail(DetailView):
         context["profile"] = profile
         context["topics"] = list(Topic.objects.last_topics_of_a_member(usr, self.request.user))
         followed_query_set = TopicAnswerSubscription.objects.get_objects_followed_by(self.request.user.id)
-        followed_topics = list(set(followed_query_set) & set(context["topics"]))
+        followed_topics = set(followed_query_set.filter(pk__in=[topic.pk for topic in context["topics"]]))
         for topic in context["topics"]:
             topic.is_followed = topic in followed_topics
         context["articles"] = PublishedContent.objects.last_articles_of_a_member_loaded(usr)
         context["opinions"] = PublishedContent.objects.last_opinions_of_a_member_loaded(usr)
         context["tutorials"] = PublishedContent.objects.last_tutorials_of_a_member_loaded(usr)
         context["articles_and_tutorials"] = PublishedContent.objects.last_tutorials_and_articles_of_a_member_loaded(usr)
-        context["topic_read"] = TopicRead.objects.list_read_topic_pk(self.request.user, context["topics"])
+        context["topic_read"] = prefetch_topics_read_state(context["topics"], self.request.user)
         context["subscriber_count"] = NewPublicationSubscription.objects.get_subscriptions(self.object).count()
         context["contribution_articles_count"] = (
             ContentContribution.objects.filter(
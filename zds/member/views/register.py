@@ -38,6 +38,7 @@ from zds.member.views import get_client_ip
 from zds.mp.models import PrivatePost, PrivateTopic
 from zds.tutorialv2.models.database import PickListOperation
 from zds.tutorialv2.models.events import Event
+from zds.utils.header_notifications import invalidate_header_alerts
 from zds.utils.models import (
     Comment,
     CommentVote,
@@ -210,6 +211,7 @@ def unregister(request):
     Ban.objects.filter(moderator=current).update(moderator=anonymous)
     Alert.objects.filter(author=current).update(author=anonymous)
     Alert.objects.filter(moderator=current).update(moderator=anonymous)
+    invalidate_header_alerts()
     BannedEmailProvider.objects.filter(moderator=current).update(moderator=anonymous)
     # Solved hat requests anonymization
     HatRequest.objects.filter(moderator=current).update(moderator=anonymous)
@@ -1,11 +1,15 @@
 from datetime import datetime
 
+from django.conf import settings
+
 from zds.member.views import get_client_ip
 
 
 class ManageSessionsMiddleware:
     """This middleware adds the current IP address, user agent and timestamp to user sessions.
-    This gives them the information they need to manage their sessions, and possibly delete some of them."""
+    This gives them the information they need to manage their sessions, and possibly delete some of them.
+    The session is only modified (and thus saved) when one of these changes, the timestamp being refreshed every
+    ``ZDS_APP["member"]["update_last_visit_interval"]`` seconds."""
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -21,7 +25,14 @@ class ManageSessionsMiddleware:
 
         if user is not None and user.is_authenticated:
             session = request.session
-            session["ip_address"] = get_client_ip(request)
-            session["user_agent"] = request.META.get("HTTP_USER_AGENT", "")
-            session["last_visit"] = datetime.now().timestamp()
+            values = {
+                "ip_address": get_client_ip(request),
+                "user_agent": request.META.get("HTTP_USER_AGENT", ""),
+            }
+            for key, value in values.items():
+                if session.get(key) != value:
+                    session[key] = value
+            now = datetime.now().timestamp()
+            if now - session.get("last_visit", 0) > settings.ZDS_APP["member"]["update_last_visit_interval"]:
+                session["last_visit"] = now
         return response
@@ -1,12 +1,13 @@
-import datetime
-
 from django.contrib.auth import logout
 
-from django.conf import settings
+from zds.member.activity import record_visit
 from zds.member.views import get_client_ip
 
 
 class SetLastVisitMiddleware:
+    """Record the last visit of the members. The profile is not saved here: the visit is buffered and written by the
+    ``flush_member_activity`` command (see ``zds.member.activity``)."""
+
     def __init__(self, get_response):
         self.get_response = get_response
 
@@ -24,16 +25,7 @@ class SetLastVisitMiddleware:
 
         if user:
             profile = request.user.profile
-            if profile.last_visit is None:
-                profile.last_visit = datetime.datetime.now()
-                profile.last_ip_address = get_client_ip(request)
-                profile.save()
-            else:
-                duration = datetime.datetime.now() - profile.last_visit
-                if duration.seconds > settings.ZDS_APP["member"]["update_last_visit_interval"]:
-                    profile.last_visit = datetime.datetime.now()
-                    profile.last_ip_address = get_client_ip(request)
-                    profile.save()
+            record_visit(profile, get_client_ip(request))
             if profile.is_banned():
                 logout(request)
         return response
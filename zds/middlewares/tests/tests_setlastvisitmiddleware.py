@@ -1,22 +1,45 @@
+import shutil
+import tempfile
+import time
+from pathlib import Path
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.test.utils import override_settings
 from django.shortcuts import get_object_or_404
 
+from zds.member.activity import flush_activity, record_visit, _next_slot, _slot_cache_key
 from zds.member.tests.factories import ProfileFactory
 from zds.member.models import Profile
+from zds.utils.custom_cached_db_backend import SessionStore
 from django.conf import settings
 from copy import deepcopy
 
 overridden_zds_app = deepcopy(settings.ZDS_APP)
 overridden_zds_app["member"]["update_last_visit_interval"] = 30
+# the visits are only buffered when the cache is shared between the processes
+shared_cache_dir = Path(tempfile.gettempdir(), "zds_activity_cache")
+shared_caches = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(shared_cache_dir),
+    }
+}
+local_caches = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 
-@override_settings(ZDS_APP=overridden_zds_app)
+@override_settings(ZDS_APP=overridden_zds_app, CACHES=shared_caches)
 class SetLastVisitMiddlewareTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(shared_cache_dir, ignore_errors=True)
+
     def setUp(self):
+        cache.clear()
         self.user = ProfileFactory()
 
     def test_process_response(self):
@@ -31,6 +54,7 @@ class SetLastVisitMiddlewareTest(TestCase):
 
         # load a page
         self.client.get(reverse("homepage"))
+        flush_activity()
 
         # the date of last visit should not have been updated
         profile = get_object_or_404(Profile, pk=profile_pk)
@@ -43,6 +67,86 @@ class SetLastVisitMiddlewareTest(TestCase):
         # load a page
         self.client.get(reverse("homepage"))
 
-        # the date of last visit should have been updated
+        # the date of last visit is only updated by the flush
+        profile = get_object_or_404(Profile, pk=profile_pk)
+        self.assertTrue(datetime.now() - profile.last_visit > timedelta(seconds=5))
+        flush_activity()
         profile = get_object_or_404(Profile, pk=profile_pk)
         self.assertTrue(datetime.now() - profile.last_visit < timedelta(seconds=5))
+        self.assertEqual("127.0.0.1", profile.last_ip_address)
+
+    def test_visits_are_recorded_once_per_interval(self):
+        other = ProfileFactory()
+        old_visit = datetime.now() - timedelta(seconds=45)
+        Profile.objects.filter(pk__in=[self.user.pk, other.pk]).update(last_visit=old_visit)
+
+        for profile in (self.user, other):
+            self.client.force_login(profile.user)
+            # the profile is not updated until the flush, so it is the buffer that avoids recording each page
+            self.client.get(reverse("homepage"))
+            self.client.get(reverse("homepage"))
+
+        with self.assertNumQueries(2):
+            self.assertEqual(2, flush_activity())
+        self.assertEqual(0, flush_activity())
+        for profile in Profile.objects.filter(pk__in=[self.user.pk, other.pk]):
+            self.assertTrue(profile.last_visit > old_visit)
+
+    def test_missing_slot_is_waited_for(self):
+        old_visit = datetime.now() - timedelta(seconds=45)
+        Profile.objects.filter(pk=self.user.pk).update(last_visit=old_visit)
+        self.user.last_visit = old_visit
+
+        # a slot is numbered but its visit is not written yet
+        missing_slot = _next_slot()
+        record_visit(self.user, "127.0.0.1")
+        self.assertEqual(1, flush_activity())
+        self.assertTrue(Profile.objects.get(pk=self.user.pk).last_visit > old_visit)
+
+        # the visits after the missing slot are kept until it is written...
+        self.assertEqual(1, flush_activity())
+        cache.set(_slot_cache_key(missing_slot), (self.user.pk, old_visit, "127.0.0.2"))
+        self.assertEqual(1, flush_activity())
+        self.assertEqual(0, flush_activity())
+        self.assertEqual("127.0.0.1", Profile.objects.get(pk=self.user.pk).last_ip_address)
+
+        # ... or considered lost, once it was already numbered at a flush older than the grace period
+        _next_slot()  # never written
+        cache.set(_slot_cache_key(_next_slot()), (self.user.pk, datetime.now(), "127.0.0.1"))
+        self.assertEqual(1, flush_activity())
+        self.assertEqual(1, flush_activity())
+        grace_period = settings.ZDS_APP["member"]["activity_flush_grace_period"]
+        with patch("zds.member.activity.time.time", return_value=time.time() + grace_period):
+            self.assertEqual(1, flush_activity())
+        with patch("zds.member.activity.time.time", return_value=time.time() + 2 * grace_period):
+            self.assertEqual(1, flush_activity())
+            self.assertEqual(0, flush_activity())
+
+
+@override_settings(ZDS_APP=overridden_zds_app, CACHES=local_caches)
+class LocalCacheLastVisitTest(TestCase):
+    def test_profile_saved_without_shared_cache(self):
+        profile = ProfileFactory()
+        Profile.objects.filter(pk=profile.pk).update(last_visit=datetime.now() - timedelta(seconds=45))
+        self.client.force_login(profile.user)
+
+        self.client.get(reverse("homepage"))
+        profile = Profile.objects.get(pk=profile.pk)
+        self.assertTrue(datetime.now() - profile.last_visit < timedelta(seconds=5))
+        self.assertEqual("127.0.0.1", profile.last_ip_address)
+
+
+class ManageSessionsMiddlewareTest(TestCase):
+    def test_session_only_saved_on_change(self):
+        profile = ProfileFactory()
+        self.client.force_login(profile.user)
+        self.client.get(reverse("homepage"), HTTP_USER_AGENT="Firefox")
+        self.assertEqual("Firefox", self.client.session["user_agent"])
+
+        # nothing changed: the session is not saved again
+        with patch.object(SessionStore, "save") as save:
+            self.client.get(reverse("homepage"), HTTP_USER_AGENT="Firefox")
+            save.assert_not_called()
+
+        self.client.get(reverse("homepage"), HTTP_USER_AGENT="Chrome")
+        self.assertEqual("Chrome", self.client.session["user_agent"])
@@ -21,7 +21,13 @@ from rest_framework_extensions.etag.decorators import etag
 from rest_framework_extensions.key_constructor import bits
 from rest_framework_extensions.key_constructor.constructors import DefaultKeyConstructor
 
-from zds.api.bits import DJRF3xPaginationKeyBit, UpdatedAtKeyBit
+from zds.api.bits import (
+    DJRF3xPaginationKeyBit,
+    UpdatedAtKeyBit,
+    URLKwargUpdatedAtKeyBit,
+    UserUpdatedAtKeyBit,
+    change_updated_at,
+)
 from zds.api.key_constructor import PagingListKeyConstructor, DetailKeyConstructor
 from zds.mp.api.permissions import (
     IsParticipant,
@@ -52,14 +58,14 @@ class PagingPrivateTopicListKeyConstructor(PagingListKeyConstructor):
 class PagingPrivatePostListKeyConstructor(PagingListKeyConstructor):
     search = bits.QueryParamsKeyBit(["ordering"])
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_post")
+    updated_at = URLKwargUpdatedAtKeyBit("api_updated_post", "private_topic", "pk_ptopic")
 
 
 class PagingNotificationListKeyConstructor(DefaultKeyConstructor):
     pagination = DJRF3xPaginationKeyBit()
     unique_view_id = bits.UniqueViewIdKeyBit()
     user = bits.UserKeyBit()
-    updated_at = UpdatedAtKeyBit("api_updated_notification")
+    updated_at = UserUpdatedAtKeyBit("api_updated_notification")
 
 
 class PrivateTopicDetailKeyConstructor(DetailKeyConstructor):
@@ -67,7 +73,7 @@ class PrivateTopicDetailKeyConstructor(DetailKeyConstructor):
 
 
 class PrivatePostDetailKeyConstructor(DetailKeyConstructor):
-    updated_at = UpdatedAtKeyBit("api_updated_post")
+    updated_at = URLKwargUpdatedAtKeyBit("api_updated_post", "private_topic", "pk_ptopic")
 
 
 def change_api_private_topic_updated_at(sender=None, instance=None, *args, **kwargs):
@@ -75,17 +81,12 @@ def change_api_private_topic_updated_at(sender=None, instance=None, *args, **kwa
 
 
 def change_api_private_post_updated_at(sender=None, instance=None, *args, **kwargs):
-    cache.set("api_updated_post", datetime.datetime.utcnow())
-
-
-def change_api_notification_updated_at(sender=None, instance=None, *args, **kwargs):
-    cache.set("api_updated_notification", datetime.datetime.utcnow())
+    change_updated_at("api_updated_post", "private_topic", [instance.privatetopic_id])
 
 
 for model, func in [
     (PrivateTopic, change_api_private_topic_updated_at),
     (PrivatePost, change_api_private_post_updated_at),
-    (Notification, change_api_notification_updated_at),
 ]:
     post_save.connect(receiver=func, sender=model)
     post_delete.connect(receiver=func, sender=model)
@@ -20,7 +20,7 @@ from zds.mp.decorator import is_participant
 from zds.utils.models import get_hat_from_request
 from zds.forum.utils import CreatePostView
 from zds.mp.utils import send_mp, send_message_mp
-from zds.utils.paginator import ZdSPagingListView
+from zds.utils.paginator import ZdSPagingListView, PositionPaginator
 from .forms import PrivateTopicForm, PrivatePostForm, PrivateTopicEditForm
 from .models import (
     PrivateTopic,
@@ -229,6 +229,10 @@ class PrivatePostList(LoginRequiredMixin, ZdSPagingListView, SingleObjectMixin):
     def get_queryset(self):
         return PrivatePost.objects.get_message_of_a_private_topic(self.object.pk)
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        last_position = self.object.last_message.position_in_topic if self.object.last_message else 0
+        return PositionPaginator(queryset, per_page, last_position, position_field="position_in_topic")
+
 
 class PrivatePostAnswer(CreatePostView):
     """Create a post to answer in a private topic."""
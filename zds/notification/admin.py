@@ -1,5 +1,5 @@
 from django.contrib import admin
-from zds.notification.models import Notification, Subscription
+from zds.notification.models import Notification, QueuedEmail, Subscription
 
 
 class NotificationAdmin(admin.ModelAdmin):
@@ -20,5 +20,13 @@ class SubscriptionAdmin(admin.ModelAdmin):
     raw_id_fields = ("user", "last_notification")
 
 
+class QueuedEmailAdmin(admin.ModelAdmin):
+    """Representation of QueuedEmail model in the admin interface."""
+
+    list_display = ("recipient", "subject", "created_at", "attempts", "sent_at")
+    search_fields = ("recipient", "subject")
+
+
 admin.site.register(Notification, NotificationAdmin)
 admin.site.register(Subscription, SubscriptionAdmin)
+admin.site.register(QueuedEmail, QueuedEmailAdmin)
@@ -97,6 +97,23 @@ class NotificationListAPITest(APITestCase):
         notification_from_response = response.data.get("results")[0]
         self.assertTrue(notification_from_response.get("is_read"))
 
+    def test_cache_is_not_invalidated_by_other_users(self):
+        """
+        The notifications of another user do not invalidate the cache of this one.
+        """
+        self.create_notification_for_pm(ProfileFactory().user, self.profile.user)
+        response = self.client.get(reverse("api:notification:list"))
+        etag = response["ETag"]
+
+        self.create_notification_for_pm(ProfileFactory().user, ProfileFactory().user)
+        response = self.client.get(reverse("api:notification:list"))
+        self.assertEqual(etag, response["ETag"])
+
+        self.create_notification_for_pm(ProfileFactory().user, self.profile.user)
+        response = self.client.get(reverse("api:notification:list"))
+        self.assertNotEqual(etag, response["ETag"])
+        self.assertEqual(response.data.get("count"), 2)
+
     def create_notification_for_pm(self, sender, target):
         topic = PrivateTopicFactory(author=sender)
         topic.add_participant(target, silent=True)
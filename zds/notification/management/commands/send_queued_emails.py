@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from zds.notification.outbox import delete_sent_emails, send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Send the emails waiting in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="number of emails sent at once")
+        parser.add_argument(
+            "--loop", action="store_true", help="keep running, and send the new emails every --interval seconds"
+        )
+        parser.add_argument("--interval", type=int, default=10, help="pause between two batches, in seconds")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(options["batch_size"])
+            if options["verbosity"] > 1 and (sent or failed):
+                self.stdout.write(f"{sent} email(s) sent, {failed} failure(s)")
+            delete_sent_emails(settings.ZDS_APP["notification"]["email_outbox_retention_days"])
+            if not options["loop"]:
+                break
+            if sent + failed < options["batch_size"]:  # nothing more to send for now
+                time.sleep(options["interval"])
@@ -1,7 +1,10 @@
+import datetime
+import hashlib
+
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import models, transaction
 
 from zds.forum.models import Topic
 from zds.notification import signals
@@ -300,3 +303,45 @@ class TopicFollowedManager(models.Manager):
             user = get_current_user()
 
         return self.filter(topic=topic, user=user).exists()
+
+
+class QueuedEmailManager(models.Manager):
+    def enqueue(self, subject, message_txt, message_html, from_email, recipient):
+        """
+        Adds an email to the outbox, unless the same email is already waiting to be sent to the recipient.
+
+        :return: the queued email, or ``None`` if it is a duplicate
+        """
+        dedup_key = hashlib.sha1("\n".join([recipient, subject, message_txt]).encode("utf-8")).hexdigest()
+        if self.filter(dedup_key=dedup_key, sent_at__isnull=True).exists():
+            return None
+        return self.create(
+            subject=subject,
+            body_txt=message_txt,
+            body_html=message_html,
+            from_email=from_email,
+            recipient=recipient,
+            dedup_key=dedup_key,
+        )
+
+    def get_ready_to_send(self, max_attempts):
+        """
+        :return: the emails not sent yet whose (next) attempt is due, oldest first.
+        """
+        return self.filter(
+            sent_at__isnull=True, attempts__lt=max_attempts, next_attempt_at__lte=datetime.datetime.now()
+        ).order_by("next_attempt_at", "pk")
+
+    def claim(self, max_attempts, batch_size, claim_timeout):
+        """
+        Reserves emails ready to be sent by postponing their next attempt by ``claim_timeout`` seconds, so that
+        concurrent senders never send the same email twice. The emails being claimed by another sender are skipped.
+
+        :return: the claimed emails, whose ``next_attempt_at`` is still the one before the claim.
+        """
+        with transaction.atomic():
+            emails = list(self.get_ready_to_send(max_attempts).select_for_update(skip_locked=True)[:batch_size])
+            self.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=datetime.datetime.now() + datetime.timedelta(seconds=claim_timeout)
+            )
+        return emails
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:58
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notification", "0017_clean_notifications_new_topic_forums_groups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedEmail",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("from_email", models.CharField(max_length=254, verbose_name="Expéditeur")),
+                ("recipient", models.EmailField(max_length=254, verbose_name="Destinataire")),
+                ("subject", models.CharField(max_length=255, verbose_name="Sujet")),
+                ("body_txt", models.TextField(verbose_name="Texte")),
+                ("body_html", models.TextField(verbose_name="HTML")),
+                ("dedup_key", models.CharField(db_index=True, max_length=40, verbose_name="Empreinte")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Date de création")),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(db_index=True, default=datetime.datetime.now, verbose_name="Prochain essai"),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Nombre d'essais")),
+                ("last_error", models.TextField(blank=True, default="", verbose_name="Dernière erreur")),
+                ("sent_at", models.DateTimeField(blank=True, db_index=True, null=True, verbose_name="Date d'envoi")),
+            ],
+            options={
+                "verbose_name": "Courriel en attente",
+                "verbose_name_plural": "Courriels en attente",
+            },
+        ),
+    ]
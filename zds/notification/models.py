@@ -1,4 +1,5 @@
 import logging
+from datetime import datetime
 from smtplib import SMTPException
 
 from django.contrib.auth.models import User
@@ -11,6 +12,7 @@ from django.template.loader import render_to_string
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 
+from zds.api.bits import change_updated_at
 from zds.forum.models import Topic, Post
 from zds.notification.managers import (
     NotificationManager,
@@ -19,6 +21,7 @@ from zds.notification.managers import (
     TopicAnswerSubscriptionManager,
     NewPublicationSubscriptionManager,
     NewTopicSubscriptionManager,
+    QueuedEmailManager,
 )
 from zds.utils.misc import convert_camel_to_underscore
 
@@ -26,6 +29,16 @@ from zds.utils.misc import convert_camel_to_underscore
 LOG = logging.getLogger(__name__)
 
 
+def invalidate_notifications_caches(*user_pks):
+    """Invalidate what is cached about the notifications of some users: the summary of the header and the responses
+    of the API.
+    """
+    from zds.utils.header_notifications import invalidate_header_notifications
+
+    invalidate_header_notifications(*user_pks)
+    change_updated_at("api_updated_notification", "user", user_pks)
+
+
 class Subscription(models.Model):
     """
     Model used to register the subscription of a user to a set of notifications (regarding a tutorial, a forum, ...)
@@ -119,6 +132,11 @@ class Subscription(models.Model):
             "email/notification/" + convert_camel_to_underscore(self._meta.object_name) + ".txt", context
         )
 
+        if settings.ZDS_APP["notification"]["email_outbox"]:
+            # sent later by the send_queued_emails command, so that the request does not wait for the mail server
+            QueuedEmail.objects.enqueue(subject, message_txt, message_html, from_email, receiver.email)
+            return
+
         msg = EmailMultiAlternatives(subject, message_txt, from_email, [receiver.email])
         msg.attach_alternative(message_html, "text/html")
         try:
@@ -134,6 +152,45 @@ class Subscription(models.Model):
         return Subscription.has_read_permission(request) and self.user == request.user
 
 
+def _bulk_save_notifications(subscriptions, notifications, send_email):
+    """Save the notifications built for the subscriptions (``notifications[i]`` belongs to ``subscriptions[i]``) with
+    a few queries, make them the last notification of their subscription, then send the emails.
+    """
+    new_notifications = [notification for notification in notifications if notification.pk is None]
+    updated_notifications = [notification for notification in notifications if notification.pk is not None]
+    with transaction.atomic():
+        Notification.objects.bulk_create(new_notifications)
+        missing_pk = [notification for notification in new_notifications if notification.pk is None]
+        if missing_pk:
+            # the database does not return the primary keys of the inserted rows (MySQL)
+            notification = missing_pk[0]
+            pks = dict(
+                Notification.objects.filter(
+                    subscription__in=[n.subscription_id for n in missing_pk],
+                    content_type=notification.content_type,
+                    object_id=notification.object_id,
+                )
+                .order_by("pk")
+                .values_list("subscription", "pk")
+            )
+            for notification in missing_pk:
+                notification.pk = pks[notification.subscription_id]
+        Notification.objects.bulk_update(
+            updated_notifications,
+            ["content_type", "object_id", "sender", "url", "title", "pubdate", "is_read"],
+        )
+        for subscription, notification in zip(subscriptions, notifications):
+            subscription.last_notification = notification
+        Subscription.objects.bulk_update(subscriptions, ["last_notification"])
+
+    # the bulk queries do not send the signals of the models
+    invalidate_notifications_caches(*{subscription.user_id for subscription in subscriptions})
+    if send_email:
+        for subscription, notification in zip(subscriptions, notifications):
+            if subscription.by_email:
+                subscription.send_email(notification)
+
+
 class SingleNotificationMixin:
     """
     Mixin for the subscription that can only have one active notification at a time
@@ -172,6 +229,50 @@ class SingleNotificationMixin:
                 self.last_notification.content_object = content
                 self.last_notification.save()
 
+    @classmethod
+    def send_notifications(cls, subscriptions, content, sender=None, send_email=True):
+        """
+        Bulk version of ``send_notification()`` for a new content, to notify many subscribers with a few queries.
+        :param subscriptions: a queryset of the subscriptions to notify, all about the same object
+        :param content: the content the notifications are about, more recent than the current notifications
+        :param sender: the user whose action triggered the notifications
+        :param send_email: whether an email must be sent to the subscribers by email
+        """
+        subscriptions = [
+            subscription
+            for subscription in subscriptions.select_related("last_notification", "user")
+            if subscription.last_notification is None or subscription.last_notification.is_read
+        ]
+        if not subscriptions:
+            return
+
+        existing_notifications = {}
+        duplicates = []
+        for notification in Notification.objects.filter(subscription__in=subscriptions).order_by("pk"):
+            if notification.subscription_id in existing_notifications:
+                duplicates.append(notification.pk)
+            else:
+                existing_notifications[notification.subscription_id] = notification
+        if duplicates:
+            LOG.error("Found %s duplicated notifications", len(duplicates))
+            Notification.objects.filter(pk__in=duplicates).delete()
+            LOG.info("Duplicates deleted.")
+
+        # the subscriptions are about the same object, so the URL and title are the same for everyone
+        url = subscriptions[0].get_notification_url(content)
+        title = subscriptions[0].get_notification_title(content)
+        notifications = []
+        for subscription in subscriptions:
+            notification = existing_notifications.get(subscription.pk) or Notification(subscription=subscription)
+            notification.content_object = content
+            notification.sender = sender
+            notification.url = url
+            notification.title = title
+            notification.pubdate = content.pubdate
+            notification.is_read = False
+            notifications.append(notification)
+        _bulk_save_notifications(subscriptions, notifications, send_email)
+
     def build_notification(self, content, sender):
         # If there isn't a notification yet or the last one is read, we generate a new one.
         try:
@@ -194,6 +295,7 @@ class SingleNotificationMixin:
         """
         if self.last_notification is not None:
             Notification.objects.filter(pk=self.last_notification.pk).update(is_read=True)
+            invalidate_notifications_caches(self.user_id)
 
 
 class MultipleNotificationsMixin:
@@ -220,6 +322,34 @@ class MultipleNotificationsMixin:
         if send_email and self.by_email:
             self.send_email(notification)
 
+    @classmethod
+    def send_notifications(cls, subscriptions, content, sender=None, send_email=True):
+        """
+        Bulk version of ``send_notification()``, to notify many subscribers with a few queries.
+        :param subscriptions: a queryset of the subscriptions to notify, all about the same object
+        :param content: the content the notifications are about
+        :param sender: the user whose action triggered the notifications
+        :param send_email: whether an email must be sent to the subscribers by email
+        """
+        subscriptions = [
+            subscription
+            for subscription in subscriptions.select_related("last_notification", "user")
+            if subscription.last_notification is None or subscription.last_notification.is_read
+        ]
+        if not subscriptions:
+            return
+
+        # the subscriptions are about the same object, so the URL and title are the same for everyone
+        url = subscriptions[0].get_notification_url(content)
+        title = subscriptions[0].get_notification_title(content)
+        notifications = [
+            Notification(
+                subscription=subscription, content_object=content, sender=sender, url=url, title=title, is_read=False
+            )
+            for subscription in subscriptions
+        ]
+        _bulk_save_notifications(subscriptions, notifications, send_email)
+
     def build_notification(self, content, sender):
         notification = Notification(subscription=self, content_object=content, sender=sender)
         notification.content_object = content
@@ -441,6 +571,32 @@ class Notification(models.Model):
         return Notification.has_read_permission(request) and self.subscription.user == request.user
 
 
+class QueuedEmail(models.Model):
+    """
+    An email waiting in the outbox, sent by the ``send_queued_emails`` command (see ``zds.notification.outbox``).
+    """
+
+    class Meta:
+        verbose_name = _("Courriel en attente")
+        verbose_name_plural = _("Courriels en attente")
+
+    from_email = models.CharField(_("Expéditeur"), max_length=254)
+    recipient = models.EmailField(_("Destinataire"))
+    subject = models.CharField(_("Sujet"), max_length=255)
+    body_txt = models.TextField(_("Texte"))
+    body_html = models.TextField(_("HTML"))
+    dedup_key = models.CharField(_("Empreinte"), max_length=40, db_index=True)
+    created_at = models.DateTimeField(_("Date de création"), auto_now_add=True)
+    next_attempt_at = models.DateTimeField(_("Prochain essai"), default=datetime.now, db_index=True)
+    attempts = models.PositiveSmallIntegerField(_("Nombre d'essais"), default=0)
+    last_error = models.TextField(_("Dernière erreur"), blank=True, default="")
+    sent_at = models.DateTimeField(_("Date d'envoi"), null=True, blank=True, db_index=True)
+    objects = QueuedEmailManager()
+
+    def __str__(self):
+        return f"{self.recipient} : {self.subject}"
+
+
 class TopicFollowed(models.Model):
     """
     This model tracks which user follows which topic.
@@ -0,0 +1,75 @@
+"""
+Sending of the emails of the outbox.
+
+When ``ZDS_APP["notification"]["email_outbox"]`` is enabled, the notification emails (including the ones about private
+messages and hat requests) are stored as ``QueuedEmail`` instead of being sent during the request. They are sent by
+batches, through a single connection to the mail server, by the ``send_queued_emails`` command.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from smtplib import SMTPException
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from zds.notification.models import QueuedEmail
+
+LOG = logging.getLogger(__name__)
+
+
+def send_queued_emails(batch_size=100):
+    """Send the emails of the outbox whose attempt is due. An email that cannot be sent is retried later, with a delay
+    doubling at each attempt, until ``ZDS_APP["notification"]["email_outbox_max_attempts"]`` is reached.
+
+    The emails are claimed before being sent, so several senders can run at the same time.
+
+    :param batch_size: maximum number of emails sent
+    :return: the number of emails sent and the number of failures
+    """
+    outbox_settings = settings.ZDS_APP["notification"]
+    emails = QueuedEmail.objects.claim(
+        outbox_settings["email_outbox_max_attempts"], batch_size, outbox_settings["email_outbox_claim_timeout"]
+    )
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    try:
+        connection = get_connection()
+        connection.open()
+    except (SMTPException, OSError):
+        LOG.error("Could not connect to the mail server", exc_info=True)
+        # release the claim: the emails are due again
+        QueuedEmail.objects.bulk_update(emails, ["next_attempt_at"])
+        return 0, 0
+
+    try:
+        for email in emails:
+            try:
+                message = EmailMultiAlternatives(
+                    email.subject, email.body_txt, email.from_email, [email.recipient], connection=connection
+                )
+                message.attach_alternative(email.body_html, "text/html")
+                message.send()
+            except Exception as error:
+                # any error (an invalid address, a header...) counts as an attempt, so that the email is given up
+                failed += 1
+                email.attempts += 1
+                email.last_error = str(error)
+                delay = outbox_settings["email_outbox_retry_delay"] * 2 ** (email.attempts - 1)
+                email.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+                LOG.warning("Failed sending mail to %s (attempt %s)", email.recipient, email.attempts, exc_info=True)
+            else:
+                sent += 1
+                email.sent_at = datetime.now()
+    finally:
+        connection.close()
+        QueuedEmail.objects.bulk_update(emails, ["attempts", "last_error", "next_attempt_at", "sent_at"])
+
+    return sent, failed
+
+
+def delete_sent_emails(days):
+    """Delete the emails sent more than ``days`` days ago."""
+    return QueuedEmail.objects.filter(sent_at__lt=datetime.now() - timedelta(days=days)).delete()[0]
@@ -5,7 +5,7 @@ import logging
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.db import DatabaseError
-from django.db.models.signals import post_save, m2m_changed, pre_delete
+from django.db.models.signals import post_save, post_delete, m2m_changed, pre_delete
 from django.dispatch import receiver
 
 from zds.forum.models import Topic, Post, Forum
@@ -18,6 +18,7 @@ from zds.notification.models import (
     PrivateTopicAnswerSubscription,
     Subscription,
     Notification,
+    invalidate_notifications_caches,
     NewTopicSubscription,
     NewPublicationSubscription,
     PingSubscription,
@@ -26,7 +27,8 @@ import zds.notification.signals as notification_signals
 from zds.tutorialv2.models.database import PublishableContent, ContentReaction
 import zds.tutorialv2.signals as tuto_signals
 import zds.utils.signals as utils_signals
-from zds.utils.models import Tag
+from zds.utils.header_notifications import invalidate_header_alerts
+from zds.utils.models import Alert, Tag
 
 logger = logging.getLogger(__name__)
 
@@ -333,10 +335,11 @@ def new_topic_event(sender, *, instance, created=True, **__):
     if created:
         topic = instance
 
-        subscriptions = NewTopicSubscription.objects.get_subscriptions(topic.forum)
-        for subscription in subscriptions:
-            if subscription.user != topic.author and topic.forum.can_read(subscription.user):
-                subscription.send_notification(content=topic, sender=topic.author)
+        subscriptions = NewTopicSubscription.objects.get_subscriptions(topic.forum).exclude(user=topic.author)
+        if topic.forum.has_group:
+            # only the members of the groups allowed to read the forum
+            subscriptions = subscriptions.filter(user__groups__in=topic.forum.groups.all()).distinct()
+        NewTopicSubscription.send_notifications(subscriptions, content=topic, sender=topic.author)
 
 
 @receiver(post_save, sender=Post)
@@ -352,10 +355,8 @@ def answer_topic_event(sender, *, instance, created=True, **__):
     if created:
         post = instance
 
-        subscription_list = TopicAnswerSubscription.objects.get_subscriptions(post.topic)
-        for subscription in subscription_list:
-            if subscription.user != post.author:
-                subscription.send_notification(content=post, sender=post.author)
+        subscriptions = TopicAnswerSubscription.objects.get_subscriptions(post.topic).exclude(user=post.author)
+        TopicAnswerSubscription.send_notifications(subscriptions, content=post, sender=post.author)
 
         # Follow topic on answering
         TopicAnswerSubscription.objects.get_or_create_active(post.author, post.topic)
@@ -525,3 +526,20 @@ def ping_event(sender, *, instance, user, **__):
 def unping_event(sender, instance, user, **_):
     if user:
         PingSubscription.objects.deactivate_subscriptions(user, instance)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notifications_caches_of_subscriber(sender, instance, **__):
+    if Notification.subscription.is_cached(instance):
+        user_pk = instance.subscription.user_id
+    else:
+        user_pk = Subscription.objects.filter(pk=instance.subscription_id).values_list("user", flat=True).first()
+    if user_pk is not None:
+        invalidate_notifications_caches(user_pk)
+
+
+@receiver(post_save, sender=Alert)
+@receiver(post_delete, sender=Alert)
+def invalidate_header_alerts_of_moderators(sender, **__):
+    invalidate_header_alerts()
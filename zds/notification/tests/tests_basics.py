@@ -1,11 +1,13 @@
 import copy
+from unittest.mock import patch
 from datetime import datetime, timedelta
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
 from django.core import mail
 from django.urls import reverse
 from django.test import TestCase
-from django.db import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.db import IntegrityError, connection
 
 from django.conf import settings
 from zds.forum.tests.factories import (
@@ -1132,3 +1134,76 @@ class NotificationTest(TestCase):
         self.assertEqual(0, len(notifications))
 
         self.assertTrue(Topic.objects.get(pk=topic.pk).is_read)
+
+
+class BulkNotificationTest(TestCase):
+    def setUp(self):
+        self.author = ProfileFactory().user
+        _, self.forum = create_category_and_forum()
+        self.topic = TopicFactory(forum=self.forum, author=self.author)
+        PostFactory(topic=self.topic, author=self.author, position=1)
+
+    def __answer(self, position, topic=None):
+        # the content types are cached by the process: start from the same state for each count
+        ContentType.objects.clear_cache()
+        with CaptureQueriesContext(connection) as queries:
+            post = PostFactory(topic=topic or self.topic, author=self.author, position=position)
+        return post, len(queries)
+
+    def test_answer_notifies_the_followers(self):
+        followers = [ProfileFactory().user for _ in range(3)]
+        for follower in followers:
+            TopicAnswerSubscription.objects.toggle_follow(self.topic, follower, by_email=True)
+        post, queries_for_three = self.__answer(2)
+
+        for follower in followers:
+            notification = Notification.objects.get(subscription__user=follower)
+            self.assertFalse(notification.is_read)
+            self.assertEqual(post, notification.content_object)
+            self.assertEqual(self.topic.title, notification.title)
+            subscription = TopicAnswerSubscription.objects.get_existing(follower, self.topic)
+            self.assertEqual(notification, subscription.last_notification)
+        self.assertFalse(Notification.objects.filter(subscription__user=self.author).exists())
+        self.assertEqual(3, len(mail.outbox))
+
+        # the unread notifications are not updated...
+        Notification.objects.filter(subscription__user=followers[0]).update(is_read=True)
+        more_followers = [ProfileFactory().user for _ in range(7)]
+        for follower in more_followers:
+            TopicAnswerSubscription.objects.toggle_follow(self.topic, follower)
+        post, _ = self.__answer(3)
+        self.assertEqual(post, Notification.objects.get(subscription__user=followers[0]).content_object)
+        self.assertNotEqual(post, Notification.objects.get(subscription__user=followers[1]).content_object)
+        self.assertEqual(post, Notification.objects.get(subscription__user=more_followers[0]).content_object)
+
+        # ... and the number of queries does not depend on the number of followers
+        other_topic = TopicFactory(forum=self.forum, author=self.author)
+        PostFactory(topic=other_topic, author=self.author, position=1)
+        for follower in followers + more_followers:
+            TopicAnswerSubscription.objects.toggle_follow(other_topic, follower, by_email=True)
+        _, queries_for_ten = self.__answer(2, other_topic)
+        self.assertEqual(queries_for_three, queries_for_ten)
+
+    def test_database_without_returned_primary_keys(self):
+        follower = ProfileFactory().user
+        TopicAnswerSubscription.objects.toggle_follow(self.topic, follower)
+        with patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            post, _ = self.__answer(2)
+        subscription = TopicAnswerSubscription.objects.get_existing(follower, self.topic)
+        self.assertEqual(post, subscription.last_notification.content_object)
+
+    def test_new_topic_in_restricted_forum(self):
+        group = Group.objects.create(name="Restricted")
+        _, forum = create_category_and_forum(group)
+        allowed = ProfileFactory().user
+        allowed.groups.add(group)
+        not_allowed = ProfileFactory().user
+        for user in (allowed, not_allowed, self.author):
+            NewTopicSubscription.objects.toggle_follow(forum, user)
+
+        topic = TopicFactory(forum=forum, author=self.author)
+        notifications = Notification.objects.filter(
+            object_id=topic.pk, content_type=ContentType.objects.get_for_model(topic)
+        )
+        self.assertEqual([allowed], [notification.subscription.user for notification in notifications])
+        self.assertEqual(notifications[0], NewTopicSubscription.objects.get_existing(allowed, forum).last_notification)
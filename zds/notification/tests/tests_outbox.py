@@ -0,0 +1,101 @@
+from copy import deepcopy
+from datetime import datetime, timedelta
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from zds.forum.tests.factories import PostFactory, TopicFactory, create_category_and_forum
+from zds.member.tests.factories import ProfileFactory
+from zds.notification.models import QueuedEmail, TopicAnswerSubscription
+from zds.notification.outbox import delete_sent_emails, send_queued_emails
+
+overridden_zds_app = deepcopy(settings.ZDS_APP)
+overridden_zds_app["notification"]["email_outbox"] = True
+
+
+@override_settings(ZDS_APP=overridden_zds_app, EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.author = ProfileFactory().user
+        self.receiver = ProfileFactory().user
+        _, self.forum = create_category_and_forum()
+
+    def __notify(self):
+        # a new answer in a topic followed by email
+        topic = TopicFactory(forum=self.forum, author=self.author)
+        TopicAnswerSubscription.objects.toggle_follow(topic, self.receiver, by_email=True)
+        PostFactory(topic=topic, author=self.author, position=1)
+
+    def test_emails_are_queued(self):
+        self.__notify()
+        self.assertEqual(0, len(mail.outbox))
+        self.assertEqual(1, QueuedEmail.objects.filter(recipient=self.receiver.email).count())
+
+        # the same email is not queued twice
+        QueuedEmail.objects.enqueue(*[getattr(QueuedEmail.objects.get(), field) for field in self.__fields()])
+        self.assertEqual(1, QueuedEmail.objects.count())
+
+        self.assertEqual((1, 0), send_queued_emails())
+        self.assertEqual(1, len(mail.outbox))
+        self.assertEqual([self.receiver.email], mail.outbox[0].to)
+        self.assertEqual("text/html", mail.outbox[0].alternatives[0][1])
+        self.assertIsNotNone(QueuedEmail.objects.get().sent_at)
+
+        # sent emails are not sent again, and deleted after a while
+        self.assertEqual((0, 0), send_queued_emails())
+        QueuedEmail.objects.update(sent_at=datetime.now() - timedelta(days=30))
+        delete_sent_emails(7)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_failures_are_retried_later(self):
+        self.__notify()
+        with patch.object(EmailMultiAlternatives, "send", side_effect=SMTPException("unavailable")):
+            self.assertEqual((0, 1), send_queued_emails())
+        email = QueuedEmail.objects.get()
+        self.assertEqual(1, email.attempts)
+        self.assertEqual("unavailable", email.last_error)
+        self.assertGreater(email.next_attempt_at, datetime.now())
+
+        # not before the delay
+        self.assertEqual((0, 0), send_queued_emails())
+        QueuedEmail.objects.update(next_attempt_at=datetime.now())
+        self.assertEqual((1, 0), send_queued_emails())
+        self.assertEqual(1, len(mail.outbox))
+
+        # no more attempts once the limit is reached
+        self.__notify()
+        QueuedEmail.objects.filter(sent_at=None).update(
+            attempts=settings.ZDS_APP["notification"]["email_outbox_max_attempts"]
+        )
+        self.assertEqual((0, 0), send_queued_emails())
+
+    def test_any_error_is_an_attempt(self):
+        self.__notify()
+        with patch.object(EmailMultiAlternatives, "send", side_effect=ValueError("invalid header")):
+            self.assertEqual((0, 1), send_queued_emails())
+        email = QueuedEmail.objects.get()
+        self.assertEqual(1, email.attempts)
+        self.assertEqual("invalid header", email.last_error)
+
+    def test_claimed_emails_are_not_sent_twice(self):
+        self.__notify()
+        max_attempts = settings.ZDS_APP["notification"]["email_outbox_max_attempts"]
+        claimed = QueuedEmail.objects.claim(max_attempts, 10, 60)
+        self.assertEqual(1, len(claimed))
+
+        # another sender does not get it...
+        self.assertEqual([], QueuedEmail.objects.claim(max_attempts, 10, 60))
+        self.assertEqual((0, 0), send_queued_emails())
+
+        # ... unless the first one stopped without sending it
+        QueuedEmail.objects.update(next_attempt_at=datetime.now())
+        self.assertEqual((1, 0), send_queued_emails())
+
+    @staticmethod
+    def __fields():
+        return ["subject", "body_txt", "body_html", "from_email", "recipient"]
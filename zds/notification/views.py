@@ -9,7 +9,7 @@ from django.urls import reverse
 
 from django.conf import settings
 from zds.mp.models import PrivateTopic
-from zds.notification.models import Notification
+from zds.notification.models import Notification, invalidate_notifications_caches
 from zds.utils.paginator import ZdSPagingListView
 from zds.forum.models import Post
 from zds.tutorialv2.models.database import ContentReaction
@@ -61,6 +61,7 @@ def mark_notifications_as_read(request):
             mark_content_read(notification.content_object.related_content, request.user)
 
     notifications.update(is_read=True)
+    invalidate_notifications_caches(request.user.pk)
 
     messages.success(request, _("Vos notifications ont bien été marquées comme lues."))
 
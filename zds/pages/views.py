@@ -14,7 +14,7 @@ from django.core.exceptions import PermissionDenied
 from django.views.decorators.http import require_POST
 
 from zds.featured.models import FeaturedResource, FeaturedMessage
-from zds.forum.models import Topic
+from zds.forum.models import Topic, prefetch_topics_read_state
 from zds.member.decorator import can_write_and_read_now
 from zds.pages.models import GroupContact
 from zds.search.forms import SearchForm
@@ -37,6 +37,8 @@ def home(request):
     articles = PublishableContent.objects.get_last_articles()
     opinions = PublishableContent.objects.get_last_opinions()
     quote = random.choice(QUOTES)
+    last_topics = list(Topic.objects.get_last_topics())
+    prefetch_topics_read_state(last_topics, request.user)
 
     return render(
         request,
@@ -47,7 +49,7 @@ def home(request):
             "last_articles": articles,
             "last_opinions": opinions,
             "last_featured_resources": FeaturedResource.objects.get_last_featured(),
-            "last_topics": Topic.objects.get_last_topics(),
+            "last_topics": last_topics,
             "contents_count": PublishedContent.objects.get_contents_count(),
             "quote": quote.replace("\n", ""),
             "search_form": SearchForm(initial={}),
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from zds.search.models import SearchIndexRetry
+
+
+class SearchIndexRetryAdmin(admin.ModelAdmin):
+    list_display = ("doc_type", "document_id", "attempts", "next_attempt_at")
+    list_filter = ("doc_type",)
+    search_fields = ("document_id", "last_error")
+    ordering = ("-attempts",)
+
+
+admin.site.register(SearchIndexRetry, SearchIndexRetryAdmin)
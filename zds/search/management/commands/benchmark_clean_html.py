@@ -0,0 +1,48 @@
+import re
+import timeit
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand, CommandError
+
+from zds.forum.models import Post
+from zds.search.utils import clean_html
+
+
+def legacy_clean_html(text):
+    """The former implementation of ``clean_html()``, kept as a reference for the benchmark."""
+    result = ""
+    if text != None:
+        soup = BeautifulSoup(text, "html.parser")
+        formatted_html = soup.prettify()
+        result = re.sub(r"<[^>]*>", "", formatted_html).strip()
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the speed of clean_html() with its former implementation (BeautifulSoup + prettify) on the last posts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=1000, help="number of posts to clean (the last ones)")
+        parser.add_argument("--repeat", type=int, default=3, help="the best of this many runs is kept")
+
+    def handle(self, *args, **options):
+        texts = list(
+            Post.objects.filter(is_visible=True).order_by("-pk").values_list("text_html", flat=True)[: options["posts"]]
+        )
+        if not texts:
+            raise CommandError("There is no post to clean.")
+
+        size = sum(len(text) for text in texts) / 1_000_000
+        self.stdout.write(f"{len(texts)} posts, {size:.2f} MB of HTML")
+
+        durations = {}
+        for name, function in (("BeautifulSoup + prettify", legacy_clean_html), ("clean_html", clean_html)):
+            durations[name] = min(
+                timeit.repeat(lambda: [function(text) for text in texts], number=1, repeat=options["repeat"])
+            )
+            self.stdout.write(f"- {name}: {durations[name]:.3f}s ({size / durations[name]:.2f} MB/s)")
+
+        speedup = durations["BeautifulSoup + prettify"] / durations["clean_html"]
+        self.stdout.write(f"clean_html is {speedup:.1f} times faster")
@@ -3,6 +3,7 @@ import time
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 
+from zds.search.models import SearchIndexRetry
 from zds.search.utils import SearchIndexManager, get_all_indexable_classes
 
 
@@ -19,6 +20,12 @@ class Command(BaseCommand):
             choices=["setup", "clear", "index_all", "index_flagged"],
         )
         parser.add_argument("-q", "--quiet", action="store_true", default=False)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="number of threads building the documents while others are read and sent to the search engine",
+        )
 
     def handle(self, *args, **options):
         # Removing and indexing collections can take time, so disable timeout for management.
@@ -32,13 +39,13 @@ class Command(BaseCommand):
         elif options["action"] == "clear":
             self.search_engine_manager.clear_index()
         elif options["action"] == "index_all":
-            self.index_documents(force_reindexing=True, quiet=options["quiet"])
+            self.index_documents(force_reindexing=True, quiet=options["quiet"], workers=options["workers"])
         elif options["action"] == "index_flagged":
-            self.index_documents(force_reindexing=False, quiet=options["quiet"])
+            self.index_documents(force_reindexing=False, quiet=options["quiet"], workers=options["workers"])
         else:
             raise CommandError("unknown action {}".format(options["action"]))
 
-    def index_documents(self, force_reindexing=False, quiet=False):
+    def index_documents(self, force_reindexing=False, quiet=False, workers=1):
         verbose = not quiet
 
         if force_reindexing:
@@ -55,7 +62,7 @@ class Command(BaseCommand):
                 self.stdout.write(f"- indexing {model.get_search_document_type()}s")
 
             indexed_counter = self.search_engine_manager.indexing_of_model(
-                model, force_reindexing=force_reindexing, verbose=verbose
+                model, force_reindexing=force_reindexing, verbose=verbose, workers=workers
             )
 
             if verbose:
@@ -65,3 +72,8 @@ class Command(BaseCommand):
         if verbose:
             duration = int(time.time() - global_start_time)
             self.stdout.write(f"All done in {duration//60}min{duration%60}s")
+
+        # reported even when quiet, since these documents need a fix
+        for retry in SearchIndexRetry.objects.given_up().order_by("doc_type", "document_id"):
+            self.stderr.write(f"Given up after {retry.attempts} attempts: {retry.doc_type} {retry.document_id}")
+            self.stderr.write(f"  {retry.last_error}")
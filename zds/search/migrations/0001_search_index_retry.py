@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchIndexRetry",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("doc_type", models.CharField(max_length=80, verbose_name="Collection")),
+                ("document_id", models.CharField(max_length=255, verbose_name="Identifiant du document")),
+                ("object_id", models.PositiveIntegerField()),
+                ("attempts", models.PositiveIntegerField(default=0, verbose_name="Tentatives")),
+                ("last_error", models.TextField(blank=True, verbose_name="Dernière erreur")),
+                ("next_attempt_at", models.DateTimeField(null=True, verbose_name="Prochaine tentative")),
+                (
+                    "content_type",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="contenttypes.contenttype"),
+                ),
+            ],
+            options={
+                "verbose_name": "Document à réindexer",
+                "verbose_name_plural": "Documents à réindexer",
+                "unique_together": {("doc_type", "document_id")},
+            },
+        ),
+    ]
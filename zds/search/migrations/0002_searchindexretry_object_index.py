@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_search_index_retry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="searchindexretry",
+            index=models.Index(fields=["content_type", "object_id"], name="search_sear_content_6e2ede_idx"),
+        ),
+    ]
@@ -1,4 +1,9 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
 
@@ -143,7 +148,9 @@ class AbstractSearchIndexableModel(AbstractSearchIndexable, models.Model):
         query = cls.objects
 
         if not force_reindexing:
-            query = query.filter(search_engine_requires_index=True)
+            query = query.filter(
+                Q(search_engine_requires_index=True) | Q(pk__in=SearchIndexRetry.objects.due(cls).values("object_id"))
+            )
 
         return query
 
@@ -168,3 +175,68 @@ class AbstractSearchIndexableModel(AbstractSearchIndexable, models.Model):
         self.search_engine_requires_index = kwargs.pop("search_engine_requires_index", True)
 
         return super().save(*args, **kwargs)
+
+
+class SearchIndexRetryManager(models.Manager):
+    def due(self, model):
+        """Failed documents of ``model`` whose backoff is elapsed, and which were not given up."""
+        return self.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            next_attempt_at__lte=datetime.now(),
+            attempts__lt=settings.ZDS_APP["search"]["retry"]["max_attempts"],
+        )
+
+    def given_up(self):
+        """Documents which failed too many times to be sent again, they need a fix."""
+        return self.filter(attempts__gte=settings.ZDS_APP["search"]["retry"]["max_attempts"])
+
+    def record_failure(self, doc_type, document_id, model, object_id, error):
+        """Count a new failed attempt to index a document and compute when it will be sent again.
+
+        :return: the updated retry
+        :rtype: SearchIndexRetry
+        """
+        config = settings.ZDS_APP["search"]["retry"]
+        retry, _ = self.get_or_create(
+            doc_type=doc_type,
+            document_id=document_id,
+            defaults={"content_type": ContentType.objects.get_for_model(model), "object_id": object_id},
+        )
+        retry.attempts += 1
+        retry.last_error = str(error)
+        backoff = min(config["backoff"] * 2 ** (retry.attempts - 1), config["max_backoff"])
+        retry.next_attempt_at = datetime.now() + timedelta(seconds=backoff)
+        retry.save()
+        return retry
+
+    def record_successes(self, doc_type, document_ids):
+        self.filter(doc_type=doc_type, document_id__in=document_ids).delete()
+
+
+class SearchIndexRetry(models.Model):
+    """A document that the search engine rejected, to be sent again later.
+
+    Its object is not flagged as requiring to be indexed anymore, but is sent again by the first indexation
+    after ``next_attempt_at``. After ``ZDS_APP["search"]["retry"]["max_attempts"]`` failures, it is only sent
+    again when the object is modified (and thus flagged) or the index is cleared.
+    """
+
+    class Meta:
+        verbose_name = "Document à réindexer"
+        verbose_name_plural = "Documents à réindexer"
+        unique_together = ("doc_type", "document_id")
+        indexes = [models.Index(fields=["content_type", "object_id"])]
+
+    doc_type = models.CharField("Collection", max_length=80)
+    document_id = models.CharField("Identifiant du document", max_length=255)
+    # the object flagged as requiring to be indexed (which differs from the document for chapters)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    attempts = models.PositiveIntegerField("Tentatives", default=0)
+    last_error = models.TextField("Dernière erreur", blank=True)
+    next_attempt_at = models.DateTimeField("Prochaine tentative", null=True)
+
+    objects = SearchIndexRetryManager()
+
+    def __str__(self):
+        return f"{self.doc_type} {self.document_id} ({self.attempts} tentatives)"
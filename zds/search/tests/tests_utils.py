@@ -1,5 +1,7 @@
 from copy import deepcopy
+from datetime import datetime, timedelta
 import os
+from unittest.mock import MagicMock, patch
 
 from django.conf import settings
 from django.test import TestCase
@@ -12,7 +14,9 @@ from zds.tutorialv2.models.database import PublishedContent
 from zds.tutorialv2.publication_utils import publish_content
 from zds.forum.tests.factories import TopicFactory, PostFactory, Topic, Post
 from zds.forum.tests.factories import create_category_and_forum
-from zds.search.utils import SearchFilter, SearchIndexManager
+from zds import json_handler
+from zds.search.models import SearchIndexRetry
+from zds.search.utils import SearchFilter, SearchIndexManager, clean_html
 from zds.tutorialv2.tests import TutorialTestMixin, override_for_contents
 
 
@@ -190,6 +194,136 @@ class UtilsTests(TutorialTestMixin, TestCase):
         self.search_engine_manager.clear_index()
 
 
+class IndexingOfModelTests(TestCase):
+    def setUp(self):
+        _, forum = create_category_and_forum()
+        author = ProfileFactory().user
+        self.topic = TopicFactory(forum=forum, author=author)
+        self.posts = [PostFactory(topic=self.topic, author=author, position=i) for i in range(1, 8)]
+
+        # a manager of its own (not the shared one), talking to a fake search engine
+        self.search_engine_manager = SearchIndexManager.__wrapped__()
+        self.search_engine_manager.engine = MagicMock()
+        self.search_engine_manager.connected = True
+        self.imports = self.search_engine_manager.engine.collections.__getitem__.return_value.documents.import_
+        self.imports.side_effect = self.fake_import
+        self.imported_ids = []
+        self.failing_id = None
+
+    def fake_import(self, documents, params):
+        """Answer like Typesense, to a list of documents or to JSONL (used by the pipelined indexer)."""
+        jsonl = isinstance(documents, str)
+        if jsonl:
+            documents = [json_handler.loads(line) for line in documents.split("\n")]
+        answer = []
+        for document in documents:
+            self.imported_ids.append(document["id"])
+            if document["id"] == self.failing_id:
+                answer.append({"success": False, "error": "Bad document", "document": json_handler.dumps(document)})
+            else:
+                answer.append({"success": True})
+        return "\n".join(json_handler.dumps(result) for result in answer) if jsonl else answer
+
+    def index_posts(self, workers, force_reindexing=False):
+        return self.search_engine_manager.indexing_of_model(
+            Post, force_reindexing=force_reindexing, verbose=False, workers=workers
+        )
+
+    @patch.object(Post, "initial_search_index_batch_size", 2)
+    def test_pipelined_indexing(self):
+        indexed = self.index_posts(workers=3, force_reindexing=True)
+
+        self.assertEqual(indexed, 7)
+        self.assertEqual(self.imports.call_count, 4)
+        self.assertEqual(sorted(self.imported_ids, key=int), [str(post.pk) for post in self.posts])
+        self.assertFalse(Post.objects.filter(search_engine_requires_index=True).exists())
+
+    @patch.object(Post, "initial_search_index_batch_size", 2)
+    def test_failed_documents_are_retried(self):
+        failing_post = self.posts[2]
+        self.failing_id = str(failing_post.pk)
+        max_attempts = settings.ZDS_APP["search"]["retry"]["max_attempts"]
+
+        for workers in (1, 3):
+            with self.subTest(workers=workers):
+                Post.objects.update(search_engine_requires_index=True)
+                SearchIndexRetry.objects.all().delete()
+
+                # only the failing document is scheduled to be sent again, not its whole batch
+                self.assertEqual(self.index_posts(workers), 6)
+                self.assertFalse(Post.objects.filter(search_engine_requires_index=True).exists())
+                retry = SearchIndexRetry.objects.get()
+                self.assertEqual((retry.doc_type, retry.document_id, retry.attempts), ("post", self.failing_id, 1))
+                self.assertEqual(retry.last_error, "Bad document")
+
+                # it is not sent again before the backoff is elapsed
+                self.imports.reset_mock()
+                self.index_posts(workers)
+                self.imports.assert_not_called()
+
+                # then it is, until it is given up
+                for attempt in range(2, max_attempts + 1):
+                    SearchIndexRetry.objects.update(next_attempt_at=datetime.now() - timedelta(seconds=1))
+                    self.assertEqual(self.index_posts(workers), 0)
+                    self.assertEqual(SearchIndexRetry.objects.get().attempts, attempt)
+                self.assertEqual(SearchIndexRetry.objects.given_up().count(), 1)
+
+                SearchIndexRetry.objects.update(next_attempt_at=datetime.now() - timedelta(seconds=1))
+                self.imports.reset_mock()
+                self.index_posts(workers)
+                self.imports.assert_not_called()
+
+    def test_retry_succeeds(self):
+        self.failing_id = str(self.posts[0].pk)
+        self.index_posts(workers=1)
+        self.assertTrue(SearchIndexRetry.objects.exists())
+
+        self.failing_id = None
+        SearchIndexRetry.objects.update(next_attempt_at=datetime.now() - timedelta(seconds=1))
+        self.assertEqual(self.index_posts(workers=1), 1)
+        self.assertFalse(SearchIndexRetry.objects.exists())
+        self.assertFalse(Post.objects.filter(search_engine_requires_index=True).exists())
+
+    def test_modified_document_is_retried(self):
+        failing_post = self.posts[0]
+        self.failing_id = str(failing_post.pk)
+        self.index_posts(workers=1)
+        SearchIndexRetry.objects.update(attempts=settings.ZDS_APP["search"]["retry"]["max_attempts"])
+
+        # once fixed, the post is sent again by the next indexation
+        self.failing_id = None
+        failing_post.save(search_engine_requires_index=False)
+        self.assertEqual(self.index_posts(workers=1), 0)
+        failing_post.save()
+        self.assertEqual(self.index_posts(workers=1), 1)
+        self.assertFalse(SearchIndexRetry.objects.exists())
+
+
+class CleanHtmlTests(TestCase):
+    def test_clean_html(self):
+        self.assertEqual(clean_html(None), "")
+        self.assertEqual(clean_html(""), "")
+        self.assertEqual(clean_html("<p>Un <em>texte</em></p>\n<p>et un autre</p>"), "Un texte et un autre")
+        # entities are decoded
+        self.assertEqual(clean_html("<p><code>a &lt; b &amp;&amp; c</code></p>"), "a < b && c")
+        # inline elements do not separate words, blocks do
+        self.assertEqual(clean_html("im<strong>port</strong>ant<ul><li>un</li><li>deux</li></ul>"), "important un deux")
+        self.assertEqual(clean_html("a<!-- commentaire -->b<script>alert('c');</script>"), "ab")
+
+    def test_clean_html_options(self):
+        text = "<p>Un   texte</p><p>et un autre</p>"
+        self.assertEqual(clean_html(text, collapse_whitespace=False), "Un   texte\n\net un autre")
+        self.assertEqual(clean_html(text, max_length=8), "Un texte")
+
+    def test_benchmark_command(self):
+        _, forum = create_category_and_forum()
+        author = ProfileFactory().user
+        PostFactory(topic=TopicFactory(forum=forum, author=author), author=author, position=1)
+
+        with open(os.devnull, "w") as f:
+            call_command("benchmark_clean_html", "--repeat", "1", stdout=f)
+
+
 class SearchFilterTests(TestCase):
     def test_search_filter(self):
         f = SearchFilter()
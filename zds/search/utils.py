@@ -1,17 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import lru_cache
 import logging
+import queue
 import re
+import threading
 import time
 
 from django.apps import apps
 from django.conf import settings
-from django.db import transaction
+from django.db import connection, transaction
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 from typesense import Client as TypesenseClient
 
-from zds.search.models import AbstractSearchIndexableModel
+from zds import json_handler
+from zds.search.models import AbstractSearchIndexableModel, SearchIndexRetry
 
 
 def date_to_timestamp_int(date):
@@ -27,20 +32,63 @@ def date_to_timestamp_int(date):
     return int(datetime.timestamp(date))
 
 
-def clean_html(text):
-    """Removes all HTML tags from the given text using BeautifulSoup.
+# the boundaries of these elements separate words, unlike those of inline elements (like <em> or <a>)
+BLOCK_TAGS = frozenset(
+    """
+    address article aside blockquote br caption dd details div dl dt figcaption figure footer h1 h2 h3 h4 h5 h6
+    header hr li main nav ol p pre section summary table tbody td tfoot th thead tr ul
+    """.split()
+)
+SKIPPED_TAGS = frozenset(["script", "style"])
 
-    :param text: the text to be cleaned
-    :type text: str
 
+def clean_html(text, collapse_whitespace=True, max_length=None):
+    """Extract the text of an HTML fragment, for indexing.
+
+    The fragment is parsed once with lxml and its text is collected while walking through it:
+    entities are decoded, the contents of ``<script>`` and ``<style>`` are dropped, and the texts
+    of different blocks are separated by a line break.
+
+    :param text: the HTML to be cleaned
+    :type text: str
+    :param collapse_whitespace: replace each sequence of whitespaces (including line breaks) by a single space
+    :type collapse_whitespace: bool
+    :param max_length: if set, the text is truncated to this number of characters
+    :type max_length: int
     :return: the cleaned text with all HTML tags removed
     :rtype: str
     """
-    result = ""
-    if text != None:
-        soup = BeautifulSoup(text, "html.parser")
-        formatted_html = soup.prettify()
-        result = re.sub(r"<[^>]*>", "", formatted_html).strip()
+    if not text or text.isspace():
+        return ""
+
+    parts = []
+    length = 0  # a lower bound of the length of the result, to stop as soon as max_length is reached
+
+    def add(piece):
+        nonlocal length
+        parts.append(piece)
+        length += len("".join(piece.split())) if collapse_whitespace else len(piece)
+
+    root = lxml.html.fragment_fromstring(text, create_parent="div")
+    for event, element in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        if event == "start":
+            if element.tag in BLOCK_TAGS:
+                parts.append("\n")
+            if element.tag not in SKIPPED_TAGS and element.text:
+                add(element.text)
+        else:
+            # the text of a comment or a processing instruction is not part of the document, only its tail
+            if element.tag in BLOCK_TAGS:
+                parts.append("\n")
+            if element.tail and element is not root:
+                add(element.tail)
+        if max_length is not None and length >= max_length:
+            break
+
+    result = "".join(parts)
+    result = " ".join(result.split()) if collapse_whitespace else result.strip()
+    if max_length is not None:
+        result = result[:max_length]
     return result
 
 
@@ -94,6 +142,9 @@ class SearchIndexManager:
         for collection in self.collections:
             self.engine.collections[collection].delete()
 
+        # everything is sent again, including the documents given up
+        SearchIndexRetry.objects.all().delete()
+
         for model in get_all_indexable_classes(only_models=True):
             assert issubclass(model, AbstractSearchIndexableModel)
             objs = model.get_indexable_objects(force_reindexing=True)
@@ -114,7 +165,7 @@ class SearchIndexManager:
         for model in get_all_indexable_classes():
             self.engine.collections.create(model.get_search_document_schema())
 
-    def indexing_of_model(self, model, force_reindexing=False, verbose=True):
+    def indexing_of_model(self, model, force_reindexing=False, verbose=True, workers=1):
         """Index documents of a given model in batch, using the ``objects_per_batch`` property.
 
         See https://typesense.org/docs/0.23.1/api/documents.html#index-multiple-documents
@@ -128,6 +179,8 @@ class SearchIndexManager:
         :type force_reindexing: bool
         :param verbose: whether to display or not the progress
         :type verbose: bool
+        :param workers: number of threads building the documents, the pipelined indexer is used if greater than 1
+        :type workers: int
         :return: the number of indexed documents
         :rtype: int
         """
@@ -153,6 +206,9 @@ class SearchIndexManager:
         if not issubclass(model, AbstractSearchIndexableModel):
             return
 
+        if workers > 1:
+            return self.pipelined_indexing_of_model(model, workers, force_reindexing, verbose_print)
+
         indexed_counter = 0
         if model.__name__ == "PublishedContent":
             generate = model.get_indexable(force_reindexing)
@@ -177,19 +233,11 @@ class SearchIndexManager:
                         doc_type = model.get_search_document_type()
 
                     answer = import_documents(objects, doc_type)
-                    error = None
-                    for a in answer:
-                        if "success" not in a or a["success"] is not True:
-                            error = a
-                            break
-
-                    if error is not None:
-                        self.logger.warn(f"Error when indexing {doc_type} objects: {error}.")
-                    else:
-                        # mark all these objects as indexed at once
-                        model_to_update.objects.filter(pk__in=pks).update(search_engine_requires_index=False)
-                        indexed_counter += len(objects)
-                        verbose_print("." * len(objects), end="", flush=True)
+                    indexed = self._handle_import_answer(
+                        doc_type, model_to_update, [o.search_engine_id for o in objects], pks, answer
+                    )
+                    indexed_counter += indexed
+                    verbose_print("." * indexed, end="", flush=True)
             verbose_print("")
         else:
             objects_per_batch = getattr(model, "initial_search_index_batch_size", 1)
@@ -209,30 +257,13 @@ class SearchIndexManager:
                         break
 
                     answer = import_documents(objects, doc_type)
-                    error = None
-                    for a in answer:
-                        if "success" not in a or a["success"] is not True:
-                            error = a
-                            break
-
-                    """The error management is not done correctly here: if a
-                    batch contains only one error (for a single record), the
-                    whole batch isn't marked as not requiring indexation
-                    anymore and we move to the next batch.
-                    However, how to handle this properly isn't straightforward:
-                    what to do with bugged record: retry them? How many times?
-                    Should the next batch start just after the first bugged
-                    record?
-                    In practice, errors do not happen, and if so, missed
-                    records will be indexed during the next index_flagged.
-                    """
-
-                    if error is not None:
-                        self.logger.warn(f"Error when indexing {doc_type} objects: {error}.")
-                    else:
-                        # mark all these objects as indexed at once
-                        model.objects.filter(pk__in=[o.pk for o in objects]).update(search_engine_requires_index=False)
-                        indexed_counter += len(objects)
+                    indexed_counter += self._handle_import_answer(
+                        doc_type,
+                        model,
+                        [o.search_engine_id for o in objects],
+                        [o.pk for o in objects],
+                        answer,
+                    )
 
                     # basic estimation of indexed objects per second
                     time_end = time.time()
@@ -259,6 +290,166 @@ class SearchIndexManager:
 
         return indexed_counter
 
+    def _handle_import_answer(self, doc_type, model_to_update, document_ids, pks, answer):
+        """Mark as indexed the objects whose documents were accepted by the search engine, and schedule
+        the others to be sent again later (see ``SearchIndexRetry``).
+
+        Objects whose documents failed are unflagged as well: their ``SearchIndexRetry`` decides when they
+        are sent again, unless they are modified (and thus flagged) in the meantime.
+
+        :param doc_type: the collection of the documents
+        :type doc_type: str
+        :param model_to_update: the model flagged as requiring to be indexed
+        :param document_ids: ids of the documents sent, in the order of ``answer``
+        :type document_ids: list
+        :param pks: pks of the objects of ``model_to_update`` matching each document
+        :type pks: list
+        :param answer: the answer of the search engine, one result per document
+        :type answer: list
+        :return: the number of indexed documents
+        :rtype: int
+        """
+
+        if len(answer) != len(document_ids):
+            self.logger.warn(f"Error when indexing {doc_type} objects: unexpected answer {answer}.")
+            return 0
+
+        indexed_ids = []
+        for document_id, pk, result in zip(document_ids, pks, answer):
+            if result.get("success") is True:
+                indexed_ids.append(document_id)
+                continue
+
+            retry = SearchIndexRetry.objects.record_failure(
+                doc_type, document_id, model_to_update, pk, result.get("error", result)
+            )
+            if retry.attempts >= settings.ZDS_APP["search"]["retry"]["max_attempts"]:
+                self.logger.error(
+                    f"{doc_type} {document_id} was rejected {retry.attempts} times, giving up: {retry.last_error}."
+                )
+            else:
+                self.logger.warn(f"Error when indexing {doc_type} {document_id}: {retry.last_error}.")
+
+        if indexed_ids:
+            SearchIndexRetry.objects.record_successes(doc_type, indexed_ids)
+        model_to_update.objects.filter(pk__in=pks).update(search_engine_requires_index=False)
+        return len(indexed_ids)
+
+    def pipelined_indexing_of_model(self, model, workers, force_reindexing, verbose_print):
+        """Index documents of a given model, overlapping the database reads, the building of the documents
+        and their upload.
+
+        The objects are read by batches in the calling thread. Their documents are built and serialized
+        as JSONL by ``workers`` threads, and a single thread uploads them in order. The upload queue is
+        bounded, so that a slow search engine slows the reading down instead of loading the whole table
+        in memory. Objects are marked as indexed by the calling thread.
+
+        :param model: a model
+        :type model: AbstractSearchIndexableModel
+        :param workers: number of threads building the documents
+        :type workers: int
+        :param force_reindexing: force all document to be indexed
+        :type force_reindexing: bool
+        :param verbose_print: prints the progress, when it is displayed (see ``indexing_of_model()``)
+        :type verbose_print: callable
+        :return: the number of indexed documents
+        :rtype: int
+        """
+
+        if not self.connected:
+            return
+
+        upload_queue = queue.Queue(maxsize=2 * workers)
+        done_queue = queue.Queue()
+        uploader = threading.Thread(target=self._upload_batches, args=(upload_queue, done_queue), daemon=True)
+        indexed_counter = 0
+        start_time = time.time()
+
+        def mark_indexed():
+            """Mark as indexed the objects of the batches uploaded so far."""
+            nonlocal indexed_counter
+            while True:
+                try:
+                    doc_type, model_to_update, document_ids, pks, answer = done_queue.get_nowait()
+                except queue.Empty:
+                    return
+                if isinstance(answer, Exception):
+                    # the whole batch failed (e.g. the search engine is not reachable), the documents are not to blame
+                    self.logger.warn(f"Error when indexing {doc_type} objects: {answer}.")
+                else:
+                    indexed_counter += self._handle_import_answer(doc_type, model_to_update, document_ids, pks, answer)
+                    obj_per_sec = round(indexed_counter / (time.time() - start_time), 2)
+                    verbose_print(f"    {indexed_counter} so far ({obj_per_sec} obj/s)")
+
+        uploader.start()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as builders:
+                for doc_type, model_to_update, objects, pks in self._read_batches(model, force_reindexing):
+                    future = builders.submit(self._build_jsonl, objects)
+                    document_ids = [o.search_engine_id for o in objects]
+                    # blocks when the uploader is late
+                    upload_queue.put((doc_type, model_to_update, document_ids, pks, future))
+                    mark_indexed()
+        finally:
+            upload_queue.put(None)
+            uploader.join()
+
+        mark_indexed()
+        return indexed_counter
+
+    @staticmethod
+    def _read_batches(model, force_reindexing):
+        """Yield the objects to index of ``model`` by batches, as ``(doc_type, model_to_update, objects, pks)``."""
+
+        if model.__name__ == "PublishedContent":
+            # batch management is done in PublishedContent.get_indexable(), which also yields the chapters
+            for objects in model.get_indexable(force_reindexing):
+                if not objects:
+                    return
+                if hasattr(objects[0], "parent_id"):
+                    yield "chapter", objects[0].parent_model, objects, [o.parent_id for o in objects]
+                else:
+                    yield model.get_search_document_type(), model, objects, [o.pk for o in objects]
+            return
+
+        objects_per_batch = getattr(model, "initial_search_index_batch_size", model.objects_per_batch)
+        object_source = model.get_indexable(force_reindexing)
+        doc_type = model.get_search_document_type()
+        last_pk = 0
+        while True:
+            objects = list(object_source.filter(pk__gt=last_pk)[:objects_per_batch])
+            if not objects:
+                return
+            yield doc_type, model, objects, [o.pk for o in objects]
+            last_pk = objects[-1].pk
+
+    @staticmethod
+    def _build_jsonl(objects):
+        """Build the documents of ``objects``, in the format expected by the import endpoint of Typesense."""
+
+        try:
+            return "\n".join(json_handler.dumps(obj.get_document_source()) for obj in objects)
+        finally:
+            # this runs in a worker thread, which has its own database connection
+            connection.close()
+
+    def _upload_batches(self, upload_queue, done_queue):
+        """Upload the batches of ``upload_queue`` until ``None`` is received, and report them in ``done_queue``."""
+
+        while True:
+            batch = upload_queue.get()
+            if batch is None:
+                return
+            doc_type, model_to_update, document_ids, pks, future = batch
+            try:
+                jsonl_answer = self.engine.collections[doc_type].documents.import_(
+                    future.result(), {"action": "upsert"}
+                )
+                answer = [json_handler.loads(line) for line in jsonl_answer.split("\n")]
+            except Exception as e:
+                answer = e
+            done_queue.put((doc_type, model_to_update, document_ids, pks, answer))
+
     def delete_document(self, document):
         """Delete a given document
 
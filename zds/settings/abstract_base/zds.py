@@ -120,6 +120,8 @@ ZDS_APP = {
             "discord": "https://discord.com/invite/ue5MTKq",
         },
         "cnil": "1771020",
+        # the rendered RSS and Atom feeds are cached for this time (in seconds) at most
+        "feed_cache_timeout": 15 * 60,
     },
     "github_projects": {
         "base_url": "https://github.com/{}".format,
@@ -143,6 +145,9 @@ ZDS_APP = {
         "users_in_hats_list": 5,
         "requested_hats_per_page": 100,
         "update_last_visit_interval": 600,  # seconds
+        "activity_buffer_timeout": 24 * 60 * 60,  # seconds, keep it longer than the period of flush_member_activity
+        # seconds, a visit which is still not in the buffer after this delay is considered lost by the flush
+        "activity_flush_grace_period": 60,
     },
     "hats": {
         "moderation": "Staff",
@@ -172,6 +177,23 @@ ZDS_APP = {
         # or 'extra_content_generation_policy': 'NOTHING'
         "extra_content_generation_policy": "WATCHDOG",
         "extra_content_watchdog_dir": BASE_DIR / "watchdog-build",
+        # PDF built for the last publication of each content, reused when its LaTeX source did not change
+        "latex_cache_dir": BASE_DIR / "latex-cache",
+        "publication_watchdog": {
+            # seconds between two checks for new publication requests, when there is nothing to do
+            "poll_interval": 5,
+            # a worker renews its lease on the request it processes every third of this duration (in seconds),
+            # other workers can take over once it expired (if the worker crashed)
+            "lease_duration": 5 * 60,
+            # a request claimed this many times (i.e. which made its workers crash) is marked as failed
+            "max_attempts": 3,
+        },
+        # the manifests of the last versions read are kept in memory by each process (this many of them), and in the
+        # shared cache for this time (in seconds)
+        "manifest_cache_size": 50,
+        "manifest_cache_timeout": 7 * 24 * 60 * 60,
+        # the parts of the online pages which are the same for all the readers are cached for this time (in seconds)
+        "online_fragments_cache_timeout": 24 * 60 * 60,
         "max_tree_depth": 3,
         "default_licence_pk": 7,
         "content_per_page": 42,
@@ -230,6 +252,14 @@ ZDS_APP = {
     },
     "notification": {
         "per_page": 50,
+        # the notifications and alerts displayed in the header are cached, and invalidated when they change
+        "header_cache_timeout": 15 * 60,
+        # if True, the notification emails are queued and sent by the send_queued_emails command
+        "email_outbox": False,
+        "email_outbox_max_attempts": 5,
+        "email_outbox_retry_delay": 60,  # seconds, doubled at each new attempt
+        "email_outbox_claim_timeout": 10 * 60,  # seconds, after which an email claimed by a stopped sender is due again
+        "email_outbox_retention_days": 7,
     },
     "paginator": {"folding_limit": 4},
     "search": {
@@ -286,9 +316,38 @@ ZDS_APP = {
                 "text": global_weight_post,
             },
         },
+        # documents rejected by the search engine are sent again after a backoff (in seconds) which doubles
+        # at each attempt, until they are given up and reported
+        "retry": {
+            "max_attempts": 5,
+            "backoff": 10 * 60,
+            "max_backoff": 24 * 60 * 60,
+        },
     },
     "visual_changes": [],
     "display_search_bar": True,
-    "zmd": {"server": "http://127.0.0.1:27272", "disable_pings": False},
+    "zmd": {
+        "server": "http://127.0.0.1:27272",
+        "disable_pings": False,
+        "client": {
+            # maximum number of connections kept alive to the zmarkdown server, per process
+            "pool_size": 10,
+            # retries of connection errors and 502/503/504 answers, with an exponential backoff
+            "max_retries": 2,
+            "backoff_factor": 0.2,
+            # stop calling the server for reset_timeout seconds after failure_threshold failures in a row
+            "failure_threshold": 5,
+            "reset_timeout": 30,
+        },
+        "cache": {
+            "enabled": True,
+            # number of renderings kept in the memory of each process
+            "local_max_entries": 1024,
+            # renderings bigger than this (in characters) are not cached
+            "max_entry_size": 500_000,
+            # timeout in seconds for each output format, 0 to disable the cache for this format
+            "timeouts": {"html": 60 * 60, "tex": 60 * 60, "texfile": 0, "epub": 0},
+        },
+    },
     "very_top_banner": {},
 }
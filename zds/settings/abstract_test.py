@@ -1,6 +1,11 @@
+from .abstract_base.zds import ZDS_APP
+
 DEBUG = False
 
 PASSWORD_HASHERS = (
     "django.contrib.auth.hashers.MD5PasswordHasher",
     "django.contrib.auth.hashers.SHA1PasswordHasher",
 )
+
+# zmarkdown renderings may depend on the database (pings), which is reset between tests
+ZDS_APP["zmd"]["cache"]["enabled"] = False
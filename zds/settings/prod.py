@@ -134,6 +134,8 @@ ZDS_APP["content"]["repo_private_path"] = "/opt/zds/data/contents-private"
 ZDS_APP["content"]["repo_public_path"] = "/opt/zds/data/contents-public"
 ZDS_APP["content"]["extra_content_generation_policy"] = "WATCHDOG"
 
+ZDS_APP["notification"]["email_outbox"] = True
+
 ZDS_APP["visual_changes"] = zds_config.get("visual_changes", [])
 
 ZDS_APP["very_top_banner"] = config.get("very_top_banner", False)
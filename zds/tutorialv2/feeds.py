@@ -5,13 +5,13 @@ from django.utils.timezone import make_aware
 from django.utils.translation import gettext_lazy as _
 from pytz import AmbiguousTimeError, NonExistentTimeError
 
-from zds.utils.feeds import DropControlCharsRss201rev2Feed, DropControlCharsAtom1Feed
+from zds.utils.feeds import CachedFeedMixin, DropControlCharsRss201rev2Feed, DropControlCharsAtom1Feed
 from zds.utils.models import Category, SubCategory, Tag
 from zds.utils.uuslug_wrapper import slugify
 from zds.tutorialv2.models.database import PublishedContent
 
 
-class LastContentFeedRSS(Feed):
+class LastContentFeedRSS(CachedFeedMixin, Feed):
     """
     RSS feed for any type of content.
     """
@@ -22,6 +22,7 @@ class LastContentFeedRSS(Feed):
     content_type = None
     query_params = {}
     feed_type = DropControlCharsRss201rev2Feed
+    latest_item_field = "publication_date"
 
     def get_object(self, request, *args, **kwargs):
         self.query_params = request.GET
@@ -48,7 +49,7 @@ class LastContentFeedRSS(Feed):
         feed_length = settings.ZDS_APP["content"]["feed_length"]
 
         contents = PublishedContent.objects.last_contents(
-            content_type=[self.content_type], subcategories=subcategories, tags=tags
+            content_type=[self.content_type], subcategories=subcategories, tags=tags, with_comments_count=False
         )[:feed_length]
 
         return contents
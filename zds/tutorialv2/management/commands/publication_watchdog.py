@@ -1,16 +1,47 @@
 import logging
+import multiprocessing
+import os
+import socket
+import threading
 import time
 
 from pathlib import Path
 
+from django.conf import settings
 from django.core.management import BaseCommand
+from django.db import connection, connections
 
 from zds.tutorialv2.models.database import PublicationEvent
-from zds.tutorialv2.publication_utils import PublicatorRegistry, FailureDuringPublication
+from zds.tutorialv2.publication_utils import PublicatorRegistry
 
 logger = logging.getLogger(__name__)
 
 
+class LeaseKeeper(threading.Thread):
+    """Renew the lease of a worker on an event while it is processed, so that other workers do not claim it."""
+
+    def __init__(self, publication_event, worker, lease_duration):
+        super().__init__(daemon=True)
+        self.publication_event = publication_event
+        self.worker = worker
+        self.lease_duration = lease_duration
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.lease_duration / 3):
+                if not self.publication_event.renew_lease(self.worker, self.lease_duration):
+                    logger.warning("%s lost its lease on %s", self.worker, self.publication_event)
+                    break
+        finally:
+            # this thread has its own database connection
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
 class Command(BaseCommand):
     help = "Launch a watchdog that generate all exported formats (epub, pdf...) files without blocking request handling"
 
@@ -20,59 +51,76 @@ class Command(BaseCommand):
             action="store_true",
             help="Do not wait forever for publication requests.",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes handling the publication requests concurrently.",
+        )
 
     def handle(self, *args, **options):
-        # We mark running events as failure, in case this command failed while running
-        running_events = PublicationEvent.objects.filter(state_of_processing="RUNNING")
-        for publication_event in running_events.iterator():
-            publication_event.state_of_processing = "FAILURE"
-            publication_event.save()
+        if options["workers"] <= 1:
+            self.work(options["once"])
+            return
 
-        while True:
-            requested_events = PublicationEvent.objects.filter(state_of_processing="REQUESTED")
+        # each worker process must open its own database connection
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=self.work, args=(options["once"],)) for _ in range(options["workers"])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
 
-            if requested_events.count() == 0:
-                if options["once"]:
-                    break
-                else:
-                    time.sleep(60)
-            else:
-                try:
-                    self.run()
-                except:
-                    logger.exception("Exception during one publication_watchdog run.")
-
-    def run(self):
-        requested_events = PublicationEvent.objects.select_related(
-            "published_object", "published_object__content", "published_object__content__image"
-        ).filter(state_of_processing="REQUESTED")
+    def work(self, once):
+        """Claim and process publication events until there is none left (if ``once``) or forever."""
+        config = settings.ZDS_APP["content"]["publication_watchdog"]
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        logger.info("Publication watchdog worker %s started", worker)
 
-        for publication_event in requested_events.iterator():
+        while True:
             try:
-                content = publication_event.published_object
-                extra_content_dir = content.get_extra_contents_directory()
-                building_extra_content_path = Path(
-                    str(Path(extra_content_dir).parent) + "__building", "extra_contents", content.content_public_slug
+                publication_event = PublicationEvent.objects.claim(
+                    worker, config["lease_duration"], config["max_attempts"]
                 )
-                if not building_extra_content_path.exists():
-                    building_extra_content_path.mkdir(parents=True)
-                base_name = str(building_extra_content_path)
-                md_file_path = base_name + ".md"
-
-                logger.info("Exporting « %s » as %s", content.title(), publication_event.format_requested)
-                publication_event.state_of_processing = "RUNNING"
-                publication_event.save()
-
-                publicator = PublicatorRegistry.get(publication_event.format_requested)
-                publicator.publish(md_file_path, base_name)
             except:
-                # Update and save the publication state before logging, in case
-                # content.title() would raise an exception (it already used to
-                # happen!).
-                publication_event.state_of_processing = "FAILURE"
-                publication_event.save()
-                logger.exception("Failed to export « %s » as %s", content.title(), publication_event.format_requested)
+                logger.exception("Exception during one publication_watchdog run.")
+                publication_event = None
+
+            if publication_event is not None:
+                self.run(publication_event, worker, config["lease_duration"])
+            elif once:
+                break
             else:
-                publication_event.state_of_processing = "SUCCESS"
-                publication_event.save()
-                logger.info("Succeed to export « %s » as %s", content.title(), publication_event.format_requested)
+                time.sleep(config["poll_interval"])
+
+    def run(self, publication_event, worker, lease_duration):
+        lease_keeper = LeaseKeeper(publication_event, worker, lease_duration)
+        lease_keeper.start()
+        content = publication_event.published_object
+        try:
+            extra_content_dir = content.get_extra_contents_directory()
+            building_extra_content_path = Path(
+                str(Path(extra_content_dir).parent) + "__building", "extra_contents", content.content_public_slug
+            )
+            if not building_extra_content_path.exists():
+                building_extra_content_path.mkdir(parents=True)
+            base_name = str(building_extra_content_path)
+            md_file_path = base_name + ".md"
+
+            logger.info("Exporting « %s » as %s", content.title(), publication_event.format_requested)
+
+            publicator = PublicatorRegistry.get(publication_event.format_requested)
+            publicator.publish(md_file_path, base_name)
+        except:
+            # Update and save the publication state before logging, in case
+            # content.title() would raise an exception (it already used to
+            # happen!).
+            lease_keeper.stop()
+            publication_event.release(worker, "FAILURE")
+            logger.exception("Failed to export « %s » as %s", content.title(), publication_event.format_requested)
+        else:
+            lease_keeper.stop()
+            publication_event.release(worker, "SUCCESS")
+            logger.info("Succeed to export « %s » as %s", content.title(), publication_event.format_requested)
@@ -1,11 +1,16 @@
+import logging
+from datetime import datetime, timedelta
+
 from django.conf import settings
-from django.db import models
-from django.db.models import Count, F
+from django.db import connection, models, transaction
+from django.db.models import Count, F, Q
 from django.utils.translation import gettext_lazy as _
 
 from zds.utils.models import Tag
 from model_utils.managers import InheritanceManager
 
+logger = logging.getLogger(__name__)
+
 
 class PublishedContentManager(models.Manager):
     def __get_list(self, subcategories=None, tags=None, content_type=None, with_comments_count=True):
@@ -299,3 +304,67 @@ class ReactionManager(InheritanceManager):
         queryset = queryset.prefetch_related("author").order_by("-pubdate")
 
         return queryset
+
+
+class PublicationEventManager(models.Manager):
+    """
+    Custom publication event manager, used by the workers of the publication watchdog to share the events.
+    """
+
+    def claimable(self):
+        """
+        :return: the events which are waiting for a worker: requested ones, and running ones whose worker \
+        did not renew the lease in time (because it crashed or was killed)
+        :rtype: django.db.models.QuerySet
+        """
+        lease_expired = Q(lease_expires_at__lt=datetime.now()) | Q(lease_expires_at__isnull=True)
+        return self.filter(Q(state_of_processing="REQUESTED") | Q(lease_expired, state_of_processing="RUNNING"))
+
+    def claim(self, worker, lease_duration, max_attempts):
+        """Atomically take the oldest claimable event, so that no other worker can process it
+        until the lease expires.
+
+        Events already taken ``max_attempts`` times are marked as failed instead of being claimed again.
+
+        :param worker: identifier of the worker claiming the event
+        :type worker: str
+        :param lease_duration: duration of the lease, in seconds
+        :type lease_duration: int
+        :param max_attempts: maximum number of times an event can be claimed
+        :type max_attempts: int
+        :return: the claimed event, or ``None`` if there is nothing to do
+        :rtype: zds.tutorialv2.models.database.PublicationEvent
+        """
+        while True:
+            with transaction.atomic():
+                candidates = self.claimable().order_by("date", "pk")
+                if connection.features.has_select_for_update_skip_locked:
+                    candidates = candidates.select_for_update(skip_locked=True)
+                event = candidates.first()
+                if event is None:
+                    return None
+
+                # this update is a no-op if another worker claimed the event in the meantime
+                # (possible on databases not supporting "SKIP LOCKED")
+                same_event = self.filter(
+                    pk=event.pk,
+                    state_of_processing=event.state_of_processing,
+                    lease_owner=event.lease_owner,
+                    attempts=event.attempts,
+                )
+                if event.attempts >= max_attempts:
+                    if same_event.update(state_of_processing="FAILURE", lease_owner=None, lease_expires_at=None):
+                        logger.error("Giving up %s after %d attempts", event, event.attempts)
+                    continue
+                lease_expires_at = datetime.now() + timedelta(seconds=lease_duration)
+                if same_event.update(
+                    state_of_processing="RUNNING",
+                    lease_owner=worker,
+                    lease_expires_at=lease_expires_at,
+                    attempts=F("attempts") + 1,
+                ):
+                    event.state_of_processing = "RUNNING"
+                    event.lease_owner = worker
+                    event.lease_expires_at = lease_expires_at
+                    event.attempts += 1
+                    return event
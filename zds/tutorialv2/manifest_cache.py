@@ -0,0 +1,53 @@
+"""
+Cache of the ``manifest.json`` files of the contents, read for each display of a content.
+
+A version (sha) of a content never changes, so its manifest can be kept as long as needed: the last ones read by
+the process are kept in memory (``ZDS_APP["content"]["manifest_cache_size"]``), and all of them in the cache shared
+by the processes (``ZDS_APP["content"]["manifest_cache_timeout"]``). The manifests are kept as text, so that each
+reader parses its own copy and builds its own ``VersionedContent`` from it.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+_manifests = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_manifest_data(key, load):
+    """Get the text of a manifest from the caches, or load it.
+
+    :param key: key identifying the manifest, which must change with its content (the version of the content is a part
+        of it)
+    :type key: str
+    :param load: function returning the text of the manifest if it is not in the caches, or ``None``
+    :return: the text of the manifest
+    :rtype: str
+    """
+    cache_key = f"content_manifest_{key}"
+    with _lock:
+        if cache_key in _manifests:
+            _manifests.move_to_end(cache_key)
+            return _manifests[cache_key]
+
+    data = cache.get(cache_key)
+    if data is None:
+        data = load()
+        if data is None:
+            return None
+        cache.set(cache_key, data, timeout=settings.ZDS_APP["content"]["manifest_cache_timeout"])
+
+    with _lock:
+        _manifests[cache_key] = data
+        while len(_manifests) > settings.ZDS_APP["content"]["manifest_cache_size"]:
+            _manifests.popitem(last=False)
+    return data
+
+
+def clear():
+    """Forget the manifests kept by the process (the shared cache is not cleared)."""
+    with _lock:
+        _manifests.clear()
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tutorialv2", "0041_remove_must_reindex"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="publicationevent",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0, verbose_name="nombre de tentatives"),
+        ),
+        migrations.AddField(
+            model_name="publicationevent",
+            name="lease_expires_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="fin du bail"),
+        ),
+        migrations.AddField(
+            model_name="publicationevent",
+            name="lease_owner",
+            field=models.CharField(blank=True, max_length=100, null=True, verbose_name="traité par"),
+        ),
+    ]
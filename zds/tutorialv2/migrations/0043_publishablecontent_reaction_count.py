@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def compute_reaction_counts(apps, schema_editor):
+    PublishableContent = apps.get_model("tutorialv2", "PublishableContent")
+    ContentReaction = apps.get_model("tutorialv2", "ContentReaction")
+
+    PublishableContent.objects.update(
+        reaction_count=Coalesce(
+            Subquery(
+                ContentReaction.objects.filter(related_content=OuterRef("pk"))
+                .order_by()
+                .values("related_content")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tutorialv2", "0042_publicationevent_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="publishablecontent",
+            name="reaction_count",
+            field=models.IntegerField(default=0, editable=False, verbose_name="Nombre de réactions"),
+        ),
+        migrations.RunPython(compute_reaction_counts, migrations.RunPython.noop),
+    ]
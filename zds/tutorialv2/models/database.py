@@ -1,15 +1,16 @@
 import contextlib
 import logging
 import os
+import re
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
 from math import ceil
 from pathlib import Path
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models import CASCADE
+from django.db import models, transaction
+from django.db.models import CASCADE, F
 from django.db.models.signals import pre_delete, post_delete, pre_save, post_save
 from django.dispatch import receiver
 from django.http import Http404
@@ -20,7 +21,7 @@ from git import Repo, BadObject
 from gitdb.exc import BadName
 
 from zds import json_handler
-from zds.forum.models import Topic
+from zds.forum.models import Topic, get_update_fields_without_counters
 from zds.gallery.models import Image, Gallery, UserGallery, GALLERY_WRITE
 from zds.member.utils import get_external_account
 from zds.mp.models import PrivateTopic
@@ -34,7 +35,12 @@ from zds.search.utils import (
     date_to_timestamp_int,
     clean_html,
 )
-from zds.tutorialv2.managers import PublishedContentManager, PublishableContentManager, ReactionManager
+from zds.tutorialv2.managers import (
+    PublishedContentManager,
+    PublishableContentManager,
+    PublicationEventManager,
+    ReactionManager,
+)
 from zds.tutorialv2.models import (
     TYPE_CHOICES,
     STATUS_CHOICES,
@@ -46,7 +52,8 @@ from zds.tutorialv2.models.goals import Goal
 from zds.tutorialv2.models.labels import Label
 from zds.tutorialv2.models.mixins import TemplatableContentModelMixin, OnlineLinkableContentMixin
 from zds.tutorialv2.models.versioned import NotAPublicVersion, VersionedContent
-from zds.tutorialv2.utils import get_content_from_json, BadManifestError, get_blob
+from zds.tutorialv2.manifest_cache import get_manifest_data
+from zds.tutorialv2.utils import get_content_from_json, BadManifestError, get_blob, get_latex_cache_directory
 from zds.utils import get_current_user
 from zds.utils.models import Category, SubCategory, Licence, Comment, Tag
 from zds.tutorialv2.models.help_requests import HelpWriting
@@ -54,6 +61,7 @@ from zds.utils.templatetags.emarkdown import render_markdown_stats
 from zds.utils.uuslug_wrapper import uuslug
 
 ALLOWED_TYPES = ["pdf", "md", "epub", "zip", "tex"]
+FULL_SHA_PATTERN = re.compile("[0-9a-f]{40}")
 logger = logging.getLogger(__name__)
 
 
@@ -147,6 +155,10 @@ class PublishableContent(models.Model, TemplatableContentModelMixin):
         verbose_name="Derniere note",
         on_delete=models.SET_NULL,
     )
+    # Counter maintained on each creation and deletion of reactions, visible or not
+    reaction_count = models.IntegerField("Nombre de réactions", default=0, editable=False)
+    counter_fields = ("reaction_count",)
+
     is_locked = models.BooleanField("Est verrouillé", default=False)
     js_support = models.BooleanField("Support du Javascript", default=False)
 
@@ -190,6 +202,9 @@ class PublishableContent(models.Model, TemplatableContentModelMixin):
         :param update_date: if ``True`` will assign "update_date" property to now
         :param force_slug_update: if ``True`` will try to update the slug
         """
+        kwargs["update_fields"] = get_update_fields_without_counters(
+            self, self.counter_fields, kwargs.get("update_fields")
+        )
         if self.slug == "" or force_slug_update:
             self.slug = uuslug(self.title, instance=self, max_length=80)
         if update_date:
@@ -388,8 +403,11 @@ class PublishableContent(models.Model, TemplatableContentModelMixin):
             if sha != public.sha_public:
                 raise NotAPublicVersion
 
-            with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
-                manifest = json_handler.loads(f.read())
+            manifest_path = os.path.join(path, "manifest.json")
+            # the public manifest is written again when the same version is published again
+            key = f"public_{self.pk}_{sha}_{os.stat(manifest_path).st_mtime_ns}"
+            data = get_manifest_data(key, lambda: Path(manifest_path).read_text(encoding="utf-8"))
+            manifest = json_handler.loads(data)
 
         else:  # draft version, use the repository (slower, but allows manipulation)
             path = self.get_repo_path()
@@ -397,8 +415,14 @@ class PublishableContent(models.Model, TemplatableContentModelMixin):
             if not os.path.isdir(path):
                 raise OSError(path)
 
-            repo = Repo(path)
-            data = get_blob(repo.commit(sha).tree, "manifest.json")
+            def load():
+                return get_blob(Repo(path).commit(sha).tree, "manifest.json")
+
+            # only a full sha always designates the same version, unlike a branch or an abbreviated sha
+            if isinstance(sha, str) and FULL_SHA_PATTERN.fullmatch(sha):
+                data = get_manifest_data(f"draft_{self.pk}_{sha}", load)
+            else:
+                data = load()
             try:
                 manifest = json_handler.loads(data)
                 logger.debug("loaded json")
@@ -618,6 +642,7 @@ class PublishableContent(models.Model, TemplatableContentModelMixin):
         if self.in_public() and self.public_version:
             if os.path.exists(self.public_version.get_prod_path()):
                 shutil.rmtree(self.public_version.get_prod_path())
+        shutil.rmtree(get_latex_cache_directory(self.pk), ignore_errors=True)
 
         Validation.objects.filter(content=self).delete()
 
@@ -1103,7 +1128,15 @@ class PublishedContent(AbstractSearchIndexableModel, TemplatableContentModelMixi
     def get_document_source(self, excluded_fields=[]):
         """Overridden to handle the fact that most information are versioned"""
 
-        excluded_fields.extend(["title", "description", "tags", "categories", "text", "thumbnail", "publication_date"])
+        excluded_fields = excluded_fields + [
+            "title",
+            "description",
+            "tags",
+            "categories",
+            "text",
+            "thumbnail",
+            "publication_date",
+        ]
 
         data = super().get_document_source(excluded_fields=excluded_fields)
 
@@ -1277,7 +1310,7 @@ class FakeChapter(AbstractSearchIndexable):
     def get_document_source(self, excluded_fields=[]):
         """Overridden to handle the fact that most information are versioned"""
 
-        excluded_fields.extend(["text"])
+        excluded_fields = excluded_fields + ["text"]
 
         data = super().get_document_source(excluded_fields=excluded_fields)
         data["parent_publication_date"] = date_to_timestamp_int(self.parent_publication_date)
@@ -1327,6 +1360,17 @@ class ContentReaction(Comment):
     def __str__(self):
         return f"<Réaction pour '{self.related_content}', #{self.pk}>"
 
+    def save(self, *args, **kwargs):
+        """Overridden to keep the counter of the content up to date"""
+
+        with transaction.atomic():
+            is_new = self._state.adding
+            super().save(*args, **kwargs)
+            if is_new:
+                PublishableContent.objects.filter(pk=self.related_content_id).update(
+                    reaction_count=F("reaction_count") + 1
+                )
+
     def get_absolute_url(self):
         """Find the url to the reaction
 
@@ -1517,10 +1561,45 @@ class PublicationEvent(models.Model):
     # 25 for formats such as "printable.pdf", if tomorrow we want other "long" formats this will be ready
     format_requested = models.CharField(blank=False, null=False, max_length=25)
     created = models.DateTimeField(verbose_name="date de création", name="date", auto_now_add=True)
+    # the worker of the publication watchdog processing this event, which must renew its lease before it expires
+    lease_owner = models.CharField(verbose_name="traité par", max_length=100, null=True, blank=True)
+    lease_expires_at = models.DateTimeField(verbose_name="fin du bail", null=True, blank=True)
+    attempts = models.PositiveIntegerField(verbose_name="nombre de tentatives", default=0)
+
+    objects = PublicationEventManager()
 
     def __str__(self):
         return f"{self.published_object.title()}: {self.format_requested} - {self.state_of_processing}"
 
+    def renew_lease(self, worker, lease_duration):
+        """Extend the lease of the worker on this event.
+
+        :return: ``False`` if the worker does not own the lease anymore
+        :rtype: bool
+        """
+        lease_expires_at = datetime.now() + timedelta(seconds=lease_duration)
+        renewed = PublicationEvent.objects.filter(pk=self.pk, state_of_processing="RUNNING", lease_owner=worker).update(
+            lease_expires_at=lease_expires_at
+        )
+        if renewed:
+            self.lease_expires_at = lease_expires_at
+        return bool(renewed)
+
+    def release(self, worker, state_of_processing):
+        """Set the final state of the event, if the worker still owns it.
+
+        :return: ``False`` if the event was claimed by another worker in the meantime
+        :rtype: bool
+        """
+        released = PublicationEvent.objects.filter(pk=self.pk, lease_owner=worker).update(
+            state_of_processing=state_of_processing, lease_owner=None, lease_expires_at=None
+        )
+        if released:
+            self.state_of_processing = state_of_processing
+            self.lease_owner = None
+            self.lease_expires_at = None
+        return bool(released)
+
     def url(self):
         return self.published_object.get_absolute_url_to_extra_content(self.format_requested)
 
@@ -1608,6 +1687,12 @@ class ContentSuggestion(models.Model):
         return public_suggestions[:count]
 
 
+@receiver(post_delete, sender=ContentReaction)
+def reaction_deleted(instance, **kwargs):
+    """Keep the counter of the content up to date"""
+    PublishableContent.objects.filter(pk=instance.related_content_id).update(reaction_count=F("reaction_count") - 1)
+
+
 @receiver(models.signals.pre_delete, sender=User)
 def transfer_paternity_receiver(sender, instance, **kwargs):
     """
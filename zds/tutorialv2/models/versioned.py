@@ -455,7 +455,7 @@ class Container:
         if self.introduction:
             return (
                 get_blob(
-                    self.top_container().repository.commit(self.top_container().current_version).tree,
+                    self.top_container().get_tree(),
                     self.introduction.replace("\\", "/"),
                 )
                 or ""
@@ -470,7 +470,7 @@ class Container:
         if self.conclusion:
             return (
                 get_blob(
-                    self.top_container().repository.commit(self.top_container().current_version).tree,
+                    self.top_container().get_tree(),
                     self.conclusion.replace("\\", "/"),
                 )
                 or ""
@@ -1030,10 +1030,7 @@ class Extract:
         :rtype: str
         """
         if self.text:
-            return get_blob(
-                self.container.top_container().repository.commit(self.container.top_container().current_version).tree,
-                self.text.replace("\\", "/"),
-            )
+            return get_blob(self.container.top_container().get_tree(), self.text.replace("\\", "/"))
         return ""
 
     def compute_hash(self):
@@ -1173,6 +1170,7 @@ class VersionedContent(Container, TemplatableContentModelMixin):
     current_version = None
     slug_repository = ""
     repository = None
+    _tree = None  # (repository, version, tree) loaded by get_tree()
 
     PUBLIC = False  # this variable is set to true when the VersionedContent is created from the public repository
 
@@ -1246,6 +1244,15 @@ class VersionedContent(Container, TemplatableContentModelMixin):
     def __str__(self):
         return self.title
 
+    def get_tree(self):
+        """
+        :return: the tree of ``current_version`` in the repository, loaded once for all the files read in this version
+        :rtype: git.objects.tree.Tree
+        """
+        if self._tree is None or self._tree[0] is not self.repository or self._tree[1] != self.current_version:
+            self._tree = (self.repository, self.current_version, self.repository.commit(self.current_version).tree)
+        return self._tree[2]
+
     def requires_validation(self) -> bool:
         return self.type in CONTENT_TYPES_REQUIRING_VALIDATION
 
@@ -1,9 +1,11 @@
 import contextlib
 import copy
+import hashlib
 import logging
 import os
 import shutil
 import subprocess
+import tempfile
 import zipfile
 from datetime import datetime
 from os import makedirs, path
@@ -21,7 +23,7 @@ from zds.tutorialv2.epub_utils import build_ebook
 from zds.tutorialv2.models.database import ContentReaction, PublishedContent, PublicationEvent
 from zds.tutorialv2.publish_container import publish_use_manifest
 from zds.tutorialv2.signals import content_unpublished
-from zds.tutorialv2.utils import export_content
+from zds.tutorialv2.utils import export_content, get_latex_cache_directory, invalidate_online_fragments
 from zds.forum.utils import send_post, lock_topic
 from zds.utils.templatetags.emarkdown import render_markdown
 from zds.utils.templatetags.smileys_def import SMILEYS_BASE_PATH, LICENSES_BASE_PATH
@@ -75,9 +77,10 @@ def publish_content(db_object, versioned, is_major_update=True):
     if path.exists(tmp_path):
         shutil.rmtree(tmp_path)  # remove previous attempt, if any
 
-    # render HTML:
+    # render HTML, re-using the texts which did not change since the last publication:
     altered_version = copy.deepcopy(versioned)
-    char_count = publish_use_manifest(db_object, tmp_path, altered_version)
+    previous_dir = db_object.public_version.get_prod_path() if db_object.public_version else None
+    char_count = publish_use_manifest(db_object, tmp_path, altered_version, previous_dir)
     altered_version.dump_json(path.join(tmp_path, "manifest.json"))
 
     # make room for 'extra contents'
@@ -126,6 +129,8 @@ def publish_content(db_object, versioned, is_major_update=True):
     shutil.copytree(tmp_path, public_version.get_prod_path())
     db_object.sha_public = versioned.current_version
     public_version.save()
+    # the pages must now be rendered from the new files
+    invalidate_online_fragments(db_object.pk)
     if settings.ZDS_APP["content"]["extra_content_generation_policy"] == "SYNC":
         # ok, now we can really publish the thing!
         generate_external_content(base_name, build_extra_contents_path, md_file_path, versioned=versioned)
@@ -430,13 +435,72 @@ class ZMarkdownRebberLatexPublicator(Publicator):
             latex_file.write(content)
         shutil.copy2(latex_file_path, published_content_entity.get_extra_contents_directory())
 
-        self.full_tex_compiler_call(latex_file_path, draftmode="-draftmode")
-        self.full_tex_compiler_call(latex_file_path, draftmode="-draftmode")
-        self.make_glossary(base_name.split("/")[-1], latex_file_path)
-        self.full_tex_compiler_call(latex_file_path)
+        cached_pdf_path = self.get_cached_pdf_path(
+            published_content_entity.content_pk, self.get_build_hash(content, image_dir, zmd_class_dir_path)
+        )
+        try:
+            # no prior check: another worker may replace the cached PDF at any time
+            shutil.copy2(cached_pdf_path, pdf_file_path)
+            logger.info("LaTeX source of %s did not change, reused %s", pdf_file_path, cached_pdf_path)
+        except FileNotFoundError:
+            self.compile(base_name, latex_file_path, pdf_file_path)
+            self.store_cached_pdf(pdf_file_path, cached_pdf_path)
 
         shutil.copy2(pdf_file_path, published_content_entity.get_extra_contents_directory())
 
+    def get_build_hash(self, latex_content, image_dir, zmd_class_dir_path):
+        """Hash everything the PDF depends on: the LaTeX source, the images it includes and the LaTeX class."""
+        build_hash = hashlib.sha256(latex_content.encode("utf-8"))
+        dependencies = sorted(file for file in image_dir.rglob("*") if file.is_file())
+        dependencies += [file for file in (zmd_class_dir_path / "zmdocument.cls",) if file.is_file()]
+        for dependency in dependencies:
+            build_hash.update(dependency.name.encode("utf-8"))
+            build_hash.update(dependency.read_bytes())
+        return build_hash.hexdigest()
+
+    def get_cached_pdf_path(self, content_pk, build_hash):
+        return get_latex_cache_directory(content_pk) / self.doc_type / build_hash
+
+    def store_cached_pdf(self, pdf_file_path, cached_pdf_path):
+        """Keep the PDF for the next publication, only the last build of each content and variant is kept."""
+        cache_dir = cached_pdf_path.parent
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for outdated in cache_dir.iterdir():
+            with contextlib.suppress(FileNotFoundError):
+                outdated.unlink()
+        # copy then rename, so that another worker never reuses a partially written file
+        temporary_path = cache_dir / f".{cached_pdf_path.name}.{os.getpid()}"
+        shutil.copy2(pdf_file_path, temporary_path)
+        os.replace(temporary_path, cached_pdf_path)
+
+    def compile(self, base_name, latex_file_path, pdf_file_path):
+        """Run the compiler chain in a temporary directory of its own.
+
+        The auxiliary files (``.aux``, ``.log``, glossaries...) of the variants do not collide, so that
+        they can be compiled at the same time by several watchdog workers.
+        """
+        base_directory = Path(base_name).parent
+        with tempfile.TemporaryDirectory(prefix=f"{self.doc_type}-", dir=base_directory) as build_directory:
+            build_directory = Path(build_directory)
+            for dependency in ("images", "zmdocument.cls", "utf8.lua", "default_logo.png"):
+                if (base_directory / dependency).exists():
+                    (build_directory / dependency).symlink_to((base_directory / dependency).absolute())
+            build_latex_file_path = str(build_directory / Path(latex_file_path).name)
+            shutil.copy2(latex_file_path, build_latex_file_path)
+
+            try:
+                self.full_tex_compiler_call(build_latex_file_path, draftmode="-draftmode")
+                self.full_tex_compiler_call(build_latex_file_path, draftmode="-draftmode")
+                self.make_glossary(Path(base_name).name, build_latex_file_path)
+                self.full_tex_compiler_call(build_latex_file_path)
+            except FailureDuringPublication:
+                # keep the log with the other build files, the temporary directory is removed
+                with contextlib.suppress(FileNotFoundError):
+                    shutil.copy2(path.splitext(build_latex_file_path)[0] + ".log", base_directory)
+                raise
+
+            shutil.copy2(path.splitext(build_latex_file_path)[0] + self.extension, pdf_file_path)
+
     def full_tex_compiler_call(self, latex_file, draftmode: str = ""):
         success_flag = self.tex_compiler(latex_file, draftmode)
         if not success_flag:
@@ -549,6 +613,8 @@ class FailureDuringPublication(Exception):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # displayed to the user by the views
+        self.message = str(args[0]) if args else ""
 
 
 def make_zip_file(published_content):
@@ -568,7 +634,7 @@ def make_zip_file(published_content):
     versioned = publishable.load_version(None, True)
     from zds.tutorialv2.views.archives import DownloadContent
 
-    DownloadContent.insert_into_zip(zip_file, versioned.repository.commit(versioned.current_version).tree)
+    DownloadContent.insert_into_zip(zip_file, versioned.get_tree())
     zip_file.close()
     return file_path
 
@@ -618,6 +684,8 @@ def unpublish_content(db_object, moderator=None):
         public_version.content.update(public_version=None, sha_public=None)
         if path.exists(old_path):
             shutil.rmtree(old_path)
+        shutil.rmtree(get_latex_cache_directory(db_object.pk), ignore_errors=True)
+        invalidate_online_fragments(db_object.pk)
         return True
 
     return False
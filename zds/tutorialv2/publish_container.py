@@ -1,27 +1,167 @@
 import collections
 import contextlib
+import hashlib
+import json
+import logging
+import shutil
+from functools import lru_cache
 from os import path, makedirs
 from pathlib import Path
 import copy
 
 import requests
+from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.translation import gettext_lazy as _
 
+from zds import json_handler
 from zds.tutorialv2.models.database import PublishableContent
 from zds.tutorialv2.models.versioned import Container, VersionedContent
 from zds.tutorialv2.utils import export_content
-from zds.utils.templatetags.emarkdown import emarkdown, render_markdown
+from zds.utils.templatetags.emarkdown import emarkdown, epub_markdown, render_markdown_many
+from zds.utils.zmarkdown_client import get_zmarkdown_client
 
+logger = logging.getLogger(__name__)
 
-def publish_use_manifest(db_object, base_dir, versionable_content: VersionedContent):
+
+PUBLICATION_MANIFEST = "publication_manifest.json"
+RENDERED_TEXTS_DIRNAME = ".rendered"
+RENDERED_FIELDS = ("introduction", "conclusion", "text")
+
+
+def publish_use_manifest(db_object, base_dir, versionable_content: VersionedContent, previous_dir=None):
+    """Render the content into ``base_dir``, re-using the texts rendered for the previous publication.
+
+    :param previous_dir: the directory of the previous public version, if any
+    :return: the number of characters of the content
+    :rtype: int
+    """
     base_content = export_content(versionable_content, with_text=True)
+    rendered, char_count = render_manifest_incrementally(db_object, base_dir, base_content, previous_dir)
+    publish_container_new(db_object, base_dir, versionable_content, rendered)
+    return char_count
 
-    md, metadata, __ = render_markdown(
-        base_content, disable_jsfiddle=not db_object.js_support, full_json=True, stats=True
-    )
-    publish_container_new(db_object, base_dir, versionable_content, md)
-    return metadata.get("stats", {}).get("signs", 0)
+
+@lru_cache
+def get_renderer_version():
+    """Version of zmarkdown used by the markdown server, as pinned in ``zmd/package.json``."""
+    try:
+        with open(Path(settings.BASE_DIR, "zmd", "package.json"), encoding="utf-8") as package_file:
+            return json.load(package_file)["dependencies"]["zmarkdown"]
+    except (OSError, ValueError, KeyError):
+        logger.warning("Unable to read the version of zmarkdown, rendered texts are only identified by their options")
+        return ""
+
+
+def get_render_options(db_object):
+    """Options sent to the markdown server to render the texts of a publication."""
+    return {"disable_jsfiddle": not db_object.js_support, "stats": True}
+
+
+def compute_text_hash(db_object, text):
+    """Hash of a text, of the options used to render it and of the version of the renderer.
+
+    A text rendered by another version of zmarkdown, or with other options, is thus rendered again.
+    """
+    options = dict(get_render_options(db_object), disable_ping=settings.ZDS_APP["zmd"]["disable_pings"] is True)
+    payload = json.dumps([get_renderer_version(), options, text], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_publication_manifest(directory):
+    """Read the publication manifest of a public directory.
+
+    :return: the rendered texts of the publication, indexed by their hash: ``{hash: {"path": ..., "signs": ...}}``
+    :rtype: dict
+    """
+    if directory is None:
+        return {}
+    try:
+        with open(Path(directory, PUBLICATION_MANIFEST), encoding="utf-8") as manifest_file:
+            return json_handler.load(manifest_file)["texts"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def render_manifest_incrementally(db_object, base_dir, base_content, previous_dir=None):
+    """Render the texts of an exported content, only sending to the markdown server the ones that changed
+    since the previous publication.
+
+    The rendered texts are kept in ``base_dir``, and listed, with their hash, in its publication manifest,
+    so that the next publication can copy them instead of rendering them again.
+
+    :param base_content: the content, as exported by ``export_content(..., with_text=True)``
+    :param previous_dir: the directory of the previous public version, if any
+    :return: the rendered manifest, i.e. ``base_content`` with HTML texts, and the number of characters
+    :rtype: tuple
+    :raise FailureDuringPublication: if the markdown server cannot render one of the texts
+    """
+    from zds.tutorialv2.publication_utils import FailureDuringPublication
+
+    previous_texts = load_publication_manifest(previous_dir)
+    rendered = copy.deepcopy(base_content)
+    texts = {}
+    locations = collections.defaultdict(list)
+
+    def collect(node):
+        for field in RENDERED_FIELDS:
+            if node.get(field):
+                text_hash = compute_text_hash(db_object, node[field])
+                texts[text_hash] = node[field]
+                locations[text_hash].append((node, field))
+        for child in node.get("children", []):
+            collect(child)
+
+    collect(rendered)
+
+    rendered_dir = Path(base_dir, RENDERED_TEXTS_DIRNAME)
+    rendered_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    html = {}
+    to_render = []
+    for text_hash in texts:
+        previous = previous_texts.get(text_hash)
+        previous_path = Path(previous_dir, previous["path"]) if previous else None
+        if previous_path and previous_path.is_file():
+            shutil.copy2(previous_path, rendered_dir)
+            html[text_hash] = previous_path.read_text(encoding="utf-8")
+            manifest[text_hash] = previous
+        else:
+            to_render.append(text_hash)
+
+    try:
+        results = render_markdown_many([texts[text_hash] for text_hash in to_render], **get_render_options(db_object))
+    except requests.RequestException as e:
+        raise FailureDuringPublication(_("Une erreur est survenue durant le rendu du contenu : {}").format(e)) from e
+    for text_hash, (content, metadata, messages) in zip(to_render, results):
+        # a text may legitimately render to nothing (only blanks or link definitions), but the statistics, which are
+        # always requested, are only missing when the server failed: never publish an empty text in that case
+        if not content and "stats" not in metadata and texts[text_hash].strip():
+            errors = ", ".join(message.get("message", "") for message in messages)
+            raise FailureDuringPublication(
+                _("Une erreur est survenue durant le rendu du contenu : {}").format(
+                    errors or _("le serveur Markdown n'a rien renvoyé")
+                )
+            )
+        if messages:
+            logger.warning("Markdown messages while publishing %s: %s", db_object.slug, messages)
+        content = content or ""
+        html[text_hash] = content
+        relative_path = Path(RENDERED_TEXTS_DIRNAME, text_hash + ".html")
+        Path(base_dir, relative_path).write_text(content, encoding="utf-8")
+        manifest[text_hash] = {"path": str(relative_path), "signs": metadata.get("stats", {}).get("signs", 0)}
+
+    char_count = 0
+    for text_hash, text_locations in locations.items():
+        for node, field in text_locations:
+            node[field] = html[text_hash]
+        char_count += manifest.get(text_hash, {}).get("signs", 0) * len(text_locations)
+
+    with open(Path(base_dir, PUBLICATION_MANIFEST), "w", encoding="utf-8") as manifest_file:
+        json_handler.dump({"texts": manifest}, manifest_file)
+
+    logger.debug("%d texts rendered, %d re-used from %s", len(to_render), len(texts) - len(to_render), previous_dir)
+    return rendered, char_count
 
 
 def publish_container_new(
@@ -121,6 +261,73 @@ def render_chapter_or_minituto(base_dir, container, ctx, rendered, template):
     container.conclusion = None
 
 
+def render_key(element, part):
+    """Identify a text of the content tree among the results of ``render_container_texts``.
+
+    :param element: a container or an extract
+    :param part: ``introduction``, ``conclusion`` or ``text``
+    """
+    return element.get_path(relative=True), part
+
+
+def collect_render_jobs(container):
+    """List the non-empty texts of a container and of its descendants which are published, in tree order.
+
+    :param container: a given container
+    :type container: Container
+    :return: a list of ``(key, markdown text)``, ``key`` being computed by ``render_key``
+    :rtype: list
+    """
+    jobs = []
+    introduction = container.get_introduction() if container.introduction else ""
+    if introduction:
+        jobs.append((render_key(container, "introduction"), introduction))
+    if container.has_extracts():
+        for extract in container.children:
+            text = extract.get_text() if extract.text else ""
+            if text:
+                jobs.append((render_key(extract, "text"), text))
+    else:
+        for child in filter(lambda c: c.ready_to_publish, container.children):
+            jobs.extend(collect_render_jobs(child))
+    conclusion = container.get_conclusion() if container.conclusion else ""
+    if conclusion:
+        jobs.append((render_key(container, "conclusion"), conclusion))
+    return jobs
+
+
+def render_container_texts(db_object, container, image_directory=None):
+    """Render all the texts of a container and of its descendants at once.
+
+    Renderings are I/O bound, so they are sent concurrently to the markdown server, using the connection
+    pool of the zmarkdown client.
+
+    :param db_object: database representation of the content
+    :type db_object: PublishableContent
+    :param container: a given container
+    :type container: Container
+    :param image_directory: if set, the texts are rendered for an epub, their images being downloaded there
+    :return: a dictionary of the rendered texts, indexed by ``render_key``
+    :rtype: dict
+    :raise FailureDuringPublication: if the markdown server cannot render one of the texts
+    """
+    from zds.tutorialv2.publication_utils import FailureDuringPublication
+
+    def render(text):
+        if image_directory:
+            return epub_markdown(text, image_directory)
+        return emarkdown(text, db_object.js_support)
+
+    jobs = collect_render_jobs(container)
+    try:
+        rendered = get_zmarkdown_client().map(render, [text for __, text in jobs])
+    except requests.RequestException as e:
+        raise FailureDuringPublication(
+            _("Une erreur est survenue durant le rendu de « {} » : {}").format(container.title, e)
+        ) from e
+    return {key: text for (key, __), text in zip(jobs, rendered)}
+
+
 def publish_container(
     db_object,
     base_dir,
@@ -128,6 +335,7 @@ def publish_container(
     template="tutorialv2/export/chapter.html",
     file_ext="html",
     image_callback=None,
+    rendered_texts=None,
     **ctx,
 ):
     """'Publish' a given container, in a recursive way
@@ -135,6 +343,8 @@ def publish_container(
 
     :param image_callback: callback used to change images tags on the created html
     :type image_callback: callable
+    :param rendered_texts: the rendered texts of the container, computed by ``render_container_texts`` if not given
+    :type rendered_texts: dict
     :param db_object: database representation of the content
     :type db_object: PublishableContent
     :param base_dir: directory of the top container
@@ -154,6 +364,9 @@ def publish_container(
     if not isinstance(container, Container):
         raise FailureDuringPublication(_("Le conteneur n'en est pas un !"))
 
+    if rendered_texts is None:
+        rendered_texts = render_container_texts(db_object, container, ctx.get("image_directory"))
+
     # jsFiddle support
     is_js = ""
     if db_object.js_support:
@@ -167,7 +380,15 @@ def publish_container(
     img_relative_path = ".." if ctx["relative"] == "." else "../" + ctx["relative"]
     wrapped_image_callback = image_callback(img_relative_path) if image_callback else None
     if container.has_extracts():  # the container can be rendered in one template
-        args = {"container": container, "is_js": is_js}
+        args = {
+            "container": container,
+            "is_js": is_js,
+            "rendered_introduction": rendered_texts.get(render_key(container, "introduction"), ""),
+            "rendered_extracts": [
+                (extract, rendered_texts.get(render_key(extract, "text"), "")) for extract in container.children
+            ],
+            "rendered_conclusion": rendered_texts.get(render_key(container, "conclusion"), ""),
+        }
         args.update(ctx)
         args["relative"] = img_relative_path
         parsed = render_to_string(template, args)
@@ -191,13 +412,14 @@ def publish_container(
         relative_ccl_path = "../" + ctx.get("relative", ".")
         if container.introduction and container.get_introduction():
             part_path = Path(container.get_prod_path(relative=True), "introduction." + file_ext)
-            args = {"text": container.get_introduction()}
+            rendered_text = rendered_texts[render_key(container, "introduction")]
+            args = {"text": container.get_introduction(), "rendered_text": rendered_text}
             args.update(ctx)
             args["relative"] = relative_ccl_path
             if ctx.get("intro_ccl_template", None):
                 parsed = render_to_string(ctx.get("intro_ccl_template"), args)
             else:
-                parsed = emarkdown(container.get_introduction(), db_object.js_support)
+                parsed = rendered_text
             container.introduction = str(part_path)
             write_chapter_file(base_dir, container, part_path, parsed, path_to_title_dict, wrapped_image_callback)
         children = copy.copy(container.children)
@@ -216,18 +438,20 @@ def publish_container(
                 file_ext=file_ext,
                 image_callback=image_callback,
                 template=template,
+                rendered_texts=rendered_texts,
                 **ctx,
             )
             path_to_title_dict.update(result)
         if container.conclusion and container.get_conclusion():
             part_path = Path(container.get_prod_path(relative=True), "conclusion." + file_ext)
-            args = {"text": container.get_conclusion()}
+            rendered_text = rendered_texts[render_key(container, "conclusion")]
+            args = {"text": container.get_conclusion(), "rendered_text": rendered_text}
             args.update(ctx)
             args["relative"] = relative_ccl_path
             if ctx.get("intro_ccl_template", None):
                 parsed = render_to_string(ctx.get("intro_ccl_template"), args)
             else:
-                parsed = emarkdown(container.get_conclusion(), db_object.js_support)
+                parsed = rendered_text
             container.conclusion = str(part_path)
             write_chapter_file(base_dir, container, part_path, parsed, path_to_title_dict, wrapped_image_callback)
 
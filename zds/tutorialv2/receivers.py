@@ -9,6 +9,7 @@ from zds.tutorialv2.models.database import PublishableContent, ContentReaction
 from zds.tutorialv2.signals import content_unpublished
 from zds.gallery.models import Gallery
 from zds.utils import get_current_user
+from zds.utils.header_notifications import invalidate_header_alerts
 from zds.utils.models import Alert
 
 
@@ -37,6 +38,7 @@ def cleanup_validation_alerts(sender, instance, *, moderator=None, **__):
             solved_date=datetime.datetime.now(),
             solved=True,
         )
+        invalidate_header_alerts()
 
 
 @receiver(post_delete, sender=Gallery)
@@ -13,6 +13,7 @@ from zds.tutorialv2.models.database import Validation
 overridden_zds_app = copy.deepcopy(settings.ZDS_APP)
 overridden_zds_app["content"]["repo_private_path"] = settings.BASE_DIR / "contents-private-test"
 overridden_zds_app["content"]["repo_public_path"] = settings.BASE_DIR / "contents-public-test"
+overridden_zds_app["content"]["latex_cache_dir"] = settings.BASE_DIR / "latex-cache-test"
 overridden_zds_app["content"]["extra_content_generation_policy"] = "SYNC"
 
 
@@ -33,6 +34,7 @@ class TutorialTestMixin:
         shutil.rmtree(self.overridden_zds_app["content"]["repo_private_path"], ignore_errors=True)
         shutil.rmtree(self.overridden_zds_app["content"]["repo_public_path"], ignore_errors=True)
         shutil.rmtree(self.overridden_zds_app["content"]["extra_content_watchdog_dir"], ignore_errors=True)
+        shutil.rmtree(self.overridden_zds_app["content"]["latex_cache_dir"], ignore_errors=True)
 
         shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
 
@@ -1,11 +1,14 @@
 import unittest
+from unittest.mock import patch
 
 from django.urls import reverse
 from datetime import datetime, timedelta
 import os
 
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
+from git import Repo
 
 from zds.gallery.models import UserGallery
 
@@ -15,8 +18,10 @@ from zds.tutorialv2.tests.factories import (
     ContainerFactory,
     ExtractFactory,
     PublishedContentFactory,
+    ContentReactionFactory,
 )
 from zds.gallery.tests.factories import UserGalleryFactory
+from zds.tutorialv2 import manifest_cache
 from zds.tutorialv2.models.database import PublishableContent, PublishedContent
 from zds.tutorialv2.publication_utils import publish_content
 from zds.tutorialv2.tests import TutorialTestMixin, override_for_contents
@@ -63,6 +68,47 @@ class ContentTests(TutorialTestMixin, TestCase):
         self.assertTrue(self.part1.slug in list(versioned.children_dict.keys()))
         self.assertTrue(self.chapter1.slug in versioned.children_dict[self.part1.slug].children_dict)
 
+    def test_manifest_is_cached(self):
+        versioned = self.tuto.load_version()
+        versioned.children[0].title = "Modifié"
+
+        # the version is read from the caches, each reader gets its own objects
+        with patch("zds.tutorialv2.models.database.Repo") as repo:
+            cached = self.tuto.load_version()
+            self.assertFalse(repo.called)
+        self.assertEqual(self.part1.title, cached.children[0].title)
+        self.assertEqual(self.extract1.title, cached.children[0].children[0].children[0].title)
+
+        manifest_cache.clear()
+        with patch("zds.tutorialv2.models.database.Repo") as repo:
+            self.tuto.load_version()  # from the shared cache
+            self.assertFalse(repo.called)
+
+        manifest_cache.clear()
+        cache.clear()
+        self.assertEqual(self.part1.title, self.tuto.load_version().children[0].title)
+
+        # a branch or an abbreviated sha may designate another version later, it is never cached
+        with patch("zds.tutorialv2.models.database.Repo", wraps=Repo) as repo:
+            self.assertEqual(self.part1.title, self.tuto.load_version(sha="HEAD").children[0].title)
+            self.tuto.load_version(sha=self.tuto.sha_draft[:7])
+            self.assertEqual(2, repo.call_count)
+
+    def test_reaction_count(self):
+        reactions = [ContentReactionFactory(related_content=self.tuto, author=self.user_author) for _ in range(3)]
+        reactions[1].is_visible = False
+        reactions[1].save()
+        self.tuto.refresh_from_db()
+        self.assertEqual(3, self.tuto.reaction_count)
+
+        # an outdated instance does not overwrite the counter
+        outdated = PublishableContent.objects.get(pk=self.tuto.pk)
+        ContentReactionFactory(related_content=self.tuto, author=self.staff)
+        reactions[0].delete()
+        outdated.save()
+        self.tuto.refresh_from_db()
+        self.assertEqual(3, self.tuto.reaction_count)
+
     def test_slug_pool(self):
         versioned = self.tuto.load_version()
 
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from zds.tutorialv2.models.database import PublicationEvent, PublishedContent
+from zds.tutorialv2.publication_utils import Publicator, PublicatorRegistry
+from zds.tutorialv2.tests import TutorialTestMixin, override_for_contents
+from zds.tutorialv2.tests.factories import PublishableContentFactory
+
+
+@override_for_contents()
+class PublicationWatchdogTests(TutorialTestMixin, TestCase):
+    def setUp(self):
+        content = PublishableContentFactory()
+        self.published = PublishedContent.objects.create(
+            content=content, content_pk=content.pk, content_public_slug=content.slug, content_type=content.type
+        )
+        self.old_registry = dict(PublicatorRegistry.registry)
+
+    def tearDown(self):
+        PublicatorRegistry.registry = self.old_registry
+        super().tearDown()
+
+    def create_event(self, state="REQUESTED", format_requested="pdf", **kwargs):
+        return PublicationEvent.objects.create(
+            published_object=self.published, state_of_processing=state, format_requested=format_requested, **kwargs
+        )
+
+    def test_claim(self):
+        first = self.create_event()
+        second = self.create_event(format_requested="epub")
+
+        claimed = PublicationEvent.objects.claim("worker-1", 60, 3)
+        self.assertEqual(claimed, first)
+        self.assertEqual(claimed.attempts, 1)
+        first.refresh_from_db()
+        self.assertEqual(first.state_of_processing, "RUNNING")
+        self.assertEqual(first.lease_owner, "worker-1")
+
+        # a running event is not given to another worker
+        self.assertEqual(PublicationEvent.objects.claim("worker-2", 60, 3), second)
+        self.assertIsNone(PublicationEvent.objects.claim("worker-3", 60, 3))
+
+    def test_expired_lease_is_reclaimed(self):
+        event = self.create_event(
+            state="RUNNING", lease_owner="dead", lease_expires_at=datetime.now() - timedelta(seconds=1), attempts=1
+        )
+        self.create_event(state="RUNNING", lease_owner="alive", lease_expires_at=datetime.now() + timedelta(hours=1))
+
+        claimed = PublicationEvent.objects.claim("worker", 60, 3)
+        self.assertEqual(claimed, event)
+        self.assertEqual(claimed.attempts, 2)
+
+        # the dead worker cannot overwrite the result anymore
+        self.assertFalse(event.release("dead", "SUCCESS"))
+        self.assertFalse(event.renew_lease("dead", 60))
+        self.assertTrue(claimed.renew_lease("worker", 60))
+        self.assertTrue(claimed.release("worker", "SUCCESS"))
+
+    def test_poison_event_fails(self):
+        event = self.create_event(state="RUNNING", lease_owner="dead", attempts=3)
+
+        self.assertIsNone(PublicationEvent.objects.claim("worker", 60, 3))
+        event.refresh_from_db()
+        self.assertEqual(event.state_of_processing, "FAILURE")
+
+    def test_command(self):
+        class SucceedingPublicator(Publicator):
+            def publish(self, md_file_path, base_name, **kwargs):
+                pass
+
+        class FailingPublicator(Publicator):
+            def publish(self, md_file_path, base_name, **kwargs):
+                raise OSError()
+
+        PublicatorRegistry.registry["pdf"] = SucceedingPublicator()
+        PublicatorRegistry.registry["epub"] = FailingPublicator()
+        succeeding = self.create_event()
+        failing = self.create_event(format_requested="epub")
+        running = self.create_event(
+            state="RUNNING", lease_owner="other", lease_expires_at=datetime.now() + timedelta(hours=1)
+        )
+
+        call_command("publication_watchdog", "--once")
+
+        for event in (succeeding, failing, running):
+            event.refresh_from_db()
+        self.assertEqual(succeeding.state_of_processing, "SUCCESS")
+        self.assertEqual(failing.state_of_processing, "FAILURE")
+        # the event of another (living) worker is left untouched
+        self.assertEqual(running.state_of_processing, "RUNNING")
+        self.assertIsNone(succeeding.lease_owner)
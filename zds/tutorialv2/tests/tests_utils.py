@@ -1,9 +1,13 @@
 import os
 import shutil
 from pathlib import Path
+from unittest.mock import patch
 import datetime
 
+import requests
+
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
@@ -18,15 +22,28 @@ from zds.tutorialv2.tests.factories import (
 from zds.gallery.tests.factories import UserGalleryFactory
 from zds.tutorialv2.models.versioned import Container
 from zds.tutorialv2.utils import (
+    export_content,
     get_target_tagged_tree_for_container,
     get_target_tagged_tree_for_extract,
     last_participation_is_old,
     BadManifestError,
     get_content_from_json,
     get_commit_author,
+    get_blob,
+    get_online_fragments_key,
+    invalidate_online_fragments,
+    get_latex_cache_directory,
 )
 from zds.utils.validators import slugify_raise_on_invalid, InvalidSlugError, check_slug
-from zds.tutorialv2.publication_utils import publish_content, unpublish_content
+from zds.tutorialv2.publication_utils import publish_content, unpublish_content, FailureDuringPublication
+from zds.tutorialv2.publish_container import (
+    collect_render_jobs,
+    compute_text_hash,
+    render_container_texts,
+    render_key,
+    render_manifest_incrementally,
+    PUBLICATION_MANIFEST,
+)
 from zds.tutorialv2.models.database import PublishableContent, PublishedContent, ContentReaction, ContentRead
 from django.core.management import call_command
 from zds.tutorialv2.publication_utils import Publicator, PublicatorRegistry, ZMarkdownRebberLatexPublicator
@@ -270,6 +287,214 @@ class UtilsTests(TutorialTestMixin, TestCase):
         self.assertFalse(paths[second_container.get_path(True)])
         self.assertFalse(paths[first_container.get_path(True)])
 
+    def test_get_blob(self):
+        extract = ExtractFactory(container=self.chapter1, db_object=self.tuto)
+        versioned = self.tuto.load_version()
+        tree = versioned.get_tree()
+        text = versioned.children[0].children[0].children[0].get_text()
+        self.assertEqual(text, get_blob(tree, extract.text))
+        self.assertEqual(text, get_blob(tree, "./" + extract.text))
+        self.assertIsNone(get_blob(tree, self.chapter1.get_path(relative=True)))
+        self.assertIsNone(get_blob(tree, "missing.md"))
+
+        # the tree is loaded once for all the files of the version
+        with patch.object(type(versioned.repository), "commit") as commit:
+            export_content(versioned, with_text=True)
+            self.assertFalse(commit.called)
+
+    def test_online_fragments_key(self):
+        public = PublishedContent(content_pk=self.tuto.pk, sha_public="abc")
+        key = get_online_fragments_key(public)
+        self.assertEqual(key, get_online_fragments_key(public))
+        self.assertNotEqual(key, get_online_fragments_key(public, self.chapter1))
+        self.assertNotEqual(key, get_online_fragments_key(PublishedContent(content_pk=self.tuto.pk, sha_public="def")))
+
+        # a publication or an unpublication invalidates the fragments, even those of the same version
+        invalidate_online_fragments(self.tuto.pk)
+        self.assertNotEqual(key, get_online_fragments_key(public))
+
+        # the fragments of an older version are never used again, even if the version was evicted from the cache
+        cache.clear()
+        self.assertNotEqual(key, get_online_fragments_key(public))
+
+    def test_render_container_texts(self):
+        chapter2 = ContainerFactory(parent=self.part1, db_object=self.tuto, intro="", conclusion="")
+        extract1 = ExtractFactory(container=self.chapter1, db_object=self.tuto, text_content="extract 1")
+        extract2 = ExtractFactory(container=chapter2, db_object=self.tuto, text_content="extract 2")
+        draft = self.tuto.load_version()
+
+        jobs = collect_render_jobs(draft)
+        # in tree order, without the empty introduction and conclusion of chapter2
+        self.assertEqual(
+            [key for key, __ in jobs],
+            [
+                render_key(draft, "introduction"),
+                render_key(self.part1, "introduction"),
+                render_key(self.chapter1, "introduction"),
+                render_key(extract1, "text"),
+                render_key(self.chapter1, "conclusion"),
+                render_key(extract2, "text"),
+                render_key(self.part1, "conclusion"),
+                render_key(draft, "conclusion"),
+            ],
+        )
+
+        def fake_render(md_input, **kwargs):
+            return f"<p>{md_input}</p>", {}, []
+
+        with patch("zds.utils.templatetags.emarkdown.render_markdown", side_effect=fake_render):
+            rendered = render_container_texts(self.tuto, draft)
+        self.assertEqual(rendered[render_key(extract1, "text")], "<p>extract 1</p>")
+        self.assertEqual(rendered[render_key(extract2, "text")], "<p>extract 2</p>")
+
+        # a single failure fails the whole publication
+        def failing_render(md_input, **kwargs):
+            if md_input == "extract 2":
+                raise requests.ConnectionError()
+            return fake_render(md_input)
+
+        with patch("zds.utils.templatetags.emarkdown.render_markdown", side_effect=failing_render):
+            with self.assertRaises(FailureDuringPublication):
+                render_container_texts(self.tuto, draft)
+
+    def test_render_manifest_incrementally(self):
+        extract1 = ExtractFactory(container=self.chapter1, db_object=self.tuto, text_content="extract 1")
+        ExtractFactory(container=self.chapter1, db_object=self.tuto, text_content="extract 2")
+        draft = self.tuto.load_version()
+        first_dir = Path(self.overridden_zds_app["content"]["repo_public_path"], "first")
+        second_dir = Path(self.overridden_zds_app["content"]["repo_public_path"], "second")
+
+        def fake_render(md_input, **kwargs):
+            return f"<p>{md_input}</p>", {"stats": {"signs": len(md_input)}}, []
+
+        with patch("zds.utils.templatetags.emarkdown.render_markdown", side_effect=fake_render) as render:
+            rendered, char_count = render_manifest_incrementally(self.tuto, first_dir, export_content(draft, True))
+            # the introductions and conclusions of the factories are identical, they are rendered only once
+            self.assertEqual(render.call_count, 3)
+        self.assertTrue(Path(first_dir, PUBLICATION_MANIFEST).is_file())
+        extracts = rendered["children"][0]["children"][0]["children"]
+        self.assertEqual([e["text"] for e in extracts], ["<p>extract 1</p>", "<p>extract 2</p>"])
+        self.assertEqual(char_count, len(draft.get_introduction()) * 6 + len("extract 1") + len("extract 2"))
+
+        # only the modified extract is rendered again
+        self.tuto.sha_draft = extract1.repo_update(extract1.title, "extract 1 modified")
+        self.tuto.save()
+        draft = self.tuto.load_version()
+        with patch("zds.utils.templatetags.emarkdown.render_markdown", side_effect=fake_render) as render:
+            rendered, new_char_count = render_manifest_incrementally(
+                self.tuto, second_dir, export_content(draft, True), first_dir
+            )
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(render.call_args.args[0], "extract 1 modified")
+        extracts = rendered["children"][0]["children"][0]["children"]
+        self.assertEqual([e["text"] for e in extracts], ["<p>extract 1 modified</p>", "<p>extract 2</p>"])
+        self.assertEqual(new_char_count, char_count + len(" modified"))
+
+        # the second publication does not depend on the first one
+        shutil.rmtree(first_dir)
+        with patch("zds.utils.templatetags.emarkdown.render_markdown", side_effect=fake_render) as render:
+            render_manifest_incrementally(self.tuto, first_dir, export_content(draft, True), second_dir)
+            self.assertEqual(render.call_count, 0)
+
+    def test_render_manifest_incrementally_failure(self):
+        ExtractFactory(container=self.chapter1, db_object=self.tuto, text_content="extract 1")
+        ExtractFactory(container=self.chapter1, db_object=self.tuto, text_content="[ref]: https://zestedesavoir.com")
+        draft = self.tuto.load_version()
+        build_dir = Path(self.overridden_zds_app["content"]["repo_public_path"], "build")
+
+        def render(md_input, **kwargs):
+            if md_input.startswith("[ref]"):
+                return "", {"stats": {"signs": 0}}, []
+            return f"<p>{md_input}</p>", {"stats": {"signs": len(md_input)}}, [{"message": "avertissement"}]
+
+        # warnings and texts rendered to nothing do not prevent the publication
+        with patch("zds.utils.templatetags.emarkdown.render_markdown", side_effect=render):
+            rendered, __ = render_manifest_incrementally(self.tuto, build_dir, export_content(draft, True))
+        extracts = rendered["children"][0]["children"][0]["children"]
+        self.assertEqual([e["text"] for e in extracts], ["<p>extract 1</p>", ""])
+
+        def failing_render(md_input, **kwargs):
+            if md_input == "extract 1":
+                return "", {}, [{"message": "Texte trop volumineux."}]
+            return render(md_input)
+
+        with patch("zds.utils.templatetags.emarkdown.render_markdown", side_effect=failing_render):
+            with self.assertRaises(FailureDuringPublication) as failure:
+                render_manifest_incrementally(self.tuto, build_dir, export_content(draft, True))
+        # the views display it
+        self.assertIn("Texte trop volumineux.", failure.exception.message)
+
+    def test_text_hash_depends_on_renderer(self):
+        text_hash = compute_text_hash(self.tuto, "texte")
+        self.assertEqual(compute_text_hash(self.tuto, "texte"), text_hash)
+        self.assertNotEqual(compute_text_hash(self.tuto, "autre texte"), text_hash)
+
+        self.tuto.js_support = not self.tuto.js_support
+        self.assertNotEqual(compute_text_hash(self.tuto, "texte"), text_hash)
+        self.tuto.js_support = not self.tuto.js_support
+
+        with patch("zds.tutorialv2.publish_container.get_renderer_version", return_value="0.0.0"):
+            self.assertNotEqual(compute_text_hash(self.tuto, "texte"), text_hash)
+
+    def test_latex_build_cache(self):
+        # the content is not published (which would need zmarkdown), only its public version is created
+        published = PublishedContent.objects.create(
+            content=self.tuto,
+            content_pk=self.tuto.pk,
+            content_public_slug=self.tuto.slug,
+            content_type=self.tuto.type,
+            sha_public=self.tuto.sha_draft,
+            publication_date=datetime.datetime.now(),
+        )
+        extra_contents_dir = Path(published.get_extra_contents_directory())
+        extra_contents_dir.mkdir(parents=True)
+        building_dir = Path(str(extra_contents_dir.parent) + "__building", "extra_contents")
+        building_dir.mkdir(parents=True)
+        base_name = str(building_dir / published.content_public_slug)
+        publicator = ZMarkdownRebberLatexPublicator(".pdf")
+
+        build_directories = []
+
+        def fake_compiler(texfile, draftmode=""):
+            build_directories.append(Path(texfile).parent)
+            Path(texfile).with_suffix(".pdf").write_text(Path(texfile).read_text())
+            return True
+
+        def publish(latex):
+            with patch("zds.tutorialv2.publication_utils.render_markdown", return_value=(latex, {}, [])), patch.object(
+                publicator, "tex_compiler", side_effect=fake_compiler
+            ) as compiler, patch.object(publicator, "make_glossary", return_value=True):
+                publicator.publish(base_name + ".md", base_name)
+            return compiler.call_count
+
+        self.assertEqual(publish("version 1"), 3)
+        # the compilation happened out of the shared directory, which was cleaned afterwards
+        self.assertNotEqual(build_directories[0], building_dir)
+        self.assertFalse(build_directories[0].exists())
+        self.assertEqual((extra_contents_dir / (published.content_public_slug + ".pdf")).read_text(), "version 1")
+
+        # the same source is not compiled again
+        (extra_contents_dir / (published.content_public_slug + ".pdf")).unlink()
+        self.assertEqual(publish("version 1"), 0)
+        self.assertEqual((extra_contents_dir / (published.content_public_slug + ".pdf")).read_text(), "version 1")
+
+        # but a modified one is
+        self.assertEqual(publish("version 2"), 3)
+        self.assertEqual((extra_contents_dir / (published.content_public_slug + ".pdf")).read_text(), "version 2")
+
+        # a cached PDF removed in the meantime (e.g. by another worker) is built again
+        cache_dir = get_latex_cache_directory(self.tuto.pk)
+        for cached_pdf in cache_dir.rglob("*"):
+            if cached_pdf.is_file():
+                cached_pdf.unlink()
+        self.assertEqual(publish("version 2"), 3)
+
+        # the cache is removed with the public version
+        self.tuto.public_version = published
+        self.tuto.save()
+        unpublish_content(self.tuto)
+        self.assertFalse(cache_dir.exists())
+
     def test_update_manifest(self):
         opts = {}
         path_manifest1 = settings.BASE_DIR / "fixtures" / "tuto" / "balise_audio" / "manifest.json"
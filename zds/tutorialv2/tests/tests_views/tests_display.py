@@ -1,4 +1,5 @@
 from copy import deepcopy
+from unittest.mock import patch
 
 from django.conf import settings
 from django.test import TestCase
@@ -10,6 +11,7 @@ from zds.tutorialv2.tests import TutorialTestMixin
 from zds.tutorialv2.tests.factories import PublishedContentFactory
 from zds.tutorialv2.tests.utils import request_validation
 from zds.tutorialv2.views.display.config import PublicActionsState, ValidationActions
+from zds.tutorialv2.views.display.content import ContentBaseView
 from zds.utils.tests.factories import LicenceFactory
 
 
@@ -145,3 +147,25 @@ class DisplayConfigTests(TutorialTestMixin, TestCase):
 
         validation_page = common_tests()
         self.assertNotContains(validation_page, self.TEXT_SECOND_MODIFICATION)
+
+    def test_forms_are_built_when_displayed(self):
+        built_forms = []
+        get_forms = ContentBaseView.get_forms
+
+        def recording_get_forms(view, validation):
+            return {
+                name: (lambda name=name, build=build: built_forms.append(name) or build())
+                for name, build in get_forms(view, validation).items()
+            }
+
+        with patch.object(ContentBaseView, "get_forms", recording_get_forms):
+            self.client.logout()
+            response = self.client.get(self.article.get_absolute_url_online())
+            self.assertEqual(200, response.status_code)
+            self.assertEqual([], built_forms)
+
+            self.client.force_login(self.user_author)
+            response = self.client.get(self.article.get_absolute_url_online())
+            self.assertEqual(200, response.status_code)
+            self.assertIn("form_edit_tags", built_forms)
+            self.assertNotIn("form_pick", built_forms)  # only displayed to the staff
@@ -1,8 +1,12 @@
 from collections import OrderedDict, namedtuple
 import os
+import posixpath
 import logging
+from pathlib import Path
+from uuid import uuid4
 from urllib.parse import urlsplit, urlunsplit, quote
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.http import Http404
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -707,28 +711,65 @@ def get_blob(tree, path):
 
     :param tree: Git Tree object
     :type tree: git.objects.tree.Tree
-    :param path: Path to file
+    :param path: Path to file, relative to the tree
     :type path: str
-    :return: contains
-    :rtype: bytearray
+    :return: contains, or ``None`` if there is no such file
+    :rtype: str
     """
-    # get all extracts
-    for blob in tree.blobs:
-        try:
-            if os.path.abspath(blob.path) == os.path.abspath(path):
-                data = blob.data_stream.read().decode()
-                return data
-        except OSError:  # in case of deleted files, or the system cannot get the lock, juste return ""
-            return ""
-    # traverse directories when we are at root or in a part or chapter
-    if len(tree.trees) > 0:
-        for subtree in tree.trees:
-            result = get_blob(subtree, path)
-            if result is not None:
-                return result
+    try:
+        blob = tree / posixpath.normpath(path)
+    except KeyError:
         return None
-    else:
+    if blob.type != "blob":
         return None
+    try:
+        return blob.data_stream.read().decode()
+    except OSError:  # in case of deleted files, or the system cannot get the lock, juste return ""
+        return ""
+
+
+def _online_fragments_version_cache_key(content_pk):
+    return f"content_online_fragments_{content_pk}"
+
+
+def get_online_fragments_key(public_object, container=None):
+    """Get the key of the cached fragments of an online page of a content (its rendered text, summary,
+    breadcrumbs and pager, which are the same for all the readers).
+
+    :param public_object: the published content
+    :type public_object: zds.tutorialv2.models.database.PublishedContent
+    :param container: the displayed container, if it is not the content itself
+    :return: a key which changes with the public version of the content and after each publication
+    :rtype: str
+    """
+    version_key = _online_fragments_version_cache_key(public_object.content_pk)
+    version = cache.get(version_key)
+    if version is None:
+        # never start again from an older version, whose fragments could still be in the cache
+        cache.add(version_key, uuid4().hex, timeout=None)
+        version = cache.get(version_key)
+    path = container.get_path(relative=True) if container is not None else ""
+    return f"{public_object.content_pk}:{public_object.sha_public}:{version}:{path}"
+
+
+def invalidate_online_fragments(content_pk):
+    """Forget the cached fragments of the online pages of a content, once it is published or unpublished.
+
+    :param content_pk: pk of the content
+    :type content_pk: int
+    """
+    cache.set(_online_fragments_version_cache_key(content_pk), uuid4().hex, timeout=None)
+
+
+def get_latex_cache_directory(content_pk):
+    """Directory where the PDF built for a content are kept between its publications, to be removed once it
+    is unpublished or deleted.
+
+    :param content_pk: pk of the content
+    :type content_pk: int
+    :rtype: pathlib.Path
+    """
+    return Path(settings.ZDS_APP["content"]["latex_cache_dir"], str(content_pk))
 
 
 class BadArchiveError(Exception):
@@ -66,7 +66,7 @@ class DownloadContent(LoginRequiredMixin, SingleContentDownloadViewMixin):
         path = self.object.get_repo_path()
         zip_path = path + self.get_filename()
         zip_file = zipfile.ZipFile(zip_path, "w")
-        self.insert_into_zip(zip_file, versioned.repository.commit(versioned.current_version).tree)
+        self.insert_into_zip(zip_file, versioned.get_tree())
         zip_file.close()
 
         # return content
@@ -1,12 +1,13 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import Http404
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from django.utils.translation import gettext_lazy as _
 
 from zds.tutorialv2.forms import WarnTypoForm
 from zds.tutorialv2.mixins import SingleContentDetailViewMixin, SingleOnlineContentDetailViewMixin
 from zds.tutorialv2.models.database import PublishableContent
-from zds.tutorialv2.utils import search_container_or_404, get_target_tagged_tree
+from zds.tutorialv2.utils import search_container_or_404, get_target_tagged_tree, get_online_fragments_key
 from zds.tutorialv2.views.display.config import (
     ConfigForContainerDraftView,
     ConfigForOnlineView,
@@ -72,7 +73,8 @@ class ContainerBaseView(SingleContentDetailViewMixin):
         context = super().get_context_data(**kwargs)
         context["base_url"] = self.get_base_url()
         container = search_container_or_404(self.versioned_object, self.kwargs)
-        context["breadcrumb_items"] = self.get_breadcrumbs(container)
+        # the breadcrumbs and the pager are not computed if the template reads them from the cache
+        context["breadcrumb_items"] = SimpleLazyObject(lambda: list(self.get_breadcrumbs(container)))
         context["containers_target"] = get_target_tagged_tree(container, self.versioned_object)
         context["form_warn_typo"] = WarnTypoForm(
             self.versioned_object,
@@ -82,7 +84,7 @@ class ContainerBaseView(SingleContentDetailViewMixin):
         )
         context["container"] = container
         context["pm_link"] = self.object.get_absolute_contact_url(_("À propos de"))
-        context["pager"] = self.get_pager(container)
+        context["pager"] = SimpleLazyObject(lambda: self.get_pager(container))
         context["is_js"] = self.object.js_support
         return context
 
@@ -153,6 +155,7 @@ class ContainerOnlineView(SingleOnlineContentDetailViewMixin, ContainerBaseView)
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["display_config"] = ConfigForOnlineView(self.request.user, self.object, self.versioned_object)
+        context["online_fragments_key"] = get_online_fragments_key(self.public_content_object, context["container"])
         return context
 
     def get_base_url(self):
@@ -5,6 +5,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import F
 from django.http import Http404
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from django.utils.translation import gettext_lazy as _
 
 from zds.featured.mixins import FeatureableMixin
@@ -38,7 +39,7 @@ from zds.tutorialv2.models.database import (
     PublishedContent,
     ContentReaction,
 )
-from zds.tutorialv2.utils import last_participation_is_old, mark_read
+from zds.tutorialv2.utils import last_participation_is_old, mark_read, get_online_fragments_key
 from zds.tutorialv2.views.contents import EditTitleForm, EditSubtitleForm
 from zds.tutorialv2.views.thumbnail import EditThumbnailForm
 from zds.tutorialv2.views.display.config import (
@@ -51,7 +52,7 @@ from zds.tutorialv2.views.display.config import (
 from zds.tutorialv2.views.goals import EditGoalsForm
 from zds.tutorialv2.views.labels import EditLabelsForm
 from zds.utils.models import CommentVote
-from zds.utils.paginator import make_pagination
+from zds.utils.paginator import make_pagination, KeysetPaginator
 
 
 logger = logging.getLogger(__name__)
@@ -67,60 +68,61 @@ class ContentBaseView(SingleContentDetailViewMixin):
         context["gallery"] = self.object.gallery
         context["public_content_object"] = self.public_content_object
         context = self.add_contributions_context(context)
-        context = self.add_suggestions_context(context)
+        context["content_suggestions"] = ContentSuggestion.objects.filter(publication=self.object)
         context["pm_link"] = self.object.get_absolute_contact_url(_("À propos de"))
-        versioned = self.versioned_object
-
-        data_form_ask_validation = {"source": self.object.source, "version": self.sha}
-        context["form_ask_validation"] = AskValidationForm(content=versioned, initial=data_form_ask_validation)
-
-        validation = self.object.get_validation()
-        context["validation"] = validation
-
-        if validation:
-            context["form_valid"] = AcceptValidationForm(validation, initial={"source": self.object.source})
-            context["form_reject"] = RejectValidationForm(validation)
-            context["form_cancel_validation"] = CancelValidationForm(validation)
-
-        data_form_revoke = {"version": versioned.sha_public}
-        context["form_revoke"] = RevokeValidationForm(versioned, initial=data_form_revoke)
-
-        data_form_unpublication = data_form_revoke
-        context["form_unpublication"] = UnpublicationForm(versioned, initial=data_form_unpublication)
-
-        context["form_warn_typo"] = WarnTypoForm(versioned, versioned, public=False)
-        context["form_jsfiddle"] = JsFiddleActivationForm(initial={"js_support": self.object.js_support})
-        context["form_edit_license"] = EditContentLicenseForm(versioned)
-
-        context["form_publication"] = PublicationForm(versioned, initial={"source": self.object.source})
-        context["gallery"] = self.object.gallery
+        context["validation"] = self.object.get_validation()
         context["alerts"] = self.object.alerts_on_this_content.all()
-        data_form_pick = data_form_revoke
-        context["form_pick"] = PickOpinionForm(self.versioned_object, initial=data_form_pick)
-        data_form_unpick = data_form_revoke
-        context["form_unpick"] = UnpickOpinionForm(self.versioned_object, initial=data_form_unpick)
-        data_form_convert = data_form_revoke
-        context["form_convert"] = PromoteOpinionToArticleForm(self.versioned_object, initial=data_form_convert)
-        context["form_warn_typo"] = WarnTypoForm(self.versioned_object, self.versioned_object)
-        context["form_edit_tags"] = EditTagsForm(self.versioned_object, self.object)
-        context["form_edit_canonical_link"] = EditCanonicalLinkForm(self.object)
-        context["form_edit_goals"] = EditGoalsForm(self.object)
-        context["form_edit_labels"] = EditLabelsForm(self.object)
         context["is_antispam"] = self.object.antispam(self.request.user)
+
+        # the forms are only built if the template displays them, which is never the case for anonymous readers
+        for name, build_form in self.get_forms(context["validation"]).items():
+            context[name] = SimpleLazyObject(build_form)
         return context
 
-    def add_suggestions_context(self, context):
-        content_suggestions = ContentSuggestion.objects.filter(publication=self.object)
-        context["content_suggestions"] = content_suggestions.all()
-        excluded_for_search = [str(x.suggestion.pk) for x in content_suggestions]
+    def get_forms(self, validation):
+        """Get the forms of the actions on the content.
+
+        :param validation: the current validation of the content, if any
+        :return: a function building the form, for each name of a form in the context
+        :rtype: dict
+        """
+        versioned = self.versioned_object
+        data_form_revoke = {"version": versioned.sha_public}
+        forms = {
+            "form_add_suggestion": self.build_add_suggestion_form,
+            "form_add_contributor": lambda: ContributionForm(content=self.object),
+            "form_ask_validation": lambda: AskValidationForm(
+                content=versioned, initial={"source": self.object.source, "version": self.sha}
+            ),
+            "form_revoke": lambda: RevokeValidationForm(versioned, initial=data_form_revoke),
+            "form_unpublication": lambda: UnpublicationForm(versioned, initial=data_form_revoke),
+            "form_jsfiddle": lambda: JsFiddleActivationForm(initial={"js_support": self.object.js_support}),
+            "form_edit_license": lambda: EditContentLicenseForm(versioned),
+            "form_publication": lambda: PublicationForm(versioned, initial={"source": self.object.source}),
+            "form_pick": lambda: PickOpinionForm(versioned, initial=data_form_revoke),
+            "form_unpick": lambda: UnpickOpinionForm(versioned, initial=data_form_revoke),
+            "form_convert": lambda: PromoteOpinionToArticleForm(versioned, initial=data_form_revoke),
+            "form_warn_typo": lambda: WarnTypoForm(versioned, versioned),
+            "form_edit_tags": lambda: EditTagsForm(versioned, self.object),
+            "form_edit_canonical_link": lambda: EditCanonicalLinkForm(self.object),
+            "form_edit_goals": lambda: EditGoalsForm(self.object),
+            "form_edit_labels": lambda: EditLabelsForm(self.object),
+        }
+        if validation:
+            forms["form_valid"] = lambda: AcceptValidationForm(validation, initial={"source": self.object.source})
+            forms["form_reject"] = lambda: RejectValidationForm(validation)
+            forms["form_cancel_validation"] = lambda: CancelValidationForm(validation)
+        return forms
+
+    def build_add_suggestion_form(self):
+        excluded_for_search = [
+            str(pk)
+            for pk in ContentSuggestion.objects.filter(publication=self.object).values_list("suggestion", flat=True)
+        ]
         excluded_for_search.append(str(self.object.pk))
-        context["form_add_suggestion"] = SearchSuggestionForm(
-            content=self.object, initial={"excluded_pk": ",".join(excluded_for_search)}
-        )
-        return context
+        return SearchSuggestionForm(content=self.object, initial={"excluded_pk": ",".join(excluded_for_search)})
 
     def add_contributions_context(self, context):
-        context["form_add_contributor"] = ContributionForm(content=self.object)
         context["contributions"] = (
             ContentContribution.objects.filter(content=self.object)
             .select_related("user")
@@ -138,11 +140,15 @@ class ContentDraftView(LoginRequiredMixin, ContentBaseView):
     model = PublishableContent
     must_be_author = False
 
+    def get_forms(self, validation):
+        forms = super().get_forms(validation)
+        forms["form_edit_title"] = lambda: EditTitleForm(self.versioned_object)
+        forms["form_edit_subtitle"] = lambda: EditSubtitleForm(self.versioned_object)
+        forms["form_edit_thumbnail"] = lambda: EditThumbnailForm(self.versioned_object)
+        return forms
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["form_edit_title"] = EditTitleForm(self.versioned_object)
-        context["form_edit_subtitle"] = EditSubtitleForm(self.versioned_object)
-        context["form_edit_thumbnail"] = EditThumbnailForm(self.versioned_object)
         context["display_config"] = ConfigForContentDraftView(self.request.user, self.object, self.versioned_object)
         return context
 
@@ -188,27 +194,33 @@ class ContentOnlineView(FeatureableMixin, SingleOnlineContentDetailViewMixin, Co
             self.object, count=settings.ZDS_APP["content"]["suggestions_per_page"]
         )
 
+        # the reactions are counted by the content and only those of the page are loaded
         comments = self.get_comments()
-
+        notes_per_page = settings.ZDS_APP["content"]["notes_per_page"]
         make_pagination(
             context,
             self.request,
             comments,
-            settings.ZDS_APP["content"]["notes_per_page"],
+            notes_per_page,
             context_list_name="reactions",
             with_previous_item=True,
+            paginator=KeysetPaginator(comments, notes_per_page, self.object.reaction_count),
         )
 
         # optimize requests:
-        votes = CommentVote.objects.filter(user_id=self.request.user.id, comment__in=comments).all()
+        reactions = context["reactions"]
+        votes = CommentVote.objects.filter(user_id=self.request.user.id, comment__in=reactions).all()
         context["user_like"] = [vote.comment_id for vote in votes if vote.positive]
         context["user_dislike"] = [vote.comment_id for vote in votes if not vote.positive]
 
         if self.request.user.has_perm("tutorialv2.change_contentreaction"):
-            context["user_can_modify"] = [reaction.pk for reaction in comments]
+            context["user_can_modify"] = [reaction.pk for reaction in reactions]
         else:
-            context["user_can_modify"] = [reaction.pk for reaction in comments if reaction.author == self.request.user]
+            context["user_can_modify"] = [
+                reaction.pk for reaction in reactions if reaction.author_id == self.request.user.pk
+            ]
 
+        context["online_fragments_key"] = get_online_fragments_key(self.public_content_object)
         context["subscriber_count"] = ContentReactionAnswerSubscription.objects.get_subscriptions(self.object).count()
         context["reading_time"] = self.get_reading_time()
 
@@ -241,7 +253,7 @@ class ContentOnlineView(FeatureableMixin, SingleOnlineContentDetailViewMixin, Co
             logger.warning("could not compute reading time: setting characters_per_minute is set to zero (error=%s)", e)
 
     def get_comments(self):
-        return list(
+        return (
             ContentReaction.objects.select_related("author")
             .select_related("author__profile")
             .select_related("hat")
@@ -249,7 +261,7 @@ class ContentOnlineView(FeatureableMixin, SingleOnlineContentDetailViewMixin, Co
             .prefetch_related("alerts_on_this_comment")
             .prefetch_related("alerts_on_this_comment__author")
             .filter(related_content__pk=self.object.pk)
-            .order_by("pubdate")
+            .order_by("pubdate", "pk")
         )
 
     def add_pager_context(self, context):
@@ -1,6 +1,7 @@
-from copy import deepcopy
+from collections.abc import Mapping
 
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 
 from zds import __version__, git_version
 
@@ -34,21 +35,54 @@ def version(request):
 
 
 def header_notifications(request):
+    """
+    A context processor with the notifications and alerts of the header, computed only if a template uses them (so not
+    for API responses or partial templates).
+    """
     user = request.user
-    results = get_header_notifications(user)
-    if results is None:
+    if not user.is_authenticated:
         # Unauthorized
         return {}
+
+    results = SimpleLazyObject(lambda: get_header_notifications(user))
     # Prefix every key with `header_`
-    return {"header_" + k: v for k, v in results.items()}
+    return {
+        "header_" + key: SimpleLazyObject(lambda key=key: results[key])
+        for key in ("general_notifications", "private_topic_notifications", "alerts")
+    }
+
+
+class ReadOnlySettings(Mapping):
+    """
+    A read-only view of a dictionary of settings: nested dictionaries are wrapped when accessed, and lists are given
+    as tuples, so templates cannot alter the settings.
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._wrap(self._data[key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    @classmethod
+    def _wrap(cls, value):
+        if isinstance(value, dict):
+            return cls(value)
+        if isinstance(value, list):
+            return tuple(cls._wrap(item) for item in value)
+        return value
 
 
 def app_settings(request):
     """
     A context processor with all APP settings.
     """
-    app = deepcopy(settings.ZDS_APP)
-
     return {
-        "app": app,
+        "app": ReadOnlySettings(settings.ZDS_APP),
     }
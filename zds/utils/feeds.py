@@ -1,6 +1,14 @@
+import hashlib
 import re
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import QuerySet
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
 from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date, quote_etag
 from django.utils.xmlutils import SimplerXMLGenerator
 
 
@@ -32,3 +40,54 @@ class DropControlCharsAtom1Feed(Atom1Feed):
         self.add_root_elements(handler)
         self.write_items(handler)
         handler.endElement("feed")
+
+
+class CachedFeedMixin:
+    """
+    Mixin for the feeds (to put before ``Feed``), which caches their rendering and answers the conditional requests.
+
+    The key of the rendered feed is made of the feed class, the query string and the date of the latest item, so that
+    a new item gives a new feed. The ``ETag`` and ``Last-Modified`` headers are derived from the same key, so that the
+    aggregators get a 304 response without rendering anything while there is no new item. The edition of an existing
+    item is only seen when the cache expires (``ZDS_APP["site"]["feed_cache_timeout"]``).
+    """
+
+    # field of the items giving their date, by which ``items()`` is ordered
+    latest_item_field = "pubdate"
+
+    def latest_item_date(self, obj):
+        """
+        :return: the date of the latest item of the feed, with one query.
+        """
+        items = self._get_dynamic_attr("items", obj)
+        if isinstance(items, QuerySet):
+            return items.prefetch_related(None).values_list(self.latest_item_field, flat=True).first()
+        return max((getattr(item, self.latest_item_field) for item in items), default=None)
+
+    def __call__(self, request, *args, **kwargs):
+        try:
+            obj = self.get_object(request, *args, **kwargs)
+        except ObjectDoesNotExist:
+            raise Http404("Feed object does not exist.")
+
+        latest_date = self.latest_item_date(obj)
+        key = "{}:{}:{}".format(
+            type(self).__name__, request.GET.urlencode(), latest_date.isoformat() if latest_date else ""
+        )
+        cache_key = "feed_" + hashlib.sha1(key.encode()).hexdigest()
+        etag = quote_etag(cache_key)
+        last_modified = int(latest_date.timestamp()) if latest_date else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            rendered = cache.get(cache_key)
+            if rendered is None:
+                feed_response = super().__call__(request, *args, **kwargs)
+                rendered = (feed_response.content, feed_response["Content-Type"])
+                cache.set(cache_key, rendered, timeout=settings.ZDS_APP["site"]["feed_cache_timeout"])
+            response = HttpResponse(rendered[0], content_type=rendered[1])
+
+        response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified)
+        return response
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 
 from zds.forum.models import Post
@@ -7,6 +9,26 @@ from zds.notification.models import Notification
 from zds.tutorialv2.models.database import ContentReaction, PublishableContent
 from zds.utils.models import Alert
 
+ALERTS_CACHE_KEY = "header_notifications_alerts"
+
+
+def _notifications_cache_key(user_pk):
+    return f"header_notifications_user_{user_pk}"
+
+
+def invalidate_header_notifications(*user_pks):
+    """Drop the cached header notifications of some users (to be called each time one of their notifications is \
+    created, read or deleted).
+    """
+    cache.delete_many([_notifications_cache_key(pk) for pk in user_pks])
+
+
+def invalidate_header_alerts():
+    """Drop the cached alerts block shared by the moderators (to be called each time an alert is created, edited or \
+    solved).
+    """
+    cache.delete(ALERTS_CACHE_KEY)
+
 
 def _notifications_to_list(notifications_query):
     query = notifications_query.select_related("sender__profile").order_by("-pubdate")[:10]
@@ -44,9 +66,12 @@ def _alerts_to_list(alerts_query):
     return [_alert_to_dict(a) for a in query]
 
 
-def get_header_notifications(user):
-    if not user.is_authenticated:
-        return None
+def _get_user_notifications(user):
+    cache_key = _notifications_cache_key(user.pk)
+    cached = cache.get(cache_key)
+    # the primary key of a deleted user may be reused, so check that the cached summary is the one of this user
+    if cached is not None and cached["date_joined"] == user.date_joined:
+        return cached
 
     private_topic = ContentType.objects.get_for_model(PrivateTopic)
 
@@ -56,9 +81,8 @@ def get_header_notifications(user):
 
     private_notifications = notifications.filter(subscription__content_type=private_topic)
 
-    alerts = Alert.objects.filter(solved=False)
-
-    return {
+    summary = {
+        "date_joined": user.date_joined,
         "general_notifications": {
             "total": general_notifications.count(),
             "list": _notifications_to_list(general_notifications),
@@ -67,9 +91,31 @@ def get_header_notifications(user):
             "total": private_notifications.count(),
             "list": _notifications_to_list(private_notifications),
         },
-        "alerts": user.has_perm("forum.change_post")
-        and {
+    }
+    cache.set(cache_key, summary, settings.ZDS_APP["notification"]["header_cache_timeout"])
+    return summary
+
+
+def _get_alerts():
+    alerts_summary = cache.get(ALERTS_CACHE_KEY)
+    if alerts_summary is None:
+        alerts = Alert.objects.filter(solved=False)
+        alerts_summary = {
             "total": alerts.count(),
             "list": _alerts_to_list(alerts),
-        },
+        }
+        cache.set(ALERTS_CACHE_KEY, alerts_summary, settings.ZDS_APP["notification"]["header_cache_timeout"])
+    return alerts_summary
+
+
+def get_header_notifications(user):
+    if not user.is_authenticated:
+        return None
+
+    notifications = _get_user_notifications(user)
+
+    return {
+        "general_notifications": notifications["general_notifications"],
+        "private_topic_notifications": notifications["private_topic_notifications"],
+        "alerts": user.has_perm("forum.change_post") and _get_alerts(),
     }
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from zds.utils.models import Comment
+from zds.utils.templatetags.emarkdown import render_markdown
+
+
+class Command(BaseCommand):
+    help = "Store the rendering metadata (pings...) of the comments written before they were stored"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="maximum number of comments processed")
+
+    def handle(self, *args, **options):
+        comments = Comment.objects.filter(text_metadata__isnull=True).order_by("pk").values_list("pk", "text")
+        if options["limit"] is not None:
+            comments = comments[: options["limit"]]
+
+        count = failed = 0
+        for pk, text in comments.iterator():
+            html, metadata, messages = render_markdown(text) if text else ("", {}, [])
+            if text and (not html or messages):
+                # left empty, to be rendered again later
+                failed += 1
+                continue
+            # an update query, to leave the rest of the comment (and its edition date) untouched
+            Comment.objects.filter(pk=pk).update(text_metadata=metadata or {})
+            count += 1
+            if count % 100 == 0:
+                self.stdout.write(f"\r{count} comments", ending="")
+        self.stdout.write(self.style.SUCCESS(f"\rMetadata of {count} comments stored"))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} comments could not be rendered, run the command again"))
@@ -0,0 +1,135 @@
+"""
+Content-addressed cache for the results of the zmarkdown server.
+
+A rendering only depends on the markdown input, the output format and the
+options sent to the server, so its result is stored under a hash of these
+three values. The cache has two tiers:
+
+- a small in-process LRU, which avoids any network round-trip for the texts
+  rendered over and over by the same worker (signatures, quotes...);
+- the default Django cache, shared between all the workers.
+
+Only successful renderings are stored, and each output format has its own
+timeout (a timeout of ``0`` disables the cache for this format).
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "zmd-render"
+
+
+class LocalLRUCache:
+    """A thread-safe, size-bounded LRU mapping whose entries expire after a given timeout."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout, max_entries):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_cache = LocalLRUCache()
+
+
+def _get_config():
+    return settings.ZDS_APP["zmd"].get("cache", {})
+
+
+def get_timeout(output_format):
+    """Return the timeout (in seconds) of the given output format, ``0`` if it must not be cached."""
+    config = _get_config()
+    if not config.get("enabled", False):
+        return 0
+    return config.get("timeouts", {}).get(output_format, 0)
+
+
+def make_key(md_input, output_format, opts):
+    """Compute the cache key of a rendering.
+
+    :param md_input: the markdown text, or the manifest for a full content rendering
+    :param output_format: one of the formats of ``emarkdown.FORMAT_ENDPOINTS``
+    :param opts: the options sent to the zmarkdown server
+    :return: the cache key, or ``None`` if this rendering must not be cached
+    :rtype: str
+    """
+    if get_timeout(output_format) <= 0:
+        return None
+    if "images_download_dir" in opts:
+        # images are downloaded by zmarkdown as a side effect of the rendering, which must not be skipped
+        return None
+    payload = json.dumps([md_input, output_format, opts], sort_keys=True, default=str)
+    return "{}:{}".format(KEY_PREFIX, hashlib.sha256(payload.encode("utf-8")).hexdigest())
+
+
+def get_rendering(key):
+    """Return the cached ``(content, metadata, messages)`` tuple for this key, or ``None``."""
+    if key is None:
+        return None
+    result = local_cache.get(key)
+    if result is None:
+        result = cache.get(key)
+        if result is None:
+            return None
+        output_format = result[3]
+        local_cache.set(key, result, get_timeout(output_format), _get_config().get("local_max_entries", 0))
+    content, metadata, messages, __ = result
+    # metadata may be altered by the caller, never give away the cached objects
+    return content, copy.deepcopy(metadata), copy.deepcopy(messages)
+
+
+def store_rendering(key, output_format, content, metadata, messages):
+    """Store a successful rendering. Renderings with error messages or too big to be shared are ignored."""
+    if key is None or messages:
+        return
+    config = _get_config()
+    size = len(content) if isinstance(content, str) else len(json.dumps(content, default=str))
+    if size > config.get("max_entry_size", 0):
+        return
+    timeout = get_timeout(output_format)
+    result = (content, copy.deepcopy(metadata), [], output_format)
+    local_cache.set(key, result, timeout, config.get("local_max_entries", 0))
+    try:
+        cache.set(key, result, timeout)
+    except Exception:  # noqa
+        # the local tier is still filled, a failing shared cache must never prevent the rendering
+        logger.exception("Unable to store the markdown rendering in the shared cache")
+
+
+def clear_local():
+    """Empty the in-process tier (the shared tier is handled by the ``clear_cache`` command)."""
+    local_cache.clear()
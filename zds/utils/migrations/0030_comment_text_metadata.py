@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("utils", "0029_normalize_alert_scopes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="text_metadata",
+            field=models.JSONField(blank=True, default=None, null=True, verbose_name="Métadonnées du texte"),
+        ),
+    ]
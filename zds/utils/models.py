@@ -393,6 +393,8 @@ class Comment(models.Model):
 
     text = models.TextField("Texte")
     text_html = models.TextField("Texte en Html")
+    # metadata returned by the rendering of `text` (the pings, for instance), `None` if unknown
+    text_metadata = models.JSONField("Métadonnées du texte", null=True, blank=True, default=None)
 
     like = models.IntegerField("Likes", default=0)
     dislike = models.IntegerField("Dislikes", default=0)
@@ -430,17 +432,29 @@ class Comment(models.Model):
         if not hasattr(self, "old_text"):
             self.old_text = self.text
 
-        _, old_metadata, _ = render_markdown(self.text)
-        html, new_metadata, _ = render_markdown(text, on_error=on_error)
-
         # These attributes will be used by `_save_compute_pings` to create notifications if needed.
         # For the same reason as `old_text`, we only update `old_metadata` if not already set.
         if not hasattr(self, "old_metadata"):
-            self.old_metadata = old_metadata
+            self.old_metadata = self.get_text_metadata()
+        html, new_metadata, messages = render_markdown(text, on_error=on_error)
         self.new_metadata = new_metadata
 
         self.text = text
         self.text_html = html
+        # the metadata of a failed rendering are not stored, so that ``get_text_metadata`` renders the text again
+        self.text_metadata = new_metadata if (html and not messages) or not text else None
+
+    def get_text_metadata(self):
+        """
+        Returns the metadata of the current text. They are stored when the text is rendered, so the text is only
+        rendered again for the comments written before they were (see the ``backfill_comments_metadata`` command).
+        """
+        if self.text_metadata is not None:
+            return self.text_metadata
+        if not self.text:
+            return {}
+        _, metadata, _ = render_markdown(self.text)
+        return metadata
 
     def save(self, *args, **kwargs):
         """
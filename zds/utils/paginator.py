@@ -1,4 +1,6 @@
 from django.conf import settings
+from django.db.models import Q
+from django.utils.functional import cached_property
 from django.views.generic import ListView
 from django.views.generic.list import MultipleObjectMixin
 from django.core.paginator import Paginator, EmptyPage
@@ -44,19 +46,97 @@ class ZdSPagingListView(ListView):
         For some list paginated, we would like to display the last item of the previous page.
         This function returns the list paginated with this previous item.
         """
-        original_list = queryset.all()
         items_list = []
         # If necessary, add the last item in the previous page.
-        if self.page.number != 1:
-            last_page = self.paginator.page(self.page.number - 1).object_list
-            last_item = last_page[len(last_page) - 1]
-            items_list.append(last_item)
+        if isinstance(self.paginator, (PositionPaginator, KeysetPaginator)):
+            if self.page.previous_item is not None:
+                items_list.append(self.page.previous_item)
+        elif self.page.number != 1:
+            items_list.append(self.paginator.object_list[self.page.start_index() - 2])
         # Adds all items of the list paginated.
-        for item in original_list:  # TODO: refacto
-            items_list.append(item)
+        items_list.extend(queryset)
         return items_list
 
 
+class PositionPaginator(Paginator):
+    """
+    Paginator for the messages of a thread, numbered from 1 by a position field: the page ``n`` holds the messages
+    whose position is in ``](n - 1) * per_page, n * per_page]``, as in the URLs of the messages.
+
+    Unlike ``Paginator``, it does not count the messages (the position of the last one is given) and it selects a range
+    of positions instead of using an ``OFFSET``, so that the last pages of a long thread are as fast to display as the
+    first one. The last message of the previous page is loaded by the same query, in ``page.previous_item``.
+    """
+
+    def __init__(self, object_list, per_page, last_position, position_field="position", allow_empty_first_page=True):
+        super().__init__(object_list, per_page, allow_empty_first_page=allow_empty_first_page)
+        self.last_position = last_position
+        self.position_field = position_field
+
+    @cached_property
+    def count(self):
+        return self.last_position
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        lowest = bottom - 1 if number > 1 else bottom
+        items = list(
+            self.object_list.filter(**{f"{self.position_field}__gt": lowest, f"{self.position_field}__lte": top})
+        )
+        previous_item = None
+        if items and getattr(items[0], self.position_field) <= bottom:
+            previous_item = items.pop(0)
+        page = self._get_page(items, number, self)
+        page.previous_item = previous_item
+        return page
+
+
+class KeysetPaginator(Paginator):
+    """
+    Paginator for the messages of a thread ordered by date (then by primary key, for messages of the same date), whose
+    number is given instead of counted.
+
+    The pages are still found by their number, but the ``OFFSET`` only reads the keys of the messages: the messages of
+    the page are then selected from the key of the first one, so that the joins and prefetches of ``object_list`` are
+    only done for the messages of the page. The last message of the previous page is loaded by the same query, in
+    ``page.previous_item``.
+    """
+
+    def __init__(self, object_list, per_page, count, date_field="pubdate", allow_empty_first_page=True):
+        super().__init__(
+            object_list.order_by(date_field, "pk"), per_page, allow_empty_first_page=allow_empty_first_page
+        )
+        self.known_count = count
+        self.date_field = date_field
+
+    @cached_property
+    def count(self):
+        return self.known_count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        previous_item = None
+        if number == 1:
+            items = list(self.object_list[: self.per_page])
+        else:
+            items = []
+            # key of the last message of the previous page
+            previous_index = (number - 1) * self.per_page - 1
+            keys = self.object_list.prefetch_related(None).values_list(self.date_field, "pk")
+            previous_key = keys[previous_index : previous_index + 1]
+            if previous_key:
+                date, pk = previous_key[0]
+                after_previous = Q(**{f"{self.date_field}__gt": date}) | Q(**{self.date_field: date, "pk__gte": pk})
+                items = list(self.object_list.filter(after_previous)[: self.per_page + 1])
+            if items:
+                previous_item = items.pop(0)
+        page = self._get_page(items, number, self)
+        page.previous_item = previous_item
+        return page
+
+
 def paginator_range(current, stop, start=1):
     assert current <= stop
 
@@ -89,7 +169,13 @@ def paginator_range(current, stop, start=1):
 
 
 def make_pagination(
-    context, request, queryset_objs, page_size, context_list_name="object_list", with_previous_item=False
+    context,
+    request,
+    queryset_objs,
+    page_size,
+    context_list_name="object_list",
+    with_previous_item=False,
+    paginator=None,
 ):
     """This function will fill the context to use it for the paginator template, usefull if you cannot use
     `ZdSPagingListView`.
@@ -106,9 +192,11 @@ def make_pagination(
     :param page_size: number of objects in a pages (last one from previous page not included!)
     :param context_list_name: control the name of the list object in the context
     :param with_previous_item: if `True`, will include the last object of the previous page to the list of shown objects
+    :param paginator: paginator of `queryset_objs` to use instead of a `Paginator` (which counts them)
     """
 
-    paginator = Paginator(queryset_objs, page_size)
+    if paginator is None:
+        paginator = Paginator(queryset_objs, page_size)
 
     # retrieve page number
     if "page" in request.GET and request.GET["page"].isdigit():
@@ -124,14 +212,12 @@ def make_pagination(
 
     page_objects_list = page_obj.object_list
 
-    if page_number != 1 and with_previous_item:
-        new_list = []
-        last_page = paginator.page(page_obj.number - 1).object_list
-        last_item = last_page[len(last_page) - 1]
-        new_list.append(last_item)
-        for item in page_objects_list:
-            new_list.append(item)
-        page_objects_list = new_list
+    if with_previous_item and isinstance(paginator, (PositionPaginator, KeysetPaginator)):
+        if page_obj.previous_item is not None:
+            page_objects_list = [page_obj.previous_item, *page_objects_list]
+    elif page_number != 1 and with_previous_item:
+        # only the last item of the previous page is loaded
+        page_objects_list = [queryset_objs[page_obj.start_index() - 2], *page_objects_list]
 
     # fill context
     context["paginator"] = paginator
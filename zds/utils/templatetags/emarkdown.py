@@ -1,7 +1,7 @@
 import re
 import json
 import logging
-from requests import post, HTTPError
+from requests import HTTPError
 
 from django import template
 from django.conf import settings
@@ -9,6 +9,9 @@ from django.template.defaultfilters import stringfilter
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
+from zds.utils import markdown_cache
+from zds.utils.zmarkdown_client import get_zmarkdown_client
+
 logger = logging.getLogger(__name__)
 register = template.Library()
 """
@@ -30,6 +33,7 @@ FORMAT_ENDPOINTS = {
 def _render_markdown_once(md_input, *, output_format="html", **kwargs):
     """
     Returns None on error (error details are logged). No retry mechanism.
+    Successful renderings are cached, see ``zds.utils.markdown_cache``.
     """
 
     def log_args():
@@ -44,6 +48,11 @@ def _render_markdown_once(md_input, *, output_format="html", **kwargs):
 
     endpoint = FORMAT_ENDPOINTS[output_format]
 
+    cache_key = markdown_cache.make_key(md_input, output_format, dict(kwargs, full_json=full_json))
+    cached = markdown_cache.get_rendering(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         timeout = 10
         real_input = str(md_input)
@@ -52,9 +61,9 @@ def _render_markdown_once(md_input, *, output_format="html", **kwargs):
             timeout = 120
             # use manifest renderer
             real_input = md_input
-        response = post(
-            "{}{}".format(settings.ZDS_APP["zmd"]["server"], endpoint),
-            json={
+        response = get_zmarkdown_client().post(
+            endpoint,
+            {
                 "opts": kwargs,
                 "md": real_input,
             },
@@ -82,9 +91,10 @@ def _render_markdown_once(md_input, *, output_format="html", **kwargs):
             content = content.strip()
         if inline:
             content = content.replace("</p>\n", "\n\n").replace("\n<p>", "\n")
-        if full_json:
-            return content, metadata, messages
-        return mark_safe(content), metadata, messages
+        if not full_json:
+            content = mark_safe(content)
+        markdown_cache.store_rendering(cache_key, output_format, content, metadata, messages)
+        return content, metadata, messages
     except:  # noqa
         logger.exception("Unexpected exception raised")
         log_args()
@@ -132,6 +142,17 @@ def render_markdown(md_input, *, on_error=None, disable_jsfiddle=True, **kwargs)
         return mark_safe(f'<div class="error ico-after"><p>{json.dumps(messages)}</p></div>'), metadata, []
 
 
+def render_markdown_many(md_inputs, **kwargs):
+    """Render several markdown strings at once.
+
+    The renderings are sent concurrently through the pooled connections of the zmarkdown client.
+    Takes the same keyword arguments as ``render_markdown``, which are used for every string.
+
+    Returns the list of the ``(rendered_content, metadata, messages)`` tuples, in the order of ``md_inputs``.
+    """
+    return get_zmarkdown_client().map(lambda md_input: render_markdown(md_input, **kwargs), md_inputs)
+
+
 def render_markdown_stats(md_input, **kwargs):
     """
     Returns contents statistics (words and chars)
@@ -1,5 +1,9 @@
+from io import StringIO
+from unittest.mock import patch
+
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.shortcuts import get_object_or_404
 from django.test import TestCase
 from django.urls import reverse
@@ -9,11 +13,12 @@ from rest_framework.test import APIClient
 from zds.forum.tests.factories import PostFactory, create_category_and_forum, create_topic_in_forum
 from zds.member.tests.factories import ProfileFactory, StaffProfileFactory
 from zds.member.utils import get_bot_account
+from zds.notification.models import PingSubscription
 from zds.tutorialv2.tests.factories import PublishedContentFactory
 from zds.tutorialv2.models import CONTENT_TYPES
 from zds.tutorialv2.models.database import PublishableContent
 from zds.tutorialv2.tests import TutorialTestMixin
-from zds.utils.models import Alert
+from zds.utils.models import Alert, Comment
 
 
 class PotentialSpamTests(TutorialTestMixin, TestCase):
@@ -215,3 +220,59 @@ class PotentialSpamTests(TutorialTestMixin, TestCase):
         response = self.client.post(url_comment_edit, {"text": "Argh du spam (27)"})
         self.assertEqual(response.status_code, status.HTTP_302_FOUND)
         self.assertEqual(len(Alert.objects.filter(author=bot, comment=comment, text=alert_text, solved=False)), 0)
+
+
+class TextMetadataTests(TestCase):
+    def setUp(self):
+        _, forum = create_category_and_forum()
+        self.author = ProfileFactory().user
+        self.pinged = ProfileFactory().user
+        self.topic = create_topic_in_forum(forum, self.author.profile)
+        self.post = self.topic.last_message
+
+    @staticmethod
+    def __rendering(pings):
+        return "<p>texte</p>", {"ping": pings}, []
+
+    def test_only_the_new_text_is_rendered(self):
+        renderings = [self.__rendering([]), self.__rendering([self.pinged.username])]  # old text, then new one
+        with patch("zds.utils.models.render_markdown", side_effect=renderings) as render:
+            self.post.update_content(f"@{self.pinged.username}")
+            self.post.save()
+        self.assertEqual(2, render.call_count)  # the old text was rendered before its metadata were stored
+        self.assertEqual({"ping": [self.pinged.username]}, Comment.objects.get(pk=self.post.pk).text_metadata)
+        self.assertTrue(PingSubscription.objects.get(user=self.pinged).is_active)
+
+        # the second edition only renders the new text, and uses the stored pings to unping
+        post = Comment.objects.get_subclass(pk=self.post.pk)
+        with patch("zds.utils.models.render_markdown", return_value=self.__rendering([])) as render:
+            post.update_content("texte")
+            post.save()
+        render.assert_called_once_with("texte", on_error=None)
+        self.assertFalse(PingSubscription.objects.get(user=self.pinged).is_active)
+
+    def test_backfill(self):
+        Comment.objects.update(text_metadata=None)
+        with patch("zds.utils.management.commands.backfill_comments_metadata.render_markdown") as render:
+            render.return_value = self.__rendering([self.pinged.username])
+            call_command("backfill_comments_metadata", stdout=StringIO())
+        self.assertFalse(Comment.objects.filter(text_metadata__isnull=True).exists())
+        self.assertEqual({"ping": [self.pinged.username]}, Comment.objects.get(pk=self.post.pk).text_metadata)
+
+    def test_failed_rendering_is_not_stored(self):
+        with patch("zds.utils.models.render_markdown", return_value=("", {}, [])):
+            self.post.update_content("texte")
+            self.post.save()
+        self.assertIsNone(Comment.objects.get(pk=self.post.pk).text_metadata)
+
+        # it is rendered again when needed
+        post = Comment.objects.get_subclass(pk=self.post.pk)
+        with patch("zds.utils.models.render_markdown", return_value=self.__rendering([])) as render:
+            self.assertEqual({"ping": []}, post.get_text_metadata())
+        render.assert_called_once_with("texte")
+
+        # and left to the next run of the backfill
+        with patch("zds.utils.management.commands.backfill_comments_metadata.render_markdown") as render:
+            render.return_value = ("", {}, [{"message": "erreur"}])
+            call_command("backfill_comments_metadata", stdout=StringIO())
+        self.assertIsNone(Comment.objects.get(pk=self.post.pk).text_metadata)
@@ -1,11 +1,14 @@
 from datetime import datetime, timedelta
 
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.test import TestCase
 
 from zds.forum.tests.factories import ForumCategoryFactory, ForumFactory, PostFactory, TopicFactory
 from zds.member.tests.factories import ProfileFactory, StaffProfileFactory
-from zds.utils.context_processor import header_notifications as notifications_processor
+from zds.notification.models import TopicAnswerSubscription
+from zds.utils.context_processor import app_settings, header_notifications as notifications_processor
+from zds.utils.header_notifications import get_header_notifications, invalidate_header_alerts
 from zds.utils.models import Alert
 
 
@@ -48,6 +51,12 @@ class AlertsTest(TestCase):
         self.assertEqual(19, alerts["total"])
         self.assertEqual(10, len(alerts["list"]))
 
+    def test_lazy(self):
+        user = self.staff.user
+        with self.assertNumQueries(0):
+            notifications = AlertsTest.__notifications(user)
+        self.assertEqual(20, notifications["header_alerts"]["total"])
+
     @staticmethod
     def __alerts(user):
         return AlertsTest.__notifications(user)["header_alerts"]
@@ -60,3 +69,55 @@ class AlertsTest(TestCase):
         r = Request()
         r.user = user
         return notifications_processor(r)
+
+
+class HeaderNotificationsCacheTest(TestCase):
+    def setUp(self):
+        self.author = ProfileFactory().user
+        self.follower = ProfileFactory().user
+        self.topic = TopicFactory(forum=ForumFactory(category=ForumCategoryFactory()), author=self.author)
+        PostFactory(topic=self.topic, author=self.author, position=1)
+        invalidate_header_alerts()
+
+    def test_notifications(self):
+        subscription = TopicAnswerSubscription.objects.get_or_create_active(self.follower, self.topic)
+        PostFactory(topic=self.topic, author=self.author, position=2)
+        notifications = get_header_notifications(self.follower)["general_notifications"]
+        self.assertEqual(1, notifications["total"])
+
+        # cached
+        with self.assertNumQueries(0):
+            get_header_notifications(self.follower)
+
+        # invalidated when the notification is read
+        subscription.refresh_from_db()
+        subscription.mark_notification_read()
+        self.assertEqual(0, get_header_notifications(self.follower)["general_notifications"]["total"])
+
+        # ... or created
+        PostFactory(topic=self.topic, author=self.author, position=3)
+        self.assertEqual(1, get_header_notifications(self.follower)["general_notifications"]["total"])
+
+    def test_alerts_are_shared(self):
+        staff1 = StaffProfileFactory().user
+        staff2 = StaffProfileFactory().user
+        alert = Alert.objects.create(
+            author=self.author, comment=self.topic.first_post(), scope="FORUM", text="old", pubdate=datetime.now()
+        )
+        self.assertEqual("old", get_header_notifications(staff1)["alerts"]["list"][0]["text"])
+
+        # the block computed for the first moderator is reused for the second one
+        Alert.objects.filter(pk=alert.pk).update(text="new")
+        self.assertEqual("old", get_header_notifications(staff2)["alerts"]["list"][0]["text"])
+
+        alert.solve(staff1)
+        self.assertEqual(0, get_header_notifications(staff2)["alerts"]["total"])
+
+
+class AppSettingsTest(TestCase):
+    def test_read_only(self):
+        app = app_settings(None)["app"]
+        self.assertEqual(settings.ZDS_APP["site"]["url"], app["site"]["url"])
+        with self.assertRaises(TypeError):
+            app["site"]["url"] = "https://example.com"
+        self.assertIsInstance(app["forum"]["greetings"], tuple)
@@ -0,0 +1,119 @@
+from copy import deepcopy
+from unittest.mock import Mock, patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from zds.utils import markdown_cache
+from zds.utils.templatetags.emarkdown import render_markdown, render_markdown_stats
+
+overridden_zds_app = deepcopy(settings.ZDS_APP)
+overridden_zds_app["zmd"]["cache"]["enabled"] = True
+overridden_zds_app["zmd"]["cache"]["local_max_entries"] = 2
+
+
+def zmd_response(content="<p>texte</p>", metadata=None, messages=None, status_code=200):
+    response = Mock(status_code=status_code)
+    response.json.return_value = [content, metadata or {}, messages or []]
+    return response
+
+
+@override_settings(ZDS_APP=overridden_zds_app)
+class MarkdownCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        markdown_cache.clear_local()
+
+    def tearDown(self):
+        markdown_cache.clear_local()
+
+    @patch("zds.utils.zmarkdown_client.ZMarkdownClient.post")
+    def test_same_input_is_rendered_once(self, post):
+        post.return_value = zmd_response(metadata={"ping": ["clem"]})
+
+        first = render_markdown("texte")
+        second = render_markdown("texte")
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second[1], {"ping": ["clem"]})
+
+        # an option changes the key
+        render_markdown("texte", inline=True)
+        self.assertEqual(post.call_count, 2)
+
+    @patch("zds.utils.zmarkdown_client.ZMarkdownClient.post")
+    def test_cached_metadata_cannot_be_altered(self, post):
+        post.return_value = zmd_response(metadata={"ping": ["clem"]})
+
+        _, metadata, _ = render_markdown("texte")
+        metadata["ping"].append("someone")
+
+        _, metadata, _ = render_markdown("texte")
+        self.assertEqual(metadata, {"ping": ["clem"]})
+
+    @patch("zds.utils.zmarkdown_client.ZMarkdownClient.post")
+    def test_shared_tier(self, post):
+        post.return_value = zmd_response()
+
+        render_markdown("texte")
+        markdown_cache.clear_local()  # as if we were in another process
+        content, _, _ = render_markdown("texte")
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(content, "<p>texte</p>")
+
+    @patch("zds.utils.zmarkdown_client.ZMarkdownClient.post")
+    def test_local_tier_is_bounded(self, post):
+        post.return_value = zmd_response()
+
+        for text in ("a", "b", "c"):
+            render_markdown(text)
+
+        self.assertEqual(len(markdown_cache.local_cache), 2)
+
+    @patch("zds.utils.zmarkdown_client.ZMarkdownClient.post")
+    def test_failures_are_not_cached(self, post):
+        post.return_value = zmd_response(status_code=413)
+        _, _, messages = render_markdown("texte")
+        self.assertEqual(len(messages), 1)
+
+        post.return_value = zmd_response(status_code=500)
+        render_markdown("texte")
+
+        post.return_value = zmd_response(messages=[{"message": "error"}])
+        render_markdown("texte")
+
+        post.return_value = zmd_response()
+        content, _, messages = render_markdown("texte")
+        self.assertEqual(content, "<p>texte</p>")
+        self.assertEqual(messages, [])
+
+    @patch("zds.utils.zmarkdown_client.ZMarkdownClient.post")
+    def test_per_format_timeout(self, post):
+        post.return_value = zmd_response(metadata={"stats": {"signs": 5}})
+
+        render_markdown_stats("texte")
+        render_markdown_stats("texte")
+        self.assertEqual(post.call_count, 1)
+
+        # no cache for formats whose timeout is 0, nor when images are downloaded
+        render_markdown("texte", output_format="epub")
+        render_markdown("texte", output_format="epub")
+        render_markdown("texte", images_download_dir="/tmp/images")
+        render_markdown("texte", images_download_dir="/tmp/images")
+        self.assertEqual(post.call_count, 5)
+
+    @patch("zds.utils.zmarkdown_client.ZMarkdownClient.post")
+    def test_disabled_cache(self, post):
+        post.return_value = zmd_response()
+
+        disabled_zds_app = deepcopy(overridden_zds_app)
+        disabled_zds_app["zmd"]["cache"]["enabled"] = False
+        with override_settings(ZDS_APP=disabled_zds_app):
+            render_markdown("texte")
+            render_markdown("texte")
+
+        self.assertEqual(post.call_count, 2)
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from django.core.paginator import EmptyPage
+from django.test import TestCase
+
+from zds.forum.models import Post
+from zds.forum.tests.factories import PostFactory, create_category_and_forum, create_topic_in_forum
+from zds.member.tests.factories import ProfileFactory
+from zds.utils.paginator import KeysetPaginator, PositionPaginator
+
+
+class PositionPaginatorTest(TestCase):
+    def setUp(self):
+        profile = ProfileFactory()
+        _, forum = create_category_and_forum()
+        self.topic = create_topic_in_forum(forum, profile)
+        self.posts = [self.topic.last_message] + [
+            PostFactory(topic=self.topic, author=profile.user, position=position) for position in range(2, 8)
+        ]
+        self.paginator = PositionPaginator(Post.objects.filter(topic=self.topic).order_by("position"), 3, 7)
+
+    def test_pages_are_ranges_of_positions(self):
+        self.assertEqual(3, self.paginator.num_pages)
+
+        with self.assertNumQueries(1):
+            page = self.paginator.page(1)
+        self.assertEqual(self.posts[:3], page.object_list)
+        self.assertIsNone(page.previous_item)
+
+        with self.assertNumQueries(1):
+            page = self.paginator.page(2)
+        self.assertEqual(self.posts[3:6], page.object_list)
+        self.assertEqual(self.posts[2], page.previous_item)
+        self.assertEqual(4, page.start_index())
+
+        page = self.paginator.page(3)
+        self.assertEqual(self.posts[6:], page.object_list)
+        self.assertFalse(page.has_next())
+
+        with self.assertRaises(EmptyPage):
+            self.paginator.page(4)
+
+    def test_missing_positions(self):
+        # the page of a post only depends on its position, as in its URL
+        self.posts[3].delete()
+        page = self.paginator.page(2)
+        self.assertEqual(self.posts[4:6], page.object_list)
+        self.assertEqual(self.posts[2], page.previous_item)
+
+
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        profile = ProfileFactory()
+        _, forum = create_category_and_forum()
+        self.topic = create_topic_in_forum(forum, profile)
+        posts = [self.topic.last_message] + [
+            PostFactory(topic=self.topic, author=profile.user, position=position) for position in range(2, 8)
+        ]
+        # the posts are ordered by date, then by primary key
+        date = datetime.now()
+        for post, delta in zip(posts, [0, 1, 1, 1, 2, 3, 3]):
+            Post.objects.filter(pk=post.pk).update(pubdate=date + timedelta(minutes=delta))
+        self.posts = list(Post.objects.filter(topic=self.topic).order_by("pubdate", "pk"))
+        self.paginator = KeysetPaginator(Post.objects.filter(topic=self.topic).select_related("author"), 3, 7)
+
+    def test_pages(self):
+        self.assertEqual(3, self.paginator.num_pages)
+
+        with self.assertNumQueries(1):
+            page = self.paginator.page(1)
+            self.assertEqual(self.posts[0].author_id, page.object_list[0].author.pk)
+        self.assertEqual(self.posts[:3], page.object_list)
+        self.assertIsNone(page.previous_item)
+
+        with self.assertNumQueries(2):
+            page = self.paginator.page(2)
+        self.assertEqual(self.posts[3:6], page.object_list)
+        self.assertEqual(self.posts[2], page.previous_item)
+        self.assertEqual(4, page.start_index())
+
+        page = self.paginator.page(3)
+        self.assertEqual(self.posts[6:], page.object_list)
+        self.assertEqual(self.posts[5], page.previous_item)
+        self.assertFalse(page.has_next())
+
+        with self.assertRaises(EmptyPage):
+            self.paginator.page(4)
@@ -0,0 +1,59 @@
+from unittest.mock import Mock, patch
+
+import requests
+from django.test import TestCase
+
+from zds.utils.zmarkdown_client import ZMarkdownClient, ZMarkdownUnavailable
+
+
+class ZMarkdownClientTest(TestCase):
+    def setUp(self):
+        self.client = ZMarkdownClient(pool_size=4, failure_threshold=2, reset_timeout=30)
+
+    def test_post(self):
+        with patch.object(self.client.session, "post", return_value=Mock(status_code=200)) as post:
+            response = self.client.post("/html", {"md": "texte", "opts": {}}, timeout=10)
+
+        self.assertEqual(response.status_code, 200)
+        url = post.call_args.args[0]
+        self.assertTrue(url.endswith("/html"))
+        self.assertEqual(post.call_args.kwargs["json"], {"md": "texte", "opts": {}})
+
+    def test_circuit_breaker(self):
+        with patch.object(self.client.session, "post", side_effect=requests.ConnectionError) as post:
+            for _ in range(2):
+                with self.assertRaises(requests.ConnectionError):
+                    self.client.post("/html", {}, timeout=10)
+            self.assertTrue(self.client.circuit_breaker.is_open)
+
+            # the server is not called anymore
+            with self.assertRaises(ZMarkdownUnavailable):
+                self.client.post("/html", {}, timeout=10)
+            self.assertEqual(post.call_count, 2)
+
+        # once the timeout is elapsed, a successful call closes the circuit
+        self.client.circuit_breaker.opened_at -= 30
+        with patch.object(self.client.session, "post", return_value=Mock(status_code=200)):
+            self.client.post("/html", {}, timeout=10)
+        self.assertFalse(self.client.circuit_breaker.is_open)
+
+    def test_unavailable_server_counts_as_failure(self):
+        with patch.object(self.client.session, "post", return_value=Mock(status_code=503)):
+            self.client.post("/html", {}, timeout=10)
+            self.client.post("/html", {}, timeout=10)
+        self.assertTrue(self.client.circuit_breaker.is_open)
+
+    def test_rendering_errors_do_not_count_as_failures(self):
+        with patch.object(self.client.session, "post", return_value=Mock(status_code=500)):
+            self.client.post("/html", {}, timeout=10)
+            self.client.post("/html", {}, timeout=10)
+        self.assertFalse(self.client.circuit_breaker.is_open)
+
+    def test_read_errors_are_not_retried(self):
+        retries = self.client.session.get_adapter("http://localhost").max_retries
+        self.assertEqual(retries.read, 0)
+        self.assertEqual(set(retries.status_forcelist), {502, 503, 504})
+
+    def test_map_keeps_order(self):
+        self.assertEqual(self.client.map(lambda x: x * 2, range(20)), [x * 2 for x in range(20)])
+        self.assertEqual(self.client.map(lambda x: x, []), [])
@@ -0,0 +1,139 @@
+"""
+HTTP client for the zmarkdown server.
+
+All the renderings go through a single ``requests.Session`` per process, so
+that the TCP connections to zmarkdown are pooled and kept alive. Transient
+failures (connection errors and 502/503/504 answers) are retried with an
+exponential backoff. Read errors are not: the server may still be rendering a
+heavy document and sending it again would only add to its load. A circuit
+breaker makes the calls fail fast when the server keeps failing, instead of
+piling up requests waiting for their timeout.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# answers of a proxy in front of an unreachable or overloaded server; a 500 is a rendering error of the
+# document itself, which says nothing about the health of the server
+UNAVAILABLE_STATUSES = (502, 503, 504)
+
+
+class ZMarkdownUnavailable(requests.ConnectionError):
+    """Raised without contacting the server when the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Counts consecutive failures and opens the circuit for ``reset_timeout`` seconds after ``failure_threshold``.
+
+    Once the timeout is elapsed, a single call is let through: the circuit is closed again if it succeeds,
+    and re-opened if it fails.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # half-open: let this call test the server, the next ones wait for its result
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.error("The markdown server failed %d times in a row, stop calling it", self.failures)
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+
+class ZMarkdownClient:
+    def __init__(self, *, pool_size=10, max_retries=2, backoff_factor=0.2, failure_threshold=5, reset_timeout=30):
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        retries = Retry(
+            total=max_retries,
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=UNAVAILABLE_STATUSES,
+            allowed_methods=None,  # renderings are idempotent, POST can be retried
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def post(self, endpoint, payload, timeout):
+        """Send a rendering request to the zmarkdown server.
+
+        :param endpoint: the path of the endpoint, e.g. ``/html``
+        :param payload: the JSON body of the request
+        :param timeout: timeout in seconds
+        :raise ZMarkdownUnavailable: if the circuit breaker is open
+        :raise requests.RequestException: if the server cannot be reached, even after the retries
+        :rtype: requests.Response
+        """
+        if not self.circuit_breaker.allow_request():
+            raise ZMarkdownUnavailable("The markdown server is unavailable")
+        try:
+            response = self.session.post(
+                "{}{}".format(settings.ZDS_APP["zmd"]["server"], endpoint), json=payload, timeout=timeout
+            )
+        except requests.RequestException:
+            self.circuit_breaker.record_failure()
+            raise
+        if response.status_code in UNAVAILABLE_STATUSES:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        return response
+
+    def map(self, func, iterable):
+        """Call ``func`` on each item concurrently, using at most one thread per pooled connection.
+
+        zmarkdown has no batch endpoint, so batches are sent as concurrent requests sharing the pool.
+        Results are returned in the order of ``iterable`` and the first exception raised is propagated.
+        """
+        items = list(iterable)
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        executor = ThreadPoolExecutor(max_workers=min(self.pool_size, len(items)))
+        try:
+            return list(executor.map(func, items))
+        finally:
+            # on failure, do not start the calls which are still pending
+            executor.shutdown(cancel_futures=True)
+
+
+@lru_cache  # one client, hence one connection pool, per process
+def get_zmarkdown_client():
+    config = settings.ZDS_APP["zmd"].get("client", {})
+    return ZMarkdownClient(**config)